@@ -1,9 +1,26 @@
+import keyword
 import pickle
+import re
+import weakref
 
 import six
 
+from .tokenizer import JavaToken, Position
+
 
 class MetaNode(type):
+    """ Collects the attrs of a node class and its bases and makes the class
+    slotted. Slots are generated for every attr not already slotted by a base,
+    for the node's position and for any names listed in extra_slots, which
+    are attributes that are set on some nodes but are not children, or in
+    cache_slots, which hold data derived from the tree and are not part of a
+    node's state. A class which defines __slots__ itself is left as it is.
+
+    """
+
+    # All node classes by registry name, i.e. qualified class name
+    registry = {}
+
     def __new__(mcs, name, bases, dict):
         attrs = list(dict['attrs'])
         dict['attrs'] = list()
@@ -14,13 +31,112 @@ class MetaNode(type):
 
         dict['attrs'].extend(attrs)
 
-        return type.__new__(mcs, name, bases, dict)
+        extra_attrs = list()
+        for base in bases:
+            for attr in getattr(base, 'extra_attrs', ()):
+                if attr not in extra_attrs:
+                    extra_attrs.append(attr)
+        for attr in dict.get('extra_slots', ()):
+            if attr not in extra_attrs:
+                extra_attrs.append(attr)
+        extra_attrs = [attr for attr in extra_attrs if attr not in dict['attrs']]
+        dict['extra_attrs'] = tuple(extra_attrs)
+
+        cache_attrs = list()
+        for base in bases:
+            cache_attrs.extend(getattr(base, 'cache_attrs', ()))
+        cache_attrs.extend(dict.get('cache_slots', ()))
+        dict['cache_attrs'] = tuple(cache_attrs)
+
+        if '__slots__' not in dict:
+            slotted = set()
+            for base in bases:
+                for klass in base.__mro__:
+                    slotted.update(klass.__dict__.get('__slots__', ()))
+
+            # Nodes can be weakly referenced, which link_parents relies on
+            wanted = ['_position', '__weakref__'] + dict['attrs'] + extra_attrs + cache_attrs
+            slots = list()
+            for attr in wanted:
+                if attr not in slotted and attr not in slots:
+                    slots.append(attr)
+            dict['__slots__'] = tuple(slots)
+
+        dict['registry_name'] = '%s.%s' % (dict['__module__'], name)
+
+        cls = type.__new__(mcs, name, bases, dict)
+        mcs.registry[cls.registry_name] = cls
+
+        cls.all_slots = tuple(attr for klass in reversed(cls.__mro__)
+                              for attr in klass.__dict__.get('__slots__', ())
+                              if attr != '__weakref__' and attr not in cache_attrs)
+
+        names = _argument_names(cls.attrs)
+
+        # Replace the generic constructor unless a class in the hierarchy
+        # defines its own
+        if ('__init__' not in dict and names is not None and
+                getattr(cls.__init__, 'generic', False)):
+            cls.__init__ = _make_init(names)
+
+        if '_children' not in dict and names is not None:
+            cls._children = _make_children(names)
+
+        return cls
+
+
+_identifier = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _argument_names(attrs):
+    """ Returns the unique attrs in order, or None if they can not all be
+    used as argument names of a generated function.
+
+    """
+
+    names = list()
+    for attr in attrs:
+        if (not _identifier.match(attr) or keyword.iskeyword(attr) or
+                attr in ('self', 'kwargs')):
+            return None
+        if attr not in names:
+            names.append(attr)
+
+    return names
+
+def _compile(name, lines):
+    namespace = {}
+    six.exec_('\n'.join(lines) + '\n', namespace)
+    return namespace[name]
+
+def _make_init(names):
+    """ Generates a constructor taking the given attrs as positional or
+    keyword arguments, all defaulting to None.
+
+    """
+
+    lines = ['def __init__(self%s, **kwargs):' % ''.join(', %s=None' % name for name in names),
+             '    if kwargs:',
+             '        raise ValueError("Extraneous arguments")']
+    lines.extend('    self.%s = %s' % (name, name) for name in names)
+
+    init = _compile('__init__', lines)
+    init.generic = True
+    return init
+
+def _make_children(names):
+    """ Generates a method returning the values of the given attrs as a tuple """
+
+    return _compile('_children', ['def _children(self):',
+                     '    return (%s)' % ''.join('self.%s, ' % name for name in names)])
 
 
 @six.add_metaclass(MetaNode)
 class Node(object):
     attrs = ()
 
+    # Set by link_parents, structural_hash and parsers recording spans
+    cache_slots = ('_link', '_hash', '_span')
+
     def __init__(self, **kwargs):
         values = kwargs.copy()
 
@@ -31,15 +147,64 @@ class Node(object):
         if values:
             raise ValueError('Extraneous arguments')
 
-    def __equals__(self, other):
-        if type(other) is not type(self):
-            return False
+    # MetaNode replaces this with a generated equivalent in subclasses
+    __init__.generic = True
 
-        for attr in self.attrs:
-            if getattr(other, attr) != getattr(self, attr):
-                return False
+    def __getstate__(self):
+        state = dict()
+        for attr in self.all_slots:
+            try:
+                state[attr] = getattr(self, attr)
+            except AttributeError:
+                pass
+        return state
+
+    def __setstate__(self, state):
+        # Also accepts the __dict__ of nodes pickled before nodes were slotted
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+# ------------------------------------------------------------------------------
+# ---- Structural equality ----
+#
+# Nodes are equal when they are of the same type and their attrs and extra
+# attrs are equal, comparing child nodes in the same way. Positions are not compared by
+# default. A node's structural hash is cached on it when first computed, so
+# a node must not be modified once it has been hashed or compared with a
+# hashed node.
+
+    def __eq__(self, other):
+        if not isinstance(other, Node):
+            return NotImplemented
+        return _equal(self, other, _DEFAULT_OPTIONS)
+
+    def __ne__(self, other):
+        if not isinstance(other, Node):
+            return NotImplemented
+        return not _equal(self, other, _DEFAULT_OPTIONS)
+
+    def __hash__(self):
+        return _node_hash(self, _DEFAULT_OPTIONS)
+
+    __equals__ = __eq__
+
+    def equals(self, other, positions=False, documentation=True):
+        """ Compares the trees rooted at the two nodes, optionally including
+        the positions of nodes or excluding their documentation.
+
+        """
+
+        return _equal(self, other, (positions, documentation))
 
-        return True
+    def structural_hash(self, positions=False, documentation=True):
+        """ Returns a hash consistent with equals() given the same options.
+        Hashes are computed bottom-up and cached for the last options used.
+        The cache is not updated when the tree is modified, so equality never
+        relies on it.
+
+        """
+
+        return _node_hash(self, (positions, documentation))
 
     def __repr__(self):
         attr_values = []
@@ -51,36 +216,676 @@ class Node(object):
         return walk_tree(self)
 
     def filter(self, pattern):
+        """ Generates the (path, node) pairs of walk_tree for which node is an
+        instance of pattern, if pattern is a type, or equal to pattern. Uses
+        the node's index, if it has one, for node types.
+
+        """
+
+        index = getattr(self, '_index', None)
+        if index is not None and isinstance(pattern, MetaNode):
+            return iter(index.get(pattern))
+
+        return self._filter(pattern)
+
+    def _filter(self, pattern):
         for path, node in self:
             if ((isinstance(pattern, type) and isinstance(node, pattern)) or
                 (node == pattern)):
                 yield path, node
 
+    def _children(self):
+        # The values of all attrs, in order. MetaNode generates an equivalent
+        # method for each class.
+        return tuple(getattr(self, attr_name) for attr_name in self.attrs)
+
     @property
     def children(self):
-        return [getattr(self, attr_name) for attr_name in self.attrs]
-    
+        return list(self._children())
+
     @property
     def position(self):
-        if hasattr(self, "_position"):
-            return self._position
+        return getattr(self, "_position", None)
+
+# ------------------------------------------------------------------------------
+# ---- Source spans ----
+#
+# Spans are recorded by a parser with span recording enabled, see
+# Parser.set_spans. They are not preserved by pickling or serialization.
+
+    @property
+    def span(self):
+        """ The first and last token of the node, or None """
+
+        return getattr(self, "_span", None)
+
+    @property
+    def start_position(self):
+        span = getattr(self, "_span", None)
+        if span is not None:
+            return span[0].position
+
+    @property
+    def end_position(self):
+        """ The position following the last character of the node """
+
+        span = getattr(self, "_span", None)
+        if span is not None:
+            token = span[1]
+            return Position(token.position.line,
+                            token.position.column + token.end_offset - token.offset)
+
+    @property
+    def offsets(self):
+        """ The start and end offsets of the node in the source """
+
+        span = getattr(self, "_span", None)
+        if span is not None:
+            return span[0].offset, span[1].end_offset
+
+    def source_text(self, source):
+        """ Returns the node's text within the source it was parsed from """
+
+        span = getattr(self, "_span", None)
+        if span is not None:
+            return source[span[0].offset:span[1].end_offset]
+
+# ------------------------------------------------------------------------------
+# ---- Navigation ----
+#
+# The following require the tree to have been linked with link_parents. They
+# return None for the root, for nodes which have not been linked and for nodes
+# whose parent no longer exists.
+
+    @property
+    def parent(self):
+        link = getattr(self, '_link', None)
+        if link is not None:
+            return link[0]()
+
+    @property
+    def parent_attr(self):
+        """ The name of the parent's attr holding this node """
+
+        link = getattr(self, '_link', None)
+        if link is not None:
+            return link[1]
+
+    @property
+    def parent_index(self):
+        """ The index of this node in the list held by parent_attr, a tuple of
+        indexes for nested lists, or None if the attr holds this node directly.
+
+        """
+
+        link = getattr(self, '_link', None)
+        if link is not None and link[2]:
+            indexes = link[2]
+            return indexes[0] if len(indexes) == 1 else indexes
+
+    def _sibling(self, offset):
+        link = getattr(self, '_link', None)
+        if link is None or not link[2]:
+            return None
+
+        parent, attr, indexes = link
+        parent = parent()
+        if parent is None:
+            return None
+
+        siblings = getattr(parent, attr)
+        for i in indexes[:-1]:
+            siblings = siblings[i]
+
+        i = indexes[-1] + offset
+        if 0 <= i < len(siblings) and isinstance(siblings[i], Node):
+            return siblings[i]
+
+    @property
+    def next_sibling(self):
+        """ The node following this one in the list holding it """
+
+        return self._sibling(1)
+
+    @property
+    def previous_sibling(self):
+        """ The node preceding this one in the list holding it """
+
+        return self._sibling(-1)
+
+    def ancestors(self):
+        """ Generates the parent of this node, its parent and so on """
+
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def enclosing(self, node_type):
+        """ Returns the nearest ancestor which is an instance of node_type """
+
+        for node in self.ancestors():
+            if isinstance(node, node_type):
+                return node
+
+_DEFAULT_OPTIONS = (False, True)
+
+def _node_hash(node, options):
+    cached = getattr(node, '_hash', None)
+    if cached is not None and cached[0] == options:
+        return cached[1]
+
+    # Children are hashed before their parents, so that _value_hash finds
+    # their hashes cached rather than recursing into deep trees
+    pending = [node]
+    order = list()
+    while pending:
+        current = pending.pop()
+        order.append(current)
+        for child in child_nodes(current):
+            cached = getattr(child, '_hash', None)
+            if cached is None or cached[0] != options:
+                pending.append(child)
+
+    for current in reversed(order):
+        _hash_node(current, options)
+
+    return node._hash[1]
+
+def _hash_node(node, options):
+    positions, documentation = options
+    values = [type(node).registry_name]
+
+    if positions:
+        values.append(getattr(node, '_position', None))
+
+    for attr in node.attrs:
+        if attr == 'documentation' and not documentation:
+            continue
+        values.append(_value_hash(getattr(node, attr), options))
+
+    for attr in node.extra_attrs:
+        if attr == 'documentation' and not documentation:
+            continue
+        extra = _extra_value(node, attr)
+        if extra is not None:
+            values.append((attr, _value_hash(extra, options)))
+
+    node._hash = (options, hash(tuple(values)))
+
+def _extra_value(node, attr):
+    # Extra attrs are usually unset, and the parser leaves them None or empty
+    value = getattr(node, attr, None)
+    if isinstance(value, list) and not value:
+        return None
+    return value
+
+def _value_hash(value, options):
+    if isinstance(type(value), MetaNode):
+        return _node_hash(value, options)
+    elif isinstance(value, (list, tuple)):
+        return hash(tuple(_value_hash(item, options) for item in value))
+    elif isinstance(value, (set, frozenset)):
+        return hash(frozenset(_value_hash(item, options) for item in value))
+    elif isinstance(value, JavaToken):
+        return hash((type(value).__name__, value.value))
+    else:
+        return hash(value)
+
+def _equal(a, b, options):
+    positions, documentation = options
+
+    # Pairs of values still to compare, kept on a stack for deep trees
+    stack = [(a, b)]
+
+    while stack:
+        a, b = stack.pop()
+
+        if a is b:
+            continue
+
+        if isinstance(type(a), MetaNode):
+            if type(a) is not type(b):
+                return False
+
+            if positions and getattr(a, '_position', None) != getattr(b, '_position', None):
+                return False
+
+            for attr in a.attrs:
+                if attr == 'documentation' and not documentation:
+                    continue
+                stack.append((getattr(a, attr), getattr(b, attr)))
+
+            for attr in a.extra_attrs:
+                if attr == 'documentation' and not documentation:
+                    continue
+                stack.append((_extra_value(a, attr), _extra_value(b, attr)))
+        elif isinstance(a, (list, tuple)):
+            if type(a) is not type(b) or len(a) != len(b):
+                return False
+
+            stack.extend(zip(a, b))
+        elif isinstance(a, JavaToken):
+            if type(a) is not type(b) or a.value != b.value:
+                return False
+        elif isinstance(b, JavaToken) or isinstance(type(b), MetaNode):
+            return False
+        elif not a == b:
+            return False
+
+    return True
+
+def fill_spans(root):
+    """ Gives each node below root that has no span the span covering the
+    spans of its children. The parser calls this for the nodes it returns.
+
+    """
+
+    for node in reversed(list(walk_nodes(root))):
+        if getattr(node, '_span', None) is not None:
+            continue
+
+        start = end = None
+        for child in child_nodes(node):
+            span = getattr(child, '_span', None)
+            if span is None:
+                continue
+            if start is None or span[0].offset < start.offset:
+                start = span[0]
+            if end is None or span[1].end_offset > end.end_offset:
+                end = span[1]
+
+        if start is not None:
+            node._span = (start, end)
+
+def child_nodes(node):
+    """ Generates the nodes held by the node's attrs, directly or in lists """
+
+    stack = list(node._children())
+    stack.reverse()
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(type(value), MetaNode):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            stack.extend(reversed(value))
+
+def link_parents(root):
+    """ Links every node below root to its parent, the attr holding it and
+    its index, making the navigation properties of Node available. Parents
+    are weakly referenced so no reference cycles are created. Links are not
+    updated as the tree changes, so the tree must be linked again after it is
+    modified.
+
+    """
+
+    if isinstance(root, Node):
+        root._link = None
+        stack = [root]
+    else:
+        stack = list()
+        _link(None, None, (), root, stack)
+
+    while stack:
+        node = stack.pop()
+        ref = weakref.ref(node)
+
+        for attr in node.attrs:
+            _link(ref, attr, (), getattr(node, attr), stack)
+
+def _link(ref, attr, indexes, value, stack):
+    if isinstance(type(value), MetaNode):
+        value._link = (ref, attr, indexes) if ref is not None else None
+        stack.append(value)
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            _link(ref, attr, indexes + (i,), item, stack)
+
+# The walkers test isinstance(type(child), MetaNode) rather than
+# isinstance(child, Node), which is equivalent but considerably faster since
+# isinstance has a fast path for classes whose metaclass is type.
 
 def walk_tree(root):
-    children = None
+    """ Generates a (path, node) pair for every node of the tree in pre-order,
+    where path is a tuple of the nodes and lists enclosing node. Siblings
+    share the same path tuple.
+
+    """
 
     if isinstance(root, Node):
         yield (), root
-        children = root.children
+        stack = [(iter(root._children()), (root,))]
     else:
-        children = root
+        stack = [(iter(root), (root,))]
+
+    while stack:
+        children, path = stack[-1]
+
+        for child in children:
+            if isinstance(type(child), MetaNode):
+                yield path, child
+                stack.append((iter(child._children()), path + (child,)))
+                break
+            elif isinstance(child, (list, tuple)):
+                stack.append((iter(child), path + (child,)))
+                break
+        else:
+            stack.pop()
+
+class NodeIndex(object):
+    """ The (path, node) pairs of walk_tree(root) grouped by node type. Each
+    node is listed under its own class and every node class it derives from,
+    in the order of the walk. The index does not follow changes to the tree.
+
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = dict()
+
+        node_types = dict()
+
+        for path, node in walk_tree(root):
+            cls = type(node)
+            mro = node_types.get(cls)
+            if mro is None:
+                mro = [klass for klass in cls.__mro__ if isinstance(klass, MetaNode)]
+                for klass in mro:
+                    if klass not in self.nodes:
+                        self.nodes[klass] = list()
+                mro = node_types[cls] = [self.nodes[klass] for klass in mro]
+
+            for pairs in mro:
+                pairs.append((path, node))
+
+    def get(self, node_type):
+        """ Returns the list of (path, node) pairs for nodes of the given
+        type. The list must not be modified.
+
+        """
+
+        return self.nodes.get(node_type, ())
+
+    def count(self, node_type):
+        return len(self.nodes.get(node_type, ()))
+
+    def __contains__(self, node_type):
+        return node_type in self.nodes
+
+def walk_nodes(root):
+    """ Generates every node of the tree in the same order as walk_tree, but
+    without paths.
+
+    """
+
+    if isinstance(root, Node):
+        yield root
+        stack = [iter(root._children())]
+    else:
+        stack = [iter(root)]
+
+    while stack:
+        for child in stack[-1]:
+            if isinstance(type(child), MetaNode):
+                yield child
+                stack.append(iter(child._children()))
+                break
+            elif isinstance(child, (list, tuple)):
+                stack.append(iter(child))
+                break
+        else:
+            stack.pop()
+
+def walk_ancestors(root):
+    """ Generates an (ancestors, node) pair for every node of the tree in the
+    same order as walk_tree. ancestors is a single AncestorView shared by all
+    pairs, holding what walk_tree would give as the path. It changes as the
+    walk advances, so it must be copied to be kept.
+
+    """
+
+    path = list()
+    view = AncestorView(path)
+
+    if isinstance(root, Node):
+        yield view, root
+        stack = [iter(root._children())]
+    else:
+        stack = [iter(root)]
+    path.append(root)
+
+    while stack:
+        for child in stack[-1]:
+            if isinstance(type(child), MetaNode):
+                yield view, child
+                stack.append(iter(child._children()))
+                path.append(child)
+                break
+            elif isinstance(child, (list, tuple)):
+                stack.append(iter(child))
+                path.append(child)
+                break
+        else:
+            stack.pop()
+            path.pop()
 
-    for child in children:
-        if isinstance(child, (Node, list, tuple)):
-            for path, node in walk_tree(child):
-                yield (root,) + path, node
+
+class AncestorView(object):
+    """ A read-only sequence of the nodes and lists enclosing the current node
+    of walk_ancestors, outermost first.
+
+    """
+
+    __slots__ = ('_path',)
+
+    def __init__(self, path):
+        self._path = path
+
+    def __len__(self):
+        return len(self._path)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._path[index])
+        return self._path[index]
+
+    def __iter__(self):
+        return iter(self._path)
+
+    def __repr__(self):
+        return 'AncestorView(%r)' % (tuple(self._path),)
+
+# ------------------------------------------------------------------------------
+# ---- Visitors ----
+
+# Handler for each node class, per visitor class
+_dispatch_tables = dict()
+
+# The node classes each visitor class leaves to NodeVisitor.generic_visit, or
+# None for visitor classes overriding visit()
+_expanded = dict()
+
+_empty = dict()
+
+
+class NodeVisitor(object):
+    """ Walks a tree, calling the visit_<ClassName> method of the visitor for
+    each node. The handler used is that for the first class in the node's
+    MRO for which the visitor defines one, so visit_Statement handles all
+    statements without a more specific handler. Nodes without a handler are
+    passed to generic_visit, which visits their children. A handler must call
+    generic_visit itself for the children of its node to be visited, so
+    returning without doing so prunes the subtree.
+
+    Handlers are looked up once per visitor class and node class.
+
+    Nodes without a handler are visited without recursion, but each handler
+    calling generic_visit nests within the handler of the node above it. A
+    visitor handling every node, such as one defining visit_Node, can only
+    visit trees about half as deep as the recursion limit, which deeply
+    nested expressions such as long concatenations may exceed.
+
+    """
+
+    def visit(self, node):
+        """ Visits the node, returning the result of its handler """
+
+        try:
+            handler = _dispatch_tables[type(self)][type(node)]
+        except KeyError:
+            handler = self._resolve(type(node))
+
+        return handler(self, node)
+
+    @classmethod
+    def _resolve(cls, node_type):
+        table = _dispatch_tables.setdefault(cls, dict())
+
+        handler = cls.generic_visit
+        for klass in node_type.__mro__:
+            method = getattr(cls, 'visit_' + klass.__name__, None)
+            if method is not None:
+                handler = method
+                break
+
+        table[node_type] = handler
+
+        # Nodes left to generic_visit are expanded by it rather than visited,
+        # unless the visitor overrides visit() or generic_visit()
+        if _unbound(cls.visit) is not _visit:
+            _expanded[cls] = None
+        else:
+            expanded = _expanded.setdefault(cls, set())
+            if _unbound(handler) is _generic_visit:
+                expanded.add(node_type)
+
+        return handler
+
+    def generic_visit(self, node):
+        """ Visits the children of the node, or the items of a list. Children
+        left to this method are visited here rather than through visit(),
+        from a stack.
+
+        """
+
+        cls = type(self)
+        table = _dispatch_tables.get(cls, _empty)
+        expanded = _expanded.get(cls, _empty)
+
+        if isinstance(type(node), MetaNode):
+            stack = [iter(node._children())]
+        else:
+            stack = [iter(node)]
+
+        while stack:
+            for child in stack[-1]:
+                child_type = type(child)
+                if isinstance(child_type, MetaNode):
+                    handler = table.get(child_type)
+                    if handler is None:
+                        handler = cls._resolve(child_type)
+                        table = _dispatch_tables[cls]
+                        expanded = _expanded[cls]
+
+                    if expanded is None:
+                        self.visit(child)
+                    elif child_type in expanded:
+                        stack.append(iter(child._children()))
+                        break
+                    else:
+                        handler(self, child)
+                elif child_type is list or child_type is tuple:
+                    # Most children are strings or None, for which this is
+                    # faster than isinstance(), and trees hold plain lists
+                    stack.append(iter(child))
+                    break
+            else:
+                stack.pop()
+
+
+def _unbound(method):
+    # The function of an unbound method under Python 2
+    return getattr(method, '__func__', method)
+
+_visit = NodeVisitor.__dict__['visit']
+_generic_visit = NodeVisitor.__dict__['generic_visit']
+
+
+class NodeTransformer(NodeVisitor):
+    """ A NodeVisitor which replaces each visited node with the result of its
+    handler. Returning the node keeps it, returning another node replaces it
+    and returning None removes it. Where the node is an item of a list, a
+    list may also be returned to replace it with several nodes. Lists are
+    modified in place.
+
+    Every node is visited within the visit of its parent, so the depth of
+    the trees a transformer can visit is limited as for a NodeVisitor
+    handling every node.
+
+    """
+
+    def generic_visit(self, node):
+        if not isinstance(type(node), MetaNode):
+            return self._transform(node)
+
+        for attr in node.attrs:
+            value = getattr(node, attr)
+
+            if isinstance(type(value), MetaNode):
+                result = self.visit(value)
+                if result is not value:
+                    setattr(node, attr, result)
+            elif isinstance(value, (list, tuple)):
+                result = self._transform(value)
+                if result is not value:
+                    setattr(node, attr, result)
+
+        return node
+
+    def _transform(self, values):
+        results = list()
+
+        for value in values:
+            if isinstance(type(value), MetaNode):
+                result = self.visit(value)
+                if result is None:
+                    continue
+                elif isinstance(result, list):
+                    results.extend(result)
+                else:
+                    results.append(result)
+            elif isinstance(value, (list, tuple)):
+                results.append(self._transform(value))
+            else:
+                results.append(value)
+
+        if isinstance(values, list):
+            values[:] = results
+            return values
+        else:
+            return tuple(results)
 
 def dump(ast, file):
-    pickle.dump(ast, file)
+    """ Writes the tree to a binary file in the format described in
+    javalang.serialization.
+
+    """
+
+    from . import serialization
+    serialization.dump(ast, file)
 
 def load(file):
-    return pickle.load(file)
+    """ Reads a tree written by dump(). Trees pickled by earlier versions of
+    javalang are also accepted.
+
+    """
+
+    from . import serialization
+
+    data = file.read()
+    if data[:len(serialization.MAGIC)] == serialization.MAGIC:
+        return serialization.loads(data)
+    else:
+        return pickle.loads(data)
@@ -0,0 +1,124 @@
+import functools
+import multiprocessing
+import signal
+
+from . import parse
+
+
+class ParseTimeout(Exception):
+    pass
+
+
+# Per-file time limit in seconds, set in each worker process by _init_worker
+_timeout = None
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeout('Timed out after %s seconds' % (_timeout,))
+
+def _init_worker(timeout):
+    global _timeout
+
+    # Timeouts rely on interval timers, which are not available everywhere
+    if timeout and hasattr(signal, 'setitimer'):
+        _timeout = timeout
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+def _run(function, path):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if _timeout:
+            signal.setitimer(signal.ITIMER_REAL, _timeout)
+
+        try:
+            result = function(path, data)
+        finally:
+            if _timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    except Exception as e:
+        result = e
+
+    return path, result
+
+def _parse_source(path, data):
+    return parse.parse(data)
+
+def _parse_cached(cache, path, data):
+    return cache.parse(data)
+
+def map_paths(function, paths, workers=None, chunksize=8, ordered=True,
+              timeout=None, max_tasks_per_worker=None):
+    """ Applies function(path, data) to the contents of each path using a pool
+    of worker processes, generating (path, result) pairs as they complete.
+
+    Files are read by the workers. If reading the file or the function raises
+    an exception, or the function runs for longer than timeout seconds, the
+    exception is generated in place of the result. Results are generated in
+    the order of paths unless ordered is False. The function, its results and
+    any exceptions it raises must be picklable.
+
+    Workers are replaced after completing max_tasks_per_worker files, rounded
+    up to a whole number of chunks of chunksize files, which limits the growth
+    of their memory use over long runs. The default number of workers is the
+    number of CPUs.
+
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    # The pool counts each chunk of paths as a single task
+    max_chunks = None
+    if max_tasks_per_worker is not None:
+        max_chunks = -(-max_tasks_per_worker // chunksize)
+
+    pool = multiprocessing.Pool(processes=workers,
+                                initializer=_init_worker,
+                                initargs=(timeout,),
+                                maxtasksperchild=max_chunks)
+
+    completed = False
+
+    try:
+        task = functools.partial(_run, function)
+
+        if ordered:
+            results = pool.imap(task, paths, chunksize)
+        else:
+            results = pool.imap_unordered(task, paths, chunksize)
+
+        for result in results:
+            yield result
+
+        completed = True
+    finally:
+        # Stop the workers immediately if the results were abandoned
+        if completed:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+def parse_paths(paths, workers=None, chunksize=8, ordered=True, timeout=None,
+                max_tasks_per_worker=None, cache=None):
+    """ Parses each of the given Java source files in a pool of worker
+    processes, generating (path, CompilationUnit) pairs. Files which can not
+    be read or parsed, or which take longer than timeout seconds to parse, are
+    generated as (path, exception) instead. If a javalang.cache.ParseCache is
+    given the workers share it. See map_paths() for the remaining arguments.
+
+    """
+
+    if cache is None:
+        function = _parse_source
+    else:
+        function = functools.partial(_parse_cached, cache)
+
+    return map_paths(function, paths,
+                     workers=workers,
+                     chunksize=chunksize,
+                     ordered=ordered,
+                     timeout=timeout,
+                     max_tasks_per_worker=max_tasks_per_worker)
@@ -0,0 +1,207 @@
+import errno
+import hashlib
+import os
+import tempfile
+import zlib
+
+import six
+
+from . import __version__
+from . import parse
+from . import serialization
+
+
+class ParseCache(object):
+    """ A persistent cache of parsed compilation units.
+
+    Entries are stored as individual files under the cache directory, keyed by
+    a hash of the source bytes and the javalang version, so that a change to
+    either results in a miss. Entries are written to a temporary file and
+    renamed into place, so any number of processes may share a cache
+    directory. Trees are stored in the javalang.serialization format and
+    compressed. Reading an entry marks it as recently used by updating its
+    modification time; when the total size exceeds max_size bytes the least
+    recently used entries are removed until it is below low_water times
+    max_size.
+
+    """
+
+    suffix = '.ast'
+    format_version = 3
+
+    def __init__(self, directory, max_size=None, low_water=0.9):
+        self.directory = directory
+        self.max_size = max_size
+        self.low_water = low_water
+
+        # Estimated size of the cache directory, computed on first write
+        self.size = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Each process sharing a cache keeps its own size estimate and counts
+        state = self.__dict__.copy()
+        state['size'] = None
+        state['hits'] = state['misses'] = 0
+        return state
+
+# ------------------------------------------------------------------------------
+# ---- Keys and paths ----
+
+    def key(self, source):
+        if isinstance(source, six.text_type):
+            source = source.encode('utf-8')
+
+        digest = hashlib.sha1()
+        digest.update(('%s:%s:' % (__version__, self.format_version)).encode('ascii'))
+        digest.update(source)
+
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + self.suffix)
+
+    def entries(self):
+        """ Generates (path, size, mtime) for every entry in the cache """
+
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(self.suffix):
+                    continue
+
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Removed by another process
+                    continue
+
+                yield path, stat.st_size, stat.st_mtime
+
+# ------------------------------------------------------------------------------
+# ---- Reading and writing ----
+
+    def get(self, key):
+        """ Returns the tree stored under key, or None """
+
+        path = self.path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None
+
+        try:
+            tree = self.loads(data)
+        except Exception:
+            # Stored by an incompatible version or otherwise unreadable
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return tree
+
+    def put(self, key, tree):
+        path = self.path(key)
+        data = self.dumps(tree)
+
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            _replace(temp_path, path)
+        except BaseException:
+            self.remove(temp_path)
+            raise
+
+        if self.max_size is not None:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self.entries())
+            else:
+                self.size += len(data)
+
+            if self.size > self.max_size:
+                self.evict()
+
+    def dumps(self, tree):
+        return zlib.compress(serialization.dumps(tree))
+
+    def loads(self, data):
+        return serialization.loads(zlib.decompress(data))
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """ Removes the least recently used entries until the size of the cache
+        is below the low water mark.
+
+        """
+
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.max_size * self.low_water
+
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+
+            self.remove(path)
+            size -= entry_size
+
+        self.size = size
+
+    def clear(self):
+        for path, _, _ in list(self.entries()):
+            self.remove(path)
+
+        self.size = 0
+
+# ------------------------------------------------------------------------------
+# ---- Parsing ----
+
+    def parse(self, source):
+        """ Equivalent to javalang.parse.parse(source), returning the cached
+        tree when one exists.
+
+        """
+
+        key = self.key(source)
+        tree = self.get(key)
+
+        if tree is None:
+            self.misses += 1
+            tree = parse.parse(source)
+            self.put(key, tree)
+        else:
+            self.hits += 1
+
+        return tree
+
+def _replace(source, destination):
+    try:
+        replace = os.replace
+    except AttributeError:
+        # Python 2. Renaming over an existing file is atomic on POSIX
+        replace = os.rename
+
+    replace(source, destination)
@@ -0,0 +1,1144 @@
+from .ast import NodeVisitor
+from .parser import Parser
+from .tokenizer import JavaToken
+from . import tree
+
+
+# ------------------------------------------------------------------------------
+# ---- Precedence ----
+#
+# Each expression has a level, higher levels binding more tightly, and an
+# expression is parenthesized where it appears in a position requiring a
+# higher level than its own. Lambdas and method references extend as far
+# right as they can, so they rank just above assignments.
+
+_ASSIGNMENT = 0
+_LAMBDA = 1
+_TERNARY = 2
+_BINARY = 3
+
+_binary_levels = dict()
+for _level, _operators in enumerate(Parser.operator_precedence):
+    for _operator in _operators:
+        _binary_levels[_operator] = _BINARY + _level
+del _level, _operators, _operator
+
+_UNARY = _BINARY + len(Parser.operator_precedence)
+_PRIMARY = _UNARY + 1
+
+_levels = {
+    tree.Assignment: _ASSIGNMENT,
+    tree.LambdaExpression: _LAMBDA,
+    tree.MethodReference: _LAMBDA,
+    tree.TernaryExpression: _TERNARY,
+}
+
+# Modifiers are written in the order recommended by the JLS
+_modifier_order = dict((modifier, i) for i, modifier in enumerate([
+    'public', 'protected', 'private', 'abstract', 'default', 'static', 'final',
+    'transient', 'volatile', 'synchronized', 'native', 'strictfp']))
+
+def _modifier_key(modifier):
+    return (_modifier_order.get(modifier, len(_modifier_order)), modifier)
+
+def _has_extras(node):
+    # Whether the parser gave a parenthesized expression operators or selectors
+    return bool(getattr(node, 'prefix_operators', None) or
+                getattr(node, 'selectors', None) or
+                getattr(node, 'postfix_operators', None))
+
+def _cast_level(node):
+    # The operand of a cast may be a lambda with parenthesized parameters, in
+    # which case the cast extends as far right as the lambda does
+    operand = node.expression
+    while isinstance(operand, tree.Cast) and not _has_extras(operand):
+        operand = operand.expression
+
+    if isinstance(operand, tree.LambdaExpression) and not _has_extras(operand):
+        parameters = operand.parameters or ()
+        if len(parameters) != 1 or isinstance(
+                parameters[0], (tree.FormalParameter, tree.InferredFormalParameter)):
+            return _LAMBDA
+
+    return _UNARY
+
+def _dangles(statement):
+    # Whether an else following the statement would attach to an if within it
+    while True:
+        if isinstance(statement, tree.IfStatement):
+            if statement.else_statement is None:
+                return True
+            statement = statement.else_statement
+        elif isinstance(statement, (tree.WhileStatement, tree.ForStatement)):
+            statement = statement.body
+        else:
+            return False
+
+# ------------------------------------------------------------------------------
+# ---- Code generator ----
+
+class CodeGenerator(NodeVisitor):
+    """ Generates Java source from a tree. The source of a compilation unit
+    or a declaration parses back to an equal tree, and expressions are given
+    only the parentheses their precedence requires. Trees do not tell static
+    initializer blocks from instance initializers, which are both written as
+    instance initializers.
+
+    Output is written to a list of strings which is flushed to the output
+    file after each type declaration of a compilation unit. Subclasses may
+    override the visit_<ClassName> handler of a node class to change how its
+    nodes are written.
+
+    """
+
+    def __init__(self, indent='    '):
+        self.indent = indent
+        self.level = 0
+        self.prefix = ''
+        self.parts = list()
+        self.out = None
+
+    def generate(self, node, out):
+        """ Writes the source of the node to the file out """
+
+        self.out = out
+        try:
+            self.emit(node)
+            self.flush()
+        finally:
+            self.out = None
+            del self.parts[:]
+
+    def to_source(self, node):
+        """ Returns the source of the node """
+
+        try:
+            self.emit(node)
+            return ''.join(self.parts)
+        finally:
+            del self.parts[:]
+
+    def flush(self):
+        if self.out is not None and self.parts:
+            self.out.write(''.join(self.parts))
+            del self.parts[:]
+
+    def emit(self, node):
+        """ Writes a node of any kind. Declarations and statements are written
+        as whole lines at the current indentation.
+
+        """
+
+        if isinstance(node, (tree.TypeDeclaration, tree.MethodDeclaration,
+                             tree.FieldDeclaration, tree.ConstructorDeclaration,
+                             tree.AnnotationMethod)):
+            self.member(node)
+        elif isinstance(node, (tree.Statement, tree.LocalVariableDeclaration)):
+            self.statements([node])
+        elif isinstance(node, tree.Expression):
+            self.expression(node)
+        else:
+            self.visit(node)
+
+    def generic_visit(self, node):
+        raise TypeError("Can not generate source for %s" % (type(node).__name__,))
+
+# ------------------------------------------------------------------------------
+# -- Helpers --
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def indented(self):
+        self.level += 1
+        self.prefix = self.indent * self.level
+
+    def dedented(self):
+        self.level -= 1
+        self.prefix = self.indent * self.level
+
+    def comma_separated(self, items, write_item):
+        first = True
+        for item in items:
+            if not first:
+                self.parts.append(', ')
+            first = False
+            write_item(item)
+
+    def modifiers(self, modifiers):
+        if modifiers:
+            for modifier in sorted(modifiers, key=_modifier_key):
+                self.parts.append(modifier)
+                self.parts.append(' ')
+
+    def inline_annotations(self, annotations):
+        for annotation in annotations or ():
+            self.visit(annotation)
+            self.parts.append(' ')
+
+    def type_arguments(self, arguments):
+        self.parts.append('<')
+        self.comma_separated(arguments, self.visit)
+        self.parts.append('>')
+
+    def type_parameters(self, parameters):
+        if parameters:
+            self.parts.append('<')
+            self.comma_separated(parameters, self.visit)
+            self.parts.append('>')
+
+    def type_list(self, keyword, types):
+        if types:
+            self.parts.append(keyword)
+            self.comma_separated(types, self.visit)
+
+    def arguments(self, arguments):
+        self.parts.append('(')
+        self.comma_separated(arguments or (), self.expression)
+        self.parts.append(')')
+
+    def initializer(self, value):
+        if isinstance(value, tree.ArrayInitializer):
+            self.visit(value)
+        else:
+            self.expression(value)
+
+    def dimensions(self, dimensions):
+        if dimensions:
+            self.parts.append('[]' * len(dimensions))
+
+# ------------------------------------------------------------------------------
+# -- Compilation units --
+
+    def visit_CompilationUnit(self, node):
+        write = self.parts.append
+        separate = False
+
+        if node.package is not None:
+            self.visit(node.package)
+            separate = True
+
+        if node.imports:
+            if separate:
+                write('\n')
+            for declaration in node.imports:
+                self.visit(declaration)
+            separate = True
+
+        for declaration in node.types:
+            if separate:
+                write('\n')
+            self.member(declaration)
+            self.flush()
+            separate = True
+
+    def visit_PackageDeclaration(self, node):
+        write = self.parts.append
+
+        if node.documentation:
+            write(node.documentation)
+            write('\n')
+
+        for annotation in node.annotations or ():
+            self.visit(annotation)
+            write('\n')
+
+        write('package ')
+        write(node.name)
+        write(';\n')
+
+    def visit_Import(self, node):
+        write = self.parts.append
+
+        write('import static ' if node.static else 'import ')
+        write(node.path)
+        write('.*;\n' if node.wildcard else ';\n')
+
+# ------------------------------------------------------------------------------
+# -- Declarations --
+
+    def member(self, node):
+        """ Writes a member of a class body as whole lines. Initializer blocks
+        are lists of statements.
+
+        """
+
+        write = self.parts.append
+        prefix = self.prefix
+
+        if isinstance(node, list):
+            write(prefix)
+            self.block(node)
+            write('\n')
+            return
+
+        documentation = getattr(node, 'documentation', None)
+        if documentation:
+            write(prefix)
+            write(documentation)
+            write('\n')
+
+        for annotation in node.annotations or ():
+            write(prefix)
+            self.visit(annotation)
+            write('\n')
+
+        write(prefix)
+        self.modifiers(node.modifiers)
+        self.visit(node)
+        write('\n')
+
+    def class_body(self, declarations):
+        write = self.parts.append
+
+        if not declarations:
+            write('{}')
+            return
+
+        write('{\n')
+        self.indented()
+
+        previous = None
+        for declaration in declarations:
+            if previous is not None and not (
+                    isinstance(declaration, tree.FieldDeclaration) and
+                    isinstance(previous, tree.FieldDeclaration)):
+                write('\n')
+            self.member(declaration)
+            previous = declaration
+
+        self.dedented()
+        write(self.prefix)
+        write('}')
+
+    def visit_ClassDeclaration(self, node):
+        write = self.parts.append
+
+        write('class ')
+        write(node.name)
+        self.type_parameters(node.type_parameters)
+        if node.extends is not None:
+            write(' extends ')
+            self.visit(node.extends)
+        self.type_list(' implements ', node.implements)
+        write(' ')
+        self.class_body(node.body)
+
+    def visit_InterfaceDeclaration(self, node):
+        write = self.parts.append
+
+        write('interface ')
+        write(node.name)
+        self.type_parameters(node.type_parameters)
+        self.type_list(' extends ', node.extends)
+        write(' ')
+        self.class_body(node.body)
+
+    def visit_AnnotationDeclaration(self, node):
+        self.parts.append('@interface ')
+        self.parts.append(node.name)
+        self.parts.append(' ')
+        self.class_body(node.body)
+
+    def visit_EnumDeclaration(self, node):
+        write = self.parts.append
+
+        write('enum ')
+        write(node.name)
+        self.type_list(' implements ', node.implements)
+        write(' ')
+
+        body = node.body or tree.EnumBody()
+        constants = body.constants or ()
+        declarations = body.declarations or ()
+
+        if not constants and not declarations:
+            write('{}')
+            return
+
+        write('{\n')
+        self.indented()
+        prefix = self.prefix
+
+        for i, constant in enumerate(constants):
+            if constant.documentation:
+                write(prefix)
+                write(constant.documentation)
+                write('\n')
+
+            write(prefix)
+            self.visit(constant)
+
+            if i < len(constants) - 1:
+                write(',\n')
+            elif declarations:
+                write(';\n')
+            else:
+                write('\n')
+
+        if declarations:
+            if not constants:
+                write(prefix)
+                write(';\n')
+
+            for declaration in declarations:
+                write('\n')
+                self.member(declaration)
+
+        self.dedented()
+        write(self.prefix)
+        write('}')
+
+    def visit_EnumConstantDeclaration(self, node):
+        self.inline_annotations(node.annotations)
+        self.parts.append(node.name)
+
+        if node.arguments is not None:
+            self.arguments(node.arguments)
+
+        if node.body is not None:
+            self.parts.append(' ')
+            self.class_body(node.body)
+
+    def visit_MethodDeclaration(self, node):
+        write = self.parts.append
+
+        if node.type_parameters:
+            self.type_parameters(node.type_parameters)
+            write(' ')
+
+        if node.return_type is None:
+            write('void')
+        else:
+            self.visit(node.return_type)
+
+        write(' ')
+        write(node.name)
+        self.formal_parameters(node.parameters)
+        self.throws(node.throws)
+
+        if node.body is None:
+            write(';')
+        else:
+            write(' ')
+            self.block(node.body)
+
+    def visit_ConstructorDeclaration(self, node):
+        if node.type_parameters:
+            self.type_parameters(node.type_parameters)
+            self.parts.append(' ')
+
+        self.parts.append(node.name)
+        self.formal_parameters(node.parameters)
+        self.throws(node.throws)
+        self.parts.append(' ')
+        self.block(node.body or ())
+
+    def visit_AnnotationMethod(self, node):
+        write = self.parts.append
+
+        self.visit(node.return_type)
+        write(' ')
+        write(node.name)
+        write('()')
+        self.dimensions(node.dimensions)
+
+        if node.default is not None:
+            write(' default ')
+            self.element_value(node.default)
+
+        write(';')
+
+    def visit_FieldDeclaration(self, node):
+        self.visit(node.type)
+        self.parts.append(' ')
+        self.comma_separated(node.declarators, self.visit)
+        self.parts.append(';')
+
+    def visit_VariableDeclaration(self, node):
+        self.inline_annotations(node.annotations)
+        self.modifiers(node.modifiers)
+        self.visit(node.type)
+        self.parts.append(' ')
+        self.comma_separated(node.declarators, self.visit)
+
+    def visit_VariableDeclarator(self, node):
+        self.parts.append(node.name)
+        self.dimensions(node.dimensions)
+
+        if node.initializer is not None:
+            self.parts.append(' = ')
+            self.initializer(node.initializer)
+
+    def visit_ArrayInitializer(self, node):
+        self.parts.append('{')
+        self.comma_separated(node.initializers or (), self.initializer)
+        self.parts.append('}')
+
+    def formal_parameters(self, parameters):
+        self.parts.append('(')
+        self.comma_separated(parameters or (), self.visit)
+        self.parts.append(')')
+
+    def throws(self, throws):
+        if throws:
+            self.parts.append(' throws ')
+            self.parts.append(', '.join(throws))
+
+    def visit_FormalParameter(self, node):
+        self.inline_annotations(node.annotations)
+        self.modifiers(node.modifiers)
+        self.visit(node.type)
+        self.parts.append('... ' if node.varargs else ' ')
+        self.parts.append(node.name)
+
+    def visit_InferredFormalParameter(self, node):
+        self.parts.append(node.name)
+
+# ------------------------------------------------------------------------------
+# -- Types --
+
+    def visit_Type(self, node):
+        self.parts.append(node.name)
+        self.dimensions(node.dimensions)
+
+    def visit_ReferenceType(self, node, diamond=False):
+        write = self.parts.append
+
+        write(node.name)
+
+        # An empty list of arguments is the diamond of a class creator
+        if node.arguments:
+            self.type_arguments(node.arguments)
+        elif diamond and node.arguments is not None:
+            write('<>')
+
+        if node.sub_type is not None:
+            write('.')
+            self.visit_ReferenceType(node.sub_type, diamond)
+
+        self.dimensions(node.dimensions)
+
+    def visit_TypeArgument(self, node):
+        if node.type is None:
+            self.parts.append('?')
+            return
+
+        if node.pattern_type is not None:
+            self.parts.append('? %s ' % (node.pattern_type,))
+
+        self.visit(node.type)
+
+    def visit_TypeParameter(self, node):
+        self.parts.append(node.name)
+
+        if node.extends:
+            self.parts.append(' extends ')
+            first = True
+            for bound in node.extends:
+                if not first:
+                    self.parts.append(' & ')
+                first = False
+                self.visit(bound)
+
+    def created_type(self, node):
+        if isinstance(node, tree.ReferenceType):
+            self.visit_ReferenceType(node, True)
+        else:
+            self.visit(node)
+
+# ------------------------------------------------------------------------------
+# -- Annotations --
+
+    def visit_Annotation(self, node):
+        write = self.parts.append
+
+        write('@')
+        write(node.name)
+
+        element = node.element
+        if element is None:
+            return
+
+        write('(')
+        if (isinstance(element, list) and element and
+                isinstance(element[0], tree.ElementValuePair)):
+            self.comma_separated(element, self.visit)
+        else:
+            self.element_value(element)
+        write(')')
+
+    def visit_ElementValuePair(self, node):
+        self.parts.append(node.name)
+        self.parts.append(' = ')
+        self.element_value(node.value)
+
+    def visit_ElementArrayValue(self, node):
+        self.parts.append('{')
+        self.comma_separated(node.values or (), self.element_value)
+        self.parts.append('}')
+
+    def element_value(self, value):
+        if isinstance(value, (tree.Annotation, tree.ElementArrayValue)):
+            self.visit(value)
+        elif isinstance(value, list):
+            # The parser gives an empty array of element values as a list
+            self.parts.append('{}')
+        else:
+            self.expression(value, _LAMBDA)
+
+# ------------------------------------------------------------------------------
+# -- Blocks and statements --
+
+    def block(self, statements):
+        write = self.parts.append
+
+        if not statements:
+            write('{}')
+            return
+
+        write('{\n')
+        self.indented()
+        self.statements(statements)
+        self.dedented()
+        write(self.prefix)
+        write('}')
+
+    def statements(self, statements):
+        """ Writes the statements of a block as whole lines. Local classes
+        are written as members.
+
+        """
+
+        write = self.parts.append
+
+        for statement in statements:
+            if isinstance(statement, tree.TypeDeclaration):
+                self.member(statement)
+            else:
+                write(self.prefix)
+                self.statement(statement)
+                write('\n')
+
+    def statement(self, node):
+        label = getattr(node, 'label', None)
+        if label:
+            self.parts.append(label)
+            self.parts.append(': ')
+
+        self.visit(node)
+
+    def sub_statement(self, node, braced=False):
+        """ Writes the body of a compound statement, returning whether it was
+        written as a block.
+
+        """
+
+        write = self.parts.append
+
+        if type(node) is tree.BlockStatement and not node.label:
+            write(' ')
+            self.block(node.statements)
+            return True
+
+        if braced:
+            write(' {\n')
+            self.indented()
+            self.statements([node])
+            self.dedented()
+            write(self.prefix)
+            write('}')
+            return True
+
+        write('\n')
+        self.indented()
+        write(self.prefix)
+        self.statement(node)
+        self.dedented()
+        return False
+
+    def visit_Statement(self, node):
+        # The empty statement
+        self.parts.append(';')
+
+    def visit_BlockStatement(self, node):
+        self.block(node.statements)
+
+    def visit_LocalVariableDeclaration(self, node):
+        self.visit_VariableDeclaration(node)
+        self.parts.append(';')
+
+    def visit_StatementExpression(self, node):
+        self.expression(node.expression)
+        self.parts.append(';')
+
+    def visit_IfStatement(self, node):
+        write = self.parts.append
+
+        write('if (')
+        self.expression(node.condition)
+        write(')')
+
+        else_statement = node.else_statement
+        braced = self.sub_statement(node.then_statement,
+                                    else_statement is not None and
+                                    _dangles(node.then_statement))
+
+        if else_statement is None:
+            return
+
+        if braced:
+            write(' else')
+        else:
+            write('\n')
+            write(self.prefix)
+            write('else')
+
+        if isinstance(else_statement, tree.IfStatement) and not else_statement.label:
+            write(' ')
+            self.visit(else_statement)
+        else:
+            self.sub_statement(else_statement)
+
+    def visit_WhileStatement(self, node):
+        self.parts.append('while (')
+        self.expression(node.condition)
+        self.parts.append(')')
+        self.sub_statement(node.body)
+
+    def visit_DoStatement(self, node):
+        write = self.parts.append
+
+        write('do')
+        if self.sub_statement(node.body):
+            write(' while (')
+        else:
+            write('\n')
+            write(self.prefix)
+            write('while (')
+        self.expression(node.condition)
+        write(');')
+
+    def visit_ForStatement(self, node):
+        self.parts.append('for (')
+        self.visit(node.control)
+        self.parts.append(')')
+        self.sub_statement(node.body)
+
+    def visit_ForControl(self, node):
+        write = self.parts.append
+
+        if isinstance(node.init, tree.VariableDeclaration):
+            self.visit(node.init)
+        elif node.init:
+            self.comma_separated(node.init, self.expression)
+
+        write(';')
+        if node.condition is not None:
+            write(' ')
+            self.expression(node.condition)
+
+        write(';')
+        if node.update:
+            write(' ')
+            self.comma_separated(node.update, self.expression)
+
+    def visit_EnhancedForControl(self, node):
+        self.visit(node.var)
+        self.parts.append(' : ')
+        self.expression(node.iterable)
+
+    def visit_AssertStatement(self, node):
+        self.parts.append('assert ')
+        self.expression(node.condition)
+
+        if node.value is not None:
+            self.parts.append(' : ')
+            self.expression(node.value)
+
+        self.parts.append(';')
+
+    def visit_BreakStatement(self, node):
+        self.parts.append('break %s;' % (node.goto,) if node.goto else 'break;')
+
+    def visit_ContinueStatement(self, node):
+        self.parts.append('continue %s;' % (node.goto,) if node.goto else 'continue;')
+
+    def visit_ReturnStatement(self, node):
+        if node.expression is None:
+            self.parts.append('return;')
+        else:
+            self.parts.append('return ')
+            self.expression(node.expression)
+            self.parts.append(';')
+
+    def visit_ThrowStatement(self, node):
+        self.parts.append('throw ')
+        self.expression(node.expression)
+        self.parts.append(';')
+
+    def visit_SynchronizedStatement(self, node):
+        self.parts.append('synchronized (')
+        self.expression(node.lock)
+        self.parts.append(') ')
+        self.block(node.block)
+
+    def visit_TryStatement(self, node):
+        write = self.parts.append
+
+        write('try ')
+
+        if node.resources:
+            write('(')
+            first = True
+            for resource in node.resources:
+                if not first:
+                    write('; ')
+                first = False
+                self.visit(resource)
+            write(') ')
+
+        self.block(node.block)
+
+        for catch in node.catches or ():
+            write(' ')
+            self.visit(catch)
+
+        if node.finally_block is not None:
+            write(' finally ')
+            self.block(node.finally_block)
+
+    def visit_TryResource(self, node):
+        self.inline_annotations(node.annotations)
+        self.modifiers(node.modifiers)
+        self.visit(node.type)
+        self.parts.append(' ')
+        self.parts.append(node.name)
+        self.parts.append(' = ')
+        self.expression(node.value)
+
+    def visit_CatchClause(self, node):
+        self.parts.append('catch (')
+        self.visit(node.parameter)
+        self.parts.append(') ')
+        self.block(node.block)
+
+    def visit_CatchClauseParameter(self, node):
+        self.inline_annotations(node.annotations)
+        self.modifiers(node.modifiers)
+        self.parts.append(' | '.join(node.types))
+        self.parts.append(' ')
+        self.parts.append(node.name)
+
+    def visit_SwitchStatement(self, node):
+        write = self.parts.append
+
+        write('switch (')
+        self.expression(node.expression)
+        write(') {\n')
+
+        for case in node.cases:
+            self.visit(case)
+
+        write(self.prefix)
+        write('}')
+
+    def visit_SwitchStatementCase(self, node):
+        write = self.parts.append
+        prefix = self.prefix
+
+        # An empty list of labels is the default case
+        for label in node.case or (None,):
+            write(prefix)
+            if label is None:
+                write('default:\n')
+            else:
+                write('case ')
+                if isinstance(label, tree.Node):
+                    self.expression(label)
+                else:
+                    write(label)
+                write(':\n')
+
+        self.indented()
+        self.statements(node.statements)
+        self.dedented()
+
+# ------------------------------------------------------------------------------
+# -- Expressions --
+
+    def expression(self, node, level=_ASSIGNMENT):
+        """ Writes an expression in a position requiring the given level,
+        parenthesizing it if its own level is lower.
+
+        """
+
+        write = self.parts.append
+
+        if isinstance(node, JavaToken):
+            # super in a method reference
+            write(node.value)
+            return
+
+        prefix_operators = getattr(node, 'prefix_operators', None)
+        selectors = getattr(node, 'selectors', None)
+        postfix_operators = getattr(node, 'postfix_operators', None)
+
+        if isinstance(node, tree.Primary):
+            own_level = _UNARY if prefix_operators else _PRIMARY
+            wrapped = False
+        elif prefix_operators or selectors or postfix_operators:
+            # A parenthesized expression the parser gave operators or selectors
+            own_level = _UNARY if prefix_operators else _PRIMARY
+            wrapped = True
+        elif isinstance(node, tree.BinaryOperation):
+            self.binary_operation(node, level)
+            return
+        else:
+            if isinstance(node, tree.Cast):
+                own_level = _cast_level(node)
+            else:
+                own_level = _levels.get(type(node), _PRIMARY)
+            if own_level < level:
+                write('(')
+                self.visit(node)
+                write(')')
+            else:
+                self.visit(node)
+            return
+
+        parenthesized = own_level < level
+        if parenthesized:
+            write('(')
+
+        if prefix_operators:
+            previous = ''
+            for operator in prefix_operators:
+                # Keep - - and + + from becoming -- and ++
+                if previous and previous[-1] == operator[0]:
+                    write(' ')
+                write(operator)
+                previous = operator
+
+        if wrapped:
+            write('(')
+            self.visit(node)
+            write(')')
+        else:
+            if node.qualifier:
+                write(node.qualifier)
+                write('.')
+            self.visit(node)
+
+        if selectors:
+            for selector in selectors:
+                if isinstance(selector, tree.ArraySelector):
+                    self.visit(selector)
+                else:
+                    write('.')
+                    if isinstance(selector, JavaToken):
+                        write(selector.value)
+                    else:
+                        self.visit(selector)
+
+        if postfix_operators:
+            for operator in postfix_operators:
+                write(operator)
+
+        if parenthesized:
+            write(')')
+
+    def binary_operation(self, node, level):
+        write = self.parts.append
+
+        # Operators of a level are left associative. Left operands are
+        # followed without recursion, as chains such as long concatenations
+        # nest as deep as they have operands.
+        chain = list()
+        while True:
+            own_level = _binary_levels[node.operator]
+            chain.append((node, own_level, own_level < level))
+
+            left = node.operandl
+            if (not isinstance(left, tree.BinaryOperation) or
+                    getattr(left, 'prefix_operators', None) or
+                    getattr(left, 'selectors', None) or
+                    getattr(left, 'postfix_operators', None)):
+                break
+
+            node, level = left, own_level
+
+        for _, _, parenthesized in chain:
+            if parenthesized:
+                write('(')
+
+        self.expression(left, own_level)
+
+        for node, own_level, parenthesized in reversed(chain):
+            write(' ')
+            write(node.operator)
+            write(' ')
+
+            if node.operator == 'instanceof':
+                self.visit(node.operandr)
+            else:
+                self.expression(node.operandr, own_level + 1)
+
+            if parenthesized:
+                write(')')
+
+    def visit_BinaryOperation(self, node):
+        self.binary_operation(node, _ASSIGNMENT)
+
+    def visit_Assignment(self, node):
+        self.expression(node.expressionl, _BINARY)
+        self.parts.append(' %s ' % (node.type,))
+        self.expression(node.value, _ASSIGNMENT)
+
+    def visit_TernaryExpression(self, node):
+        self.expression(node.condition, _BINARY)
+        self.parts.append(' ? ')
+        self.expression(node.if_true, _ASSIGNMENT)
+        self.parts.append(' : ')
+        self.expression(node.if_false, _LAMBDA)
+
+    def visit_Cast(self, node):
+        self.parts.append('(')
+        self.visit(node.type)
+        self.parts.append(') ')
+        self.expression(node.expression, _cast_level(node))
+
+    def visit_LambdaExpression(self, node):
+        write = self.parts.append
+        parameters = node.parameters or ()
+
+        if (len(parameters) == 1 and not isinstance(
+                parameters[0], (tree.FormalParameter, tree.InferredFormalParameter))):
+            # A single parameter without parentheses is parsed as an expression
+            self.expression(parameters[0], _PRIMARY)
+        else:
+            write('(')
+            self.comma_separated(parameters, self.visit)
+            write(')')
+
+        write(' -> ')
+
+        if isinstance(node.body, list):
+            self.block(node.body)
+        else:
+            self.expression(node.body, _ASSIGNMENT)
+
+    def visit_MethodReference(self, node):
+        self.expression(node.expression, _PRIMARY)
+        self.parts.append('::')
+
+        if node.type_arguments:
+            self.type_arguments(node.type_arguments)
+
+        self.expression(node.method, _ASSIGNMENT)
+
+# ------------------------------------------------------------------------------
+# -- Primaries --
+#
+# The handlers of primaries write neither the qualifier, operators nor
+# selectors of the node, which expression() adds. Selectors are written by
+# the same handlers following a '.'.
+
+    def visit_Literal(self, node):
+        self.parts.append(node.value)
+
+    def visit_This(self, node):
+        self.parts.append('this')
+
+    def visit_MemberReference(self, node):
+        self.parts.append(node.member)
+
+    def visit_MethodInvocation(self, node):
+        if node.type_arguments:
+            self.type_arguments(node.type_arguments)
+
+        self.parts.append(node.member)
+        self.arguments(node.arguments)
+
+    def visit_ExplicitConstructorInvocation(self, node):
+        if node.type_arguments:
+            self.type_arguments(node.type_arguments)
+
+        self.parts.append('this')
+        self.arguments(node.arguments)
+
+    def visit_SuperConstructorInvocation(self, node):
+        if node.type_arguments:
+            self.type_arguments(node.type_arguments)
+
+        self.parts.append('super')
+        self.arguments(node.arguments)
+
+    def visit_SuperMethodInvocation(self, node):
+        self.parts.append('super.')
+
+        if node.type_arguments:
+            self.type_arguments(node.type_arguments)
+
+        self.parts.append(node.member)
+        self.arguments(node.arguments)
+
+    def visit_SuperMemberReference(self, node):
+        self.parts.append('super.')
+        self.parts.append(node.member)
+
+    def visit_ArraySelector(self, node):
+        self.parts.append('[')
+        self.expression(node.index)
+        self.parts.append(']')
+
+    def visit_ClassReference(self, node):
+        self.visit(node.type)
+        self.parts.append('.class')
+
+    def visit_VoidClassReference(self, node):
+        self.parts.append('void.class')
+
+    def visit_ArrayCreator(self, node):
+        write = self.parts.append
+
+        write('new ')
+        self.visit(node.type)
+
+        for dimension in node.dimensions or ():
+            if dimension is None:
+                write('[]')
+            else:
+                write('[')
+                self.expression(dimension)
+                write(']')
+
+        if node.initializer is not None:
+            write(' ')
+            self.visit(node.initializer)
+
+    def visit_ClassCreator(self, node):
+        self.parts.append('new ')
+
+        if node.constructor_type_arguments:
+            self.type_arguments(node.constructor_type_arguments)
+
+        self.created_type(node.type)
+        self.arguments(node.arguments)
+
+        if node.body is not None:
+            self.parts.append(' ')
+            self.class_body(node.body)
+
+    visit_InnerClassCreator = visit_ClassCreator
+
+
+def to_source(node, indent='    '):
+    """ Returns Java source for a tree or any node of one """
+
+    return CodeGenerator(indent).to_source(node)
+
+def write_source(node, out, indent='    '):
+    """ Writes Java source for a tree or any node of one to the file out """
+
+    CodeGenerator(indent).generate(node, out)
@@ -0,0 +1,530 @@
+from collections import deque, namedtuple
+
+import six
+
+from .ast import MetaNode, Node, child_nodes, walk_nodes, _equal, _extra_value, _DEFAULT_OPTIONS
+from . import tree
+
+
+# ------------------------------------------------------------------------------
+# ---- Edit actions ----
+
+def node_position(node):
+    """ The position of the node, or else of the first node below it with a
+    position, or None.
+
+    """
+
+    for descendant in walk_nodes(node):
+        if descendant.position is not None:
+            return descendant.position
+
+    return None
+
+class Insert(namedtuple('Insert', 'node parent index')):
+    """ node was inserted into the new tree as the child at index among the
+    child nodes of parent. Nodes below node which are not themselves moved
+    are inserted with it.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        return node_position(self.node)
+
+class Delete(namedtuple('Delete', 'node')):
+    """ node and the nodes below it which are not moved were deleted from the
+    old tree.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        return node_position(self.node)
+
+class Update(namedtuple('Update', 'node new_node changes')):
+    """ The attrs of node not holding nodes changed. changes is a list of
+    (attr, old value, new value) triples.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        return node_position(self.new_node)
+
+class Move(namedtuple('Move', 'node new_node parent index')):
+    """ node was moved to become new_node, the child at index among the child
+    nodes of parent in the new tree.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        return node_position(self.new_node)
+
+# ------------------------------------------------------------------------------
+# ---- Trees ----
+
+class _Tree(object):
+    """ The nodes of a tree in breadth first order, with their parents,
+    child nodes, indexes among their siblings and sizes, keyed by id().
+
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.order = [root]
+        self.parents = {id(root): None}
+        self.indexes = {id(root): None}
+        self.children = dict()
+
+        # Appending while iterating visits the nodes breadth first
+        for node in self.order:
+            children = list(child_nodes(node))
+            self.children[id(node)] = children
+
+            for i, child in enumerate(children):
+                self.parents[id(child)] = node
+                self.indexes[id(child)] = i
+
+            self.order.extend(children)
+
+        self.sizes = dict()
+
+        for node in reversed(self.order):
+            size = 1
+            for child in self.children[id(node)]:
+                size += self.sizes[id(child)]
+            self.sizes[id(node)] = size
+
+    def parent(self, node):
+        return self.parents[id(node)]
+
+    def index(self, node):
+        return self.indexes[id(node)]
+
+    def subtree(self, node):
+        stack = [node]
+
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(self.children[id(node)])
+
+def _label(node):
+    for attr in ('name', 'member', 'value'):
+        value = getattr(node, attr, None)
+        if isinstance(value, six.string_types):
+            return value
+
+    if isinstance(node, (tree.FieldDeclaration, tree.VariableDeclaration)):
+        return ','.join(declarator.name for declarator in node.declarators)
+
+    return None
+
+def _holds_nodes(value):
+    if isinstance(type(value), MetaNode):
+        return True
+
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, (Node, list, tuple)):
+                return True
+
+    return False
+
+def _is_empty(value):
+    return value is None or (isinstance(value, list) and not value)
+
+def _changes(a, b):
+    """ The (attr, old value, new value) triples of the attrs not holding
+    nodes and of the extra attrs which differ between a and b. None and empty
+    lists are not distinguished, as the parser uses both for missing lists.
+
+    """
+
+    changes = list()
+
+    for attr in a.attrs:
+        old = getattr(a, attr)
+        new = getattr(b, attr)
+
+        if _holds_nodes(old) or _holds_nodes(new):
+            continue
+        if _is_empty(old) and _is_empty(new):
+            continue
+
+        if not _equal(old, new, _DEFAULT_OPTIONS):
+            changes.append((attr, old, new))
+
+    # Extra attrs are not walked, so those holding nodes are compared whole
+    for attr in a.extra_attrs:
+        old = _extra_value(a, attr)
+        new = _extra_value(b, attr)
+
+        if not _equal(old, new, _DEFAULT_OPTIONS):
+            changes.append((attr, old, new))
+
+    return changes
+
+# ------------------------------------------------------------------------------
+# ---- Matching ----
+
+class Mapping(object):
+    """ A one to one mapping between the nodes of two trees. The ids of new
+    nodes matched as part of equal subtrees are kept in unchanged.
+
+    """
+
+    def __init__(self):
+        self.src_to_dst = dict()
+        self.dst_to_src = dict()
+        self.unchanged = set()
+
+    def __len__(self):
+        return len(self.src_to_dst)
+
+    def add(self, src, dst):
+        self.src_to_dst[id(src)] = dst
+        self.dst_to_src[id(dst)] = src
+
+    def dst(self, src):
+        return self.src_to_dst.get(id(src))
+
+    def src(self, dst):
+        return self.dst_to_src.get(id(dst))
+
+    def has_src(self, src):
+        return id(src) in self.src_to_dst
+
+    def has_dst(self, dst):
+        return id(dst) in self.dst_to_src
+
+class _Matcher(object):
+
+    def __init__(self, src, dst, min_size, min_dice):
+        self.src = src
+        self.dst = dst
+        self.min_size = min_size
+        self.min_dice = min_dice
+        self.mapping = Mapping()
+
+    def match(self):
+        anchors = self.match_subtrees()
+        self.match_ancestors(anchors)
+        self.match_children()
+        return self.mapping
+
+    def match_subtrees(self):
+        """ Matches equal subtrees, by their structural hashes, when their
+        hash is unique in both trees or when their parents are matched.
+
+        """
+
+        src, dst, mapping = self.src, self.dst, self.mapping
+        min_size = self.min_size
+
+        # Candidates by hash, and by hash and parent for repeated subtrees
+        src_by_hash = dict()
+        src_by_parent = dict()
+        for node in src.order:
+            if src.sizes[id(node)] >= min_size:
+                key = node.structural_hash()
+                src_by_hash.setdefault(key, []).append(node)
+                src_by_parent.setdefault((key, id(src.parent(node))), deque()).append(node)
+
+        dst_counts = dict()
+        for node in dst.order:
+            if dst.sizes[id(node)] >= min_size:
+                key = node.structural_hash()
+                dst_counts[key] = dst_counts.get(key, 0) + 1
+
+        anchors = list()
+
+        # Outer subtrees come first, so the largest equal subtrees are found
+        for node in dst.order:
+            if dst.sizes[id(node)] < min_size or mapping.has_dst(node):
+                continue
+
+            key = node.structural_hash()
+            candidates = src_by_hash.get(key)
+            if not candidates:
+                continue
+
+            match = None
+
+            if len(candidates) == 1 and dst_counts[key] == 1:
+                match = candidates[0]
+            else:
+                parent = mapping.src(dst.parent(node))
+                if parent is not None:
+                    siblings = src_by_parent.get((key, id(parent)), ())
+                    while siblings and mapping.has_src(siblings[0]):
+                        siblings.popleft()
+                    if siblings:
+                        match = siblings[0]
+
+            if match is None or mapping.has_src(match) or not match.equals(node):
+                continue
+
+            self.match_subtree(match, node)
+            anchors.append((match, node))
+
+        return anchors
+
+    def match_subtree(self, src_node, dst_node):
+        stack = [(src_node, dst_node)]
+
+        while stack:
+            a, b = stack.pop()
+            self.mapping.add(a, b)
+            self.mapping.unchanged.add(id(b))
+            stack.extend(zip(self.src.children[id(a)], self.dst.children[id(b)]))
+
+    def match_ancestors(self, anchors):
+        """ Matches the unmatched ancestors of matched subtrees when they have
+        the same class and label.
+
+        """
+
+        src, dst, mapping = self.src, self.dst, self.mapping
+
+        for a, b in anchors:
+            a = src.parent(a)
+            b = dst.parent(b)
+
+            while (a is not None and b is not None and
+                    not mapping.has_src(a) and not mapping.has_dst(b) and
+                    type(a) is type(b) and _label(a) == _label(b)):
+                mapping.add(a, b)
+                a = src.parent(a)
+                b = dst.parent(b)
+
+    def match_children(self):
+        """ Matches the unmatched children of matched nodes, first by class
+        and label, then by the share of their descendants already matched, and
+        finally in order when a class has as many unmatched children on both
+        sides.
+
+        """
+
+        src, dst, mapping = self.src, self.dst, self.mapping
+
+        if (not mapping.has_src(src.root) and not mapping.has_dst(dst.root) and
+                type(src.root) is type(dst.root)):
+            mapping.add(src.root, dst.root)
+
+        for b in dst.order:
+            a = mapping.src(b)
+            if a is None:
+                continue
+
+            src_children = [c for c in src.children[id(a)] if not mapping.has_src(c)]
+            dst_children = [c for c in dst.children[id(b)] if not mapping.has_dst(c)]
+
+            if not src_children or not dst_children:
+                continue
+
+            by_label = dict()
+            for child in src_children:
+                by_label.setdefault((type(child), _label(child)), deque()).append(child)
+
+            for child in dst_children:
+                candidates = by_label.get((type(child), _label(child)))
+                if candidates:
+                    mapping.add(candidates.popleft(), child)
+
+            src_children = [c for c in src_children if not mapping.has_src(c)]
+            dst_children = [c for c in dst_children if not mapping.has_dst(c)]
+
+            if src_children and dst_children:
+                self.match_similar(src_children, dst_children)
+                self.match_in_order(src_children, dst_children)
+
+    def match_similar(self, src_children, dst_children):
+        src, dst, mapping = self.src, self.dst, self.mapping
+
+        # The position among dst_children of the child each node is below
+        owners = dict()
+        for i, child in enumerate(dst_children):
+            if dst.sizes[id(child)] > 1:
+                for node in dst.subtree(child):
+                    owners[id(node)] = i
+
+        if not owners:
+            return
+
+        for child in src_children:
+            size = src.sizes[id(child)]
+            if size == 1:
+                continue
+
+            # Only the children sharing matched descendants are scored
+            common = dict()
+            for node in src.subtree(child):
+                match = mapping.dst(node)
+                if match is not None:
+                    i = owners.get(id(match))
+                    if i is not None:
+                        owner, count = common.get(i, (dst_children[i], 0))
+                        common[i] = (owner, count + 1)
+
+            best, best_dice = None, self.min_dice
+            for i in sorted(common):
+                candidate, count = common[i]
+                if type(candidate) is not type(child) or mapping.has_dst(candidate):
+                    continue
+
+                dice = 2.0 * count / (size + dst.sizes[id(candidate)])
+                if dice >= best_dice:
+                    best, best_dice = candidate, dice
+
+            if best is not None:
+                mapping.add(child, best)
+
+    def match_in_order(self, src_children, dst_children):
+        mapping = self.mapping
+
+        by_type = dict()
+        for child in src_children:
+            if not mapping.has_src(child):
+                by_type.setdefault(type(child), ([], []))[0].append(child)
+        for child in dst_children:
+            if not mapping.has_dst(child):
+                by_type.setdefault(type(child), ([], []))[1].append(child)
+
+        for src_group, dst_group in by_type.values():
+            if len(src_group) == len(dst_group):
+                for a, b in zip(src_group, dst_group):
+                    mapping.add(a, b)
+
+def match(src, dst, min_size=2, min_dice=0.5):
+    """ Matches the nodes of two trees, returning a Mapping.
+
+    Equal subtrees of at least min_size nodes are matched first, by their
+    structural hashes. The ancestors of matched subtrees are then matched
+    while they have the same class and label, that is name, member or value.
+    Finally the unmatched children of matched nodes are matched top-down by
+    class and label, or when at least min_dice of their descendants match.
+    Each step visits each node a bounded number of times.
+
+    The trees must not share nodes, as interned trees do.
+
+    """
+
+    return _Matcher(_Tree(src), _Tree(dst), min_size, min_dice).match()
+
+# ------------------------------------------------------------------------------
+# ---- Edit scripts ----
+
+def _stable(sequence):
+    """ Returns the set of the positions in sequence forming its longest
+    increasing subsequence.
+
+    """
+
+    tails = list()
+    tail_positions = list()
+    previous = [None] * len(sequence)
+
+    for i, value in enumerate(sequence):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if tails[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low > 0:
+            previous[i] = tail_positions[low - 1]
+
+        if low == len(tails):
+            tails.append(value)
+            tail_positions.append(i)
+        else:
+            tails[low] = value
+            tail_positions[low] = i
+
+    result = set()
+    i = tail_positions[-1] if tail_positions else None
+    while i is not None:
+        result.add(i)
+        i = previous[i]
+
+    return result
+
+def _edit_script(src, dst, mapping):
+    actions = list()
+    moved = set()
+
+    # Children which stay with their parent but change order relative to
+    # their siblings are moved, keeping the longest run in order
+    for b in dst.order:
+        a = mapping.src(b)
+        if a is None or id(b) in mapping.unchanged:
+            continue
+
+        src_index = dict((id(child), i) for i, child in enumerate(src.children[id(a)]))
+        kept = list()
+        for child in dst.children[id(b)]:
+            match = mapping.src(child)
+            if match is not None and id(match) in src_index:
+                kept.append((child, src_index[id(match)]))
+
+        stable = _stable([i for _, i in kept])
+        for i, (child, _) in enumerate(kept):
+            if i not in stable:
+                moved.add(id(child))
+
+    for b in dst.order:
+        parent = dst.parent(b)
+        a = mapping.src(b)
+
+        if a is None:
+            if parent is None or mapping.has_dst(parent):
+                actions.append(Insert(b, parent, dst.index(b)))
+            continue
+
+        if id(b) not in mapping.unchanged:
+            changes = _changes(a, b)
+            if changes:
+                actions.append(Update(a, b, changes))
+
+        if parent is None:
+            continue
+
+        if id(b) in moved or mapping.src(parent) is not src.parent(a):
+            actions.append(Move(a, b, parent, dst.index(b)))
+
+    for a in src.order:
+        parent = src.parent(a)
+        if not mapping.has_src(a) and (parent is None or mapping.has_src(parent)):
+            actions.append(Delete(a))
+
+    return actions
+
+def diff(src, dst, mapping=None):
+    """ Returns the list of Insert, Update, Move and Delete actions turning the
+    tree rooted at src into the tree rooted at dst, using match() unless a
+    mapping is given. Inserts, updates and moves are listed in breadth first
+    order of the new tree, followed by deletes. As for match(), the trees
+    must not share nodes.
+
+    """
+
+    src_tree = _Tree(src)
+    dst_tree = _Tree(dst)
+
+    if mapping is None:
+        mapping = _Matcher(src_tree, dst_tree, 2, 0.5).match()
+
+    return _edit_script(src_tree, dst_tree, mapping)
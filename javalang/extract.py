@@ -0,0 +1,222 @@
+import json
+
+from . import bulk, javadoc, tokenizer, tree
+from .parser import DeclarationParser
+
+
+# ------------------------------------------------------------------------------
+# ---- Signatures ----
+
+def type_name(java_type):
+    """ The source form of a type, such as List<? extends T>[] """
+
+    if java_type is None:
+        return 'void'
+
+    name = java_type.name
+
+    if isinstance(java_type, tree.ReferenceType):
+        if java_type.arguments:
+            name += '<%s>' % (', '.join(_type_argument_name(argument)
+                                        for argument in java_type.arguments),)
+
+        if java_type.sub_type is not None:
+            name += '.' + type_name(java_type.sub_type)
+
+    return name + '[]' * len(java_type.dimensions or ())
+
+def _type_argument_name(argument):
+    if argument.type is None:
+        return argument.pattern_type
+
+    if argument.pattern_type is None:
+        return type_name(argument.type)
+
+    return '? %s %s' % (argument.pattern_type, type_name(argument.type))
+
+def _parameters(declaration):
+    names = list()
+
+    for parameter in declaration.parameters:
+        name = type_name(parameter.type)
+        if parameter.varargs:
+            name += '...'
+        names.append(name)
+
+    return '(%s)' % (', '.join(names),)
+
+def _type_parameters(declaration):
+    if not declaration.type_parameters:
+        return ''
+
+    return '<%s>' % (', '.join(parameter.name
+                               for parameter in declaration.type_parameters),)
+
+_type_kinds = [
+    (tree.ClassDeclaration, 'class'),
+    (tree.InterfaceDeclaration, 'interface'),
+    (tree.EnumDeclaration, 'enum'),
+    (tree.AnnotationDeclaration, 'annotation'),
+]
+
+def _type_kind(declaration):
+    for node_type, kind in _type_kinds:
+        if isinstance(declaration, node_type):
+            return kind
+
+# ------------------------------------------------------------------------------
+# ---- Records ----
+
+def _record(path, name, kind, signature, documentation):
+    doc = javadoc.parse_cached(documentation)
+
+    return {
+        'file': path,
+        'name': name,
+        'kind': kind,
+        'signature': signature,
+        'description': doc.description,
+        'params': doc.params,
+        'return': doc.return_doc,
+        'throws': doc.throws,
+        'authors': doc.authors,
+        'deprecated': doc.deprecated,
+        'tags': doc.tags,
+    }
+
+def javadoc_records(unit, path=None):
+    """ Generates a record for each documented declaration of a compilation
+    unit, which need not have method bodies. Records are dictionaries holding
+    the file path, qualified name, kind, signature and the fields of the
+    parsed documentation.
+
+    """
+
+    package = ''
+
+    if unit.package is not None:
+        package = unit.package.name
+
+        if unit.package.documentation:
+            yield _record(path, package, 'package', 'package ' + package,
+                          unit.package.documentation)
+
+    for declaration in unit.types:
+        for record in _type_records(path, package, declaration):
+            yield record
+
+def _type_records(path, scope, declaration):
+    name = declaration.name
+    if scope:
+        name = scope + '.' + name
+
+    kind = _type_kind(declaration)
+
+    if declaration.documentation:
+        signature = '%s %s' % ('@interface' if kind == 'annotation' else kind,
+                               declaration.name)
+        if kind in ('class', 'interface'):
+            signature += _type_parameters(declaration)
+
+        yield _record(path, name, kind, signature, declaration.documentation)
+
+    if isinstance(declaration, tree.EnumDeclaration) and declaration.body:
+        for constant in declaration.body.constants:
+            if constant.documentation:
+                yield _record(path, name + '.' + constant.name, 'constant',
+                              constant.name, constant.documentation)
+
+    for member in declaration.member_declarations():
+        if isinstance(member, tree.TypeDeclaration):
+            for record in _type_records(path, name, member):
+                yield record
+        else:
+            for record in _member_records(path, name, member):
+                yield record
+
+def _member_records(path, scope, member):
+    documentation = getattr(member, 'documentation', None)
+
+    if not documentation:
+        return
+
+    if isinstance(member, tree.MethodDeclaration):
+        signature = '%s %s%s' % (type_name(member.return_type), member.name,
+                                 _parameters(member))
+        if member.type_parameters:
+            signature = _type_parameters(member) + ' ' + signature
+
+        yield _record(path, scope + '.' + member.name, 'method', signature,
+                      documentation)
+
+    elif isinstance(member, tree.ConstructorDeclaration):
+        signature = member.name + _parameters(member)
+        if member.type_parameters:
+            signature = _type_parameters(member) + ' ' + signature
+        yield _record(path, scope + '.' + member.name, 'constructor', signature,
+                      documentation)
+
+    elif isinstance(member, tree.FieldDeclaration):
+        for declarator in member.declarators:
+            field_type = type_name(member.type) + '[]' * len(declarator.dimensions or ())
+            yield _record(path, scope + '.' + declarator.name, 'field',
+                          '%s %s' % (field_type, declarator.name), documentation)
+
+    elif isinstance(member, tree.AnnotationMethod):
+        signature = '%s %s()' % (type_name(member.return_type), member.name)
+        yield _record(path, scope + '.' + member.name, 'method', signature,
+                      documentation)
+
+# ------------------------------------------------------------------------------
+# ---- Extraction ----
+
+def parse_declarations(source):
+    """ Parses a compilation unit with a javalang.parser.DeclarationParser,
+    leaving method bodies empty.
+
+    """
+
+    return DeclarationParser(tokenizer.tokenize(source)).parse()
+
+def _extract_lines(path, data):
+    # Records are serialized by the workers, so that only strings are sent
+    # back to the parent process
+    unit = parse_declarations(data)
+    return [json.dumps(record, sort_keys=True)
+            for record in javadoc_records(unit, path)]
+
+def extract_javadoc(paths, out, workers=None, chunksize=8, ordered=True,
+                    timeout=None, max_tasks_per_worker=None):
+    """ Writes a JSON line to the file out for each documented declaration in
+    the given Java source files, returning the number of records written.
+    Files are parsed without method bodies by a pool of worker processes and
+    their records are written as each file completes, so memory use does not
+    grow with the number of files. A file which can not be read or parsed is
+    written as a single record holding its path and the error. See
+    javalang.bulk.map_paths() for the remaining arguments.
+
+    """
+
+    count = 0
+
+    results = bulk.map_paths(_extract_lines, paths,
+                             workers=workers,
+                             chunksize=chunksize,
+                             ordered=ordered,
+                             timeout=timeout,
+                             max_tasks_per_worker=max_tasks_per_worker)
+
+    for path, result in results:
+        if isinstance(result, Exception):
+            out.write(json.dumps({'file': path, 'error': repr(result)},
+                                 sort_keys=True))
+            out.write('\n')
+            continue
+
+        for line in result:
+            out.write(line)
+            out.write('\n')
+
+        count += len(result)
+
+    return count
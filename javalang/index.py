@@ -0,0 +1,199 @@
+import collections
+import weakref
+
+from . import tree
+
+
+class TypeIndex(object):
+    """ An index of the types declared by a set of compilation units, which
+    resolves the simple type names used in a compilation unit to qualified
+    names.
+
+    Units are added under a key, such as their path, and adding a unit under
+    an existing key replaces the unit previously added under it.
+
+    Names are resolved as in Java, looking in turn at the types declared in
+    the unit, single-type imports, the types of the unit's package and
+    on-demand imports. Single-type imports resolve whether or not the
+    imported type is in the index, while the other rules only find indexed
+    types. Type declarations nested in the unit are treated as in scope
+    throughout the unit.
+
+    The lookup table of a unit is built on its first resolve and kept until
+    the unit is collected or a unit is added to or removed from the index.
+
+    """
+
+    def __init__(self):
+        # Qualified name to (key, TypeDeclaration)
+        self.declarations = dict()
+
+        # Package or type qualified name to a dict of the simple names of the
+        # top level or member types it contains to their qualified names
+        self.members = dict()
+
+        # Key to the qualified names of the types of the unit
+        self.files = dict()
+
+        # id() of a unit to (weak reference to the unit, lookup table)
+        self.tables = dict()
+
+    def __len__(self):
+        return len(self.declarations)
+
+    def __contains__(self, qualified_name):
+        return qualified_name in self.declarations
+
+    def get(self, qualified_name):
+        """ Returns the declaration of the indexed type, or None """
+
+        entry = self.declarations.get(qualified_name)
+        return None if entry is None else entry[1]
+
+    def keys(self):
+        return list(self.files)
+
+# ------------------------------------------------------------------------------
+# ---- Adding and removing units ----
+
+    def add(self, key, unit):
+        if key in self.files:
+            self.remove(key)
+
+        names = list()
+        for name, declaration in declared_types(unit):
+            self.declarations[name] = (key, declaration)
+
+            container, _, simple_name = name.rpartition('.')
+            self.members.setdefault(container, dict())[simple_name] = name
+            names.append(name)
+
+        self.files[key] = names
+        self.tables.clear()
+
+    def remove(self, key):
+        """ Removes the types of the unit added under key. Types which have
+        since been added again by another unit are kept.
+
+        """
+
+        for name in self.files.pop(key):
+            entry = self.declarations.get(name)
+
+            if entry is None or entry[0] != key:
+                continue
+
+            del self.declarations[name]
+
+            container, _, simple_name = name.rpartition('.')
+            members = self.members[container]
+            del members[simple_name]
+            if not members:
+                del self.members[container]
+
+        self.tables.clear()
+
+# ------------------------------------------------------------------------------
+# ---- Resolution ----
+
+    def resolve(self, unit, name):
+        """ Returns the qualified name of the type called name in the unit,
+        or None if it can not be resolved. The name may be qualified by an
+        enclosing type, such as Map.Entry.
+
+        """
+
+        simple_name, dot, rest = name.partition('.')
+        qualified_name = self.table(unit).get(simple_name)
+
+        if qualified_name is None:
+            return None
+
+        return qualified_name + dot + rest
+
+    def table(self, unit):
+        """ Returns the dict mapping the simple names in scope in the unit to
+        their qualified names.
+
+        """
+
+        entry = self.tables.get(id(unit))
+
+        if entry is not None and entry[0]() is unit:
+            return entry[1]
+
+        table = self._build_table(unit)
+
+        unit_id = id(unit)
+        tables = self.tables
+
+        def forget(ref):
+            if tables.get(unit_id, (None,))[0] is ref:
+                del tables[unit_id]
+
+        self.tables[unit_id] = (weakref.ref(unit, forget), table)
+
+        return table
+
+    def _build_table(self, unit):
+        table = dict()
+        package = unit.package.name if unit.package is not None else ''
+
+        on_demand = list()
+        single = list()
+
+        for declaration in unit.imports:
+            if declaration.wildcard:
+                on_demand.append(declaration.path)
+            else:
+                single.append(declaration)
+
+        # Entries are added from the lowest to the highest precedence, so
+        # that later entries replace earlier ones. The first of several
+        # on-demand imports providing a name is used.
+        for container in reversed(on_demand):
+            table.update(self.members.get(container, ()))
+
+        table.update(self.members.get(package, ()))
+
+        for declaration in reversed(single):
+            # Static imports also name fields and methods, so only import
+            # types known to the index
+            if declaration.static and declaration.path not in self.declarations:
+                continue
+
+            table[declaration.path.rpartition('.')[2]] = declaration.path
+
+        # Outer types take precedence over nested types of the same name
+        for name, _ in reversed(declared_types(unit)):
+            table[name.rpartition('.')[2]] = name
+
+        return table
+
+
+def declared_types(unit):
+    """ Returns a list of (qualified name, declaration) pairs for the type
+    declarations of the unit, including nested types but not local or
+    anonymous classes, outer types before the types they contain.
+
+    """
+
+    package = unit.package.name if unit.package is not None else ''
+
+    result = list()
+    pending = collections.deque((package, declaration) for declaration in unit.types)
+
+    while pending:
+        container, declaration = pending.popleft()
+
+        name = declaration.name
+        if container:
+            name = container + '.' + name
+
+        result.append((name, declaration))
+
+        for member in declaration.member_declarations():
+            if isinstance(member, tree.TypeDeclaration):
+                pending.append((name, member))
+
+    return result
@@ -0,0 +1,161 @@
+from .ast import MetaNode, child_nodes, walk_nodes
+from . import tree
+
+
+class NodeInterner(object):
+    """ Replaces structurally equal subtrees with a single shared instance.
+
+    Only nodes of the given types (by default type references, type
+    arguments and type parameters) are interned, and only when neither they
+    nor any node below them has a position or span. Interning is applied
+    bottom-up, so a shared ReferenceType also shares its type arguments. An
+    interner may be used for any number of trees, sharing subtrees between
+    them.
+
+    Interned nodes are shared by every tree they appear in, so they must not
+    be modified, and they have no single parent for javalang.ast.link_parents
+    to record.
+
+    """
+
+    node_types = (tree.Type, tree.TypeArgument, tree.TypeParameter)
+
+    def __init__(self, node_types=None):
+        if node_types is not None:
+            self.node_types = tuple(node_types)
+
+        self.nodes = dict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def clear(self):
+        self.nodes.clear()
+
+    def intern(self, node):
+        """ Returns the shared instance structurally equal to node, making
+        node the shared instance if there is none.
+
+        """
+
+        shared = self.nodes.get(node)
+
+        if shared is None:
+            self.misses += 1
+            shared = self.nodes[node] = node
+        else:
+            self.hits += 1
+
+        return shared
+
+    def is_interned(self, node):
+        return self.nodes.get(node) is node
+
+    def intern_tree(self, root):
+        """ Replaces every internable subtree below root with its shared
+        instance, modifying the tree in place. Returns the root, which is
+        itself replaced if it is internable.
+
+        """
+
+        # Children come before their parents, so a node's children are shared
+        # instances by the time it is interned. Trees are walked rather than
+        # visited, as expressions may be nested too deep to recurse through.
+        replaced = dict()
+
+        for node in reversed(list(walk_nodes(root))):
+            if replaced:
+                for attr in node.attrs:
+                    value = getattr(node, attr)
+                    result = _replace(value, replaced)
+                    if result is not value:
+                        setattr(node, attr, result)
+
+            if self.can_intern(node):
+                shared = self.intern(node)
+                if shared is not node:
+                    replaced[id(node)] = shared
+
+        return replaced.get(id(root), root)
+
+    def can_intern(self, node):
+        if not isinstance(node, self.node_types):
+            return False
+
+        if (getattr(node, '_position', None) is not None or
+                getattr(node, '_span', None) is not None):
+            return False
+
+        # Children have already been interned where possible, so the subtree
+        # is free of positions when all child nodes are shared instances
+        for child in child_nodes(node):
+            if not self.is_interned(child):
+                return False
+
+        return True
+
+
+def _replace(value, replaced):
+    """ Returns the value with the nodes in replaced replaced by their shared
+    instances. Lists are modified in place.
+
+    """
+
+    if isinstance(type(value), MetaNode):
+        return replaced.get(id(value), value)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            value[i] = _replace(item, replaced)
+    elif isinstance(value, tuple):
+        return tuple(_replace(item, replaced) for item in value)
+
+    return value
+
+
+class StringInternTable(object):
+    """ A bounded table of shared strings, for use by the tokenizer and parser
+    across any number of parses.
+
+    Strings are kept in two generations. New strings enter the young
+    generation, and once it holds half of max_size strings it replaces the
+    old generation, whose strings are forgotten unless they were looked up
+    again in the meantime. The table therefore never holds more than max_size
+    strings, and strings in regular use stay shared.
+
+    """
+
+    def __init__(self, max_size=65536):
+        self.max_size = max_size
+        self.young = dict()
+        self.old = dict()
+
+    def __len__(self):
+        return len(self.young) + len(self.old)
+
+    def __contains__(self, s):
+        return s in self.young or s in self.old
+
+    def clear(self):
+        self.young = dict()
+        self.old = dict()
+
+    def intern(self, s):
+        """ Returns the shared string equal to s, making s the shared string
+        if there is none.
+
+        """
+
+        shared = self.young.get(s)
+
+        if shared is None:
+            shared = self.old.get(s, s)
+            self.young[shared] = shared
+
+            if len(self.young) >= self.max_size // 2:
+                self.old = self.young
+                self.young = dict()
+
+        return shared
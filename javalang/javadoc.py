@@ -1,8 +1,9 @@
 
 import re
+from collections import OrderedDict
 
 def join(s):
-    return ' '.join(l.strip() for l in s.split('\n'))
+    return ' '.join([l.strip() for l in s.split('\n')])
 
 class DocBlock(object):
     def __init__(self):
@@ -118,3 +119,48 @@ def parse(raw):
         doc.add_block(tag, value)
 
     return doc
+
+
+class DocCache(object):
+    """ A bounded, least recently used cache of parsed comments, keyed by
+    their text. DocBlocks returned from the cache are shared and must not be
+    modified.
+
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def parse(self, raw):
+        entries = self.entries
+
+        doc = entries.pop(raw, None)
+        if doc is None:
+            self.misses += 1
+            doc = parse(raw)
+
+            if len(entries) >= self.max_size:
+                entries.popitem(last=False)
+        else:
+            self.hits += 1
+
+        entries[raw] = doc
+        return doc
+
+# Used by the doc property of documented declarations
+default_cache = DocCache()
+
+def parse_cached(raw):
+    """ Returns the shared DocBlock for the comment from the default cache """
+
+    return default_cache.parse(raw)
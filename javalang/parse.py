@@ -1,53 +1,85 @@
 
-from .parser import Parser
-from .tokenizer import tokenize
+from .parser import Parser, JavaParserBaseException
+from .tokenizer import tokenize, LexerError
 
-def parse_expression(exp):
-    if not exp.endswith(';'):
-        exp = exp + ';'
+# Errors which are collected, rather than raised, by the batch parsing methods.
+# StopIteration is raised by the parser when a snippet ends prematurely.
+PARSE_ERRORS = (JavaParserBaseException, LexerError, StopIteration)
 
-    tokens = tokenize(exp)
-    parser = Parser(tokens)
+def _terminate_statement(s):
+    if not s.endswith(';'):
+        s = s + ';'
 
-    return parser.parse_expression()
+    return s
 
-def parse_member_signature(sig):
-    if not sig.endswith(';'):
-        sig = sig + ';'
+def _add_empty_body(s):
+    # Add an empty body to the signature, replacing a ; if necessary
+    if s.endswith(';'):
+        s = s[:-1]
+
+    return s + '{ }'
+
+def _unchanged(s):
+    return s
 
-    tokens = tokenize(sig)
+def _parse_one(s, prepare, rule):
+    tokens = tokenize(prepare(s))
     parser = Parser(tokens)
 
-    return parser.parse_member_declaration()
+    return getattr(parser, rule)()
 
-def parse_constructor_signature(sig):
-    # Add an empty body to the signature, replacing a ; if necessary
-    if sig.endswith(';'):
-        sig = sig[:-1]
-    sig = sig + '{ }'
+def _parse_many(snippets, prepare, rule, parser):
+    if parser is None:
+        parser = Parser(())
 
-    tokens = tokenize(sig)
-    parser = Parser(tokens)
+    for s in snippets:
+        try:
+            parser.reset(tokenize(prepare(s)))
+            result = getattr(parser, rule)()
+        except PARSE_ERRORS as e:
+            yield None, e
+        else:
+            yield result, None
 
-    return parser.parse_member_declaration()
+def parse_expression(exp):
+    return _parse_one(exp, _terminate_statement, 'parse_expression')
 
-def parse_type(s):
-    tokens = tokenize(s)
-    parser = Parser(tokens)
+def parse_member_signature(sig):
+    return _parse_one(sig, _terminate_statement, 'parse_member_declaration')
+
+def parse_constructor_signature(sig):
+    return _parse_one(sig, _add_empty_body, 'parse_member_declaration')
 
-    return parser.parse_type()
+def parse_type(s):
+    return _parse_one(s, _unchanged, 'parse_type')
 
 def parse_type_signature(sig):
-    if sig.endswith(';'):
-        sig = sig[:-1]
-    sig = sig + '{ }'
+    return _parse_one(sig, _add_empty_body, 'parse_class_or_interface_declaration')
 
-    tokens = tokenize(sig)
+def parse(s, intern_table=None):
+    tokens = tokenize(s, intern_table=intern_table)
     parser = Parser(tokens)
+    parser.set_intern_table(intern_table)
+    return parser.parse()
 
-    return parser.parse_class_or_interface_declaration()
+# ------------------------------------------------------------------------------
+# ---- Batch parsing ----
+#
+# The following methods parse each snippet of an iterable using a single
+# reusable Parser (a new one unless given). They generate a (result, error)
+# pair for every snippet, in order, where exactly one of the two is None.
 
-def parse(s):
-    tokens = tokenize(s)
-    parser = Parser(tokens)
-    return parser.parse()
+def parse_expressions(exps, parser=None):
+    return _parse_many(exps, _terminate_statement, 'parse_expression', parser)
+
+def parse_member_signatures(sigs, parser=None):
+    return _parse_many(sigs, _terminate_statement, 'parse_member_declaration', parser)
+
+def parse_constructor_signatures(sigs, parser=None):
+    return _parse_many(sigs, _add_empty_body, 'parse_member_declaration', parser)
+
+def parse_types(types, parser=None):
+    return _parse_many(types, _unchanged, 'parse_type', parser)
+
+def parse_type_signatures(sigs, parser=None):
+    return _parse_many(sigs, _add_empty_body, 'parse_class_or_interface_declaration', parser)
@@ -2,6 +2,7 @@ import six
 
 from . import util
 from . import tree
+from .ast import MetaNode, fill_spans
 from .tokenizer import (
     EndOfInput, Keyword, Modifier, BasicType, Identifier,
     Annotation, Literal, Operator, JavaToken,
@@ -73,9 +74,88 @@ class JavaSyntaxError(JavaParserBaseException):
         self.description = description
         self.at = at
 
+    def __reduce__(self):
+        # Allow errors to be pickled, e.g. to pass them between processes
+        return (type(self), (self.description, self.at))
+
 class JavaParserError(JavaParserBaseException):
     pass
 
+# ------------------------------------------------------------------------------
+# ---- Token kinds ----
+
+# Tokens are classified for table lookups either by their value (keywords,
+# modifiers, separators and operators) or, when the value itself is open ended,
+# by one of these categories
+TOKEN_CATEGORIES = (Literal, Identifier, BasicType)
+
+_token_categories = dict()
+
+def token_kind(token):
+    """ Returns the key used to look up the token in a prediction table. This
+    is the token's category class for literals, identifiers and basic types and
+    the token's value otherwise. EndOfInput is classified as None.
+
+    """
+
+    token_class = token.__class__
+
+    try:
+        category = _token_categories[token_class]
+    except KeyError:
+        category = None
+        for candidate in TOKEN_CATEGORIES:
+            if issubclass(token_class, candidate):
+                category = candidate
+                break
+        _token_categories[token_class] = category
+
+    if category is None:
+        return token.value
+
+    return category
+
+# ------------------------------------------------------------------------------
+# ---- Span recording ----
+
+# Rules returning the node of another rule within delimiters of their own, such
+# as the parentheses of a condition or the arrow of a lambda body, which are
+# left out of the node's span
+_delimiting_rules = frozenset(('parse_par_expression',
+                               'parse_lambda_method_body',
+                               'parse_for_var_control_rest',
+                               'parse_selector'))
+
+def _record_spans(tokens, method, depth):
+    delimiting = method.__name__ in _delimiting_rules
+
+    def _method(*args, **kwargs):
+        start = tokens.marker
+
+        depth[0] += 1
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+
+        end = tokens.marker
+
+        # Rules returning a node created by another rule widen its span, as
+        # when modifiers are parsed before the declaration they belong to
+        if end > start and isinstance(type(result), MetaNode):
+            if not delimiting or getattr(result, '_span', None) is None:
+                result._span = (tokens.list[start], tokens.list[end - 1])
+
+            if not depth[0]:
+                fill_spans(result)
+
+        return result
+
+    _method.__name__ = method.__name__
+    _method.__doc__ = method.__doc__
+
+    return _method
+
 # ------------------------------------------------------------------------------
 # ---- Parser class ----
 
@@ -96,6 +176,18 @@ class Parser(object):
         self.tokens.set_default(EndOfInput(None))
 
         self.debug = False
+        self.profiler = None
+        self.spans = False
+        self.node_interner = None
+        self.intern_table = None
+
+    def reset(self, tokens):
+        """ Restart the parser on a new token stream. This allows a single
+        parser, along with any attached profiler, to be reused for many inputs.
+
+        """
+
+        self.tokens.reset(tokens)
 
 # ------------------------------------------------------------------------------
 # ---- Debug control ----
@@ -103,15 +195,117 @@ class Parser(object):
     def set_debug(self, debug=True):
         self.debug = debug
 
+    def set_profiler(self, profiler=None):
+        """ Attach a javalang.profiler.ParseProfiler to this parser, replacing
+        any previously attached profiler. Passing None disables profiling.
+
+        """
+
+        if self.profiler is not None:
+            self.profiler.detach(self)
+
+        self.profiler = profiler
+        self.wrap_rules()
+
+# ------------------------------------------------------------------------------
+# ---- Source spans ----
+
+    def set_spans(self, spans=True):
+        """ Record the first and last token of every node returned by a parse
+        rule. A node's span covers the tokens its rule consumed, except for
+        delimiters such as the parentheses of a condition. Nodes built without
+        a rule of their own, such as nested binary operations, are given the
+        span covering their children unless it is recorded where they are
+        built. Spans are available through Node.span, Node.offsets and
+        Node.source_text.
+
+        """
+
+        if self.profiler is not None:
+            self.profiler.detach(self)
+
+        self.spans = spans
+        self.wrap_rules()
+
+    def wrap_rules(self):
+        """ Install the rule wrappers for span recording and profiling, in
+        that order so that the profiler includes the cost of recording spans.
+
+        """
+
+        for name in list(vars(self)):
+            if name.startswith('parse_'):
+                delattr(self, name)
+
+        if self.spans:
+            depth = [0]
+            for name in dir(type(self)):
+                if name.startswith('parse_'):
+                    method = getattr(self, name)
+                    if callable(method):
+                        setattr(self, name, _record_spans(self.tokens, method, depth))
+
+        if self.profiler is not None:
+            self.profiler.attach(self)
+
+    def record_span(self, node, start, end=None):
+        """ Gives a node built without a rule of its own the span from the
+        token start to end, by default the last token accepted. Does nothing
+        unless spans are recorded.
+
+        """
+
+        if self.spans:
+            if end is None:
+                end = self.tokens.list[self.tokens.marker - 1]
+            node._span = (start, end)
+
+# ------------------------------------------------------------------------------
+# ---- Interning ----
+
+    def set_node_interner(self, interner=None):
+        """ Use a javalang.interning.NodeInterner to share structurally equal
+        type subtrees within and across the compilation units returned by
+        parse(). Passing None disables interning.
+
+        """
+
+        self.node_interner = interner
+
+    def set_intern_table(self, table=None):
+        """ Use a javalang.interning.StringInternTable to share the qualified
+        names joined by the parser, such as import paths, package and
+        annotation names and qualifiers. Identifiers are shared by passing
+        the same table to the tokenizer. Passing None disables interning.
+
+        """
+
+        self.intern_table = table
+
 # ------------------------------------------------------------------------------
 # ---- Parsing entry point ----
 
     def parse(self):
-        return self.parse_compilation_unit()
+        unit = self.parse_compilation_unit()
+
+        # Interning is done once the tree is complete since the parser
+        # modifies some nodes after creating them
+        if self.node_interner is not None:
+            self.node_interner.intern_tree(unit)
+
+        return unit
 
 # ------------------------------------------------------------------------------
 # ---- Helper methods ----
 
+    def join_qualified(self, identifiers):
+        name = '.'.join(identifiers)
+
+        if self.intern_table is not None:
+            name = self.intern_table.intern(name)
+
+        return name
+
     def illegal(self, description, at=None):
         if not at:
             at = self.tokens.look()
@@ -169,6 +363,27 @@ class Parser(object):
 
         return True
 
+    def predict(self, table, i=0):
+        """ Select an alternative from a prediction table based on the kind of
+        the token at lookahead position i. Tables map token kinds to the name of
+        the rule implementing the alternative, or to a nested table which is
+        consulted with the following token. The None key gives the alternative
+        used for any other token.
+
+        """
+
+        kind = token_kind(self.tokens.look(i))
+
+        try:
+            alternative = table[kind]
+        except KeyError:
+            alternative = table[None]
+
+        if isinstance(alternative, dict):
+            return self.predict(alternative, i + 1)
+
+        return alternative
+
     def build_binary_operation(self, parts, start_level=0):
         if len(parts) == 1:
             return parts[0]
@@ -242,7 +457,7 @@ class Parser(object):
             if not self.try_accept('.'):
                 break
 
-        return '.'.join(qualified_identifier)
+        return self.join_qualified(qualified_identifier)
 
     @parse_debug
     def parse_qualified_identifier_list(self):
@@ -287,6 +502,7 @@ class Parser(object):
             package._position = token.position
             
             self.accept(';')
+            self.record_span(package, next_token)
         else:
             self.tokens.pop_marker(True)
             package_annotations = None
@@ -335,7 +551,7 @@ class Parser(object):
                 self.accept(';')
                 break
 
-        return tree.Import(path='.'.join(qualified_identifier),
+        return tree.Import(path=self.join_qualified(qualified_identifier),
                            static=static,
                            wildcard=import_all)
 
@@ -479,6 +695,7 @@ class Parser(object):
     def parse_reference_type(self):
         reference_type = tree.ReferenceType()
         tail = reference_type
+        sub_types = list()
 
         while True:
             tail.name = self.parse_identifier()
@@ -489,9 +706,14 @@ class Parser(object):
             if self.try_accept('.'):
                 tail.sub_type = tree.ReferenceType()
                 tail = tail.sub_type
+                sub_types.append((tail, self.tokens.look()))
             else:
                 break
 
+        # Each sub type spans the remainder of the reference type
+        for sub_type, start in sub_types:
+            self.record_span(sub_type, start)
+
         return reference_type
 
     @parse_debug
@@ -773,63 +995,77 @@ class Parser(object):
 
         return declarations
 
+    class_body_declaration_table = {
+        ';': 'parse_empty_declaration',
+        '{': 'parse_body_block',
+        'static': {'{': 'parse_static_block',
+                   None: 'parse_member_declaration'},
+        None: 'parse_member_declaration',
+    }
+
     @parse_debug
     def parse_class_body_declaration(self):
-        token = self.tokens.look()
+        return getattr(self, self.predict(self.class_body_declaration_table))()
 
-        if self.try_accept(';'):
-            return None
+    @parse_debug
+    def parse_empty_declaration(self):
+        self.accept(';')
+        return None
 
-        elif self.would_accept('static', '{'):
-            self.accept('static')
-            return self.parse_block()
+    @parse_debug
+    def parse_static_block(self):
+        self.accept('static')
+        return self.parse_body_block()
 
-        elif self.would_accept('{'):
-            return self.parse_block()
-
-        else:
-            return self.parse_member_declaration()
+    member_declaration_table = {
+        'void': 'parse_void_method_declaration',
+        '<': 'parse_generic_method_or_constructor_declaration',
+        'class': 'parse_normal_class_declaration',
+        'enum': 'parse_enum_declaration',
+        'interface': 'parse_normal_interface_declaration',
+        '@': 'parse_annotation_member_declaration',
+        Identifier: {'(': 'parse_constructor_declaration',
+                     None: 'parse_method_or_field_declaraction'},
+        None: 'parse_method_or_field_declaraction',
+    }
 
     @parse_debug
     def parse_member_declaration(self):
         modifiers, annotations, javadoc = self.parse_modifiers()
-        member = None
 
         token = self.tokens.look()
-        if self.try_accept('void'):
-            method_name = self.parse_identifier()
-            member = self.parse_void_method_declarator_rest()
-            member.name = method_name
+        member = getattr(self, self.predict(self.member_declaration_table))()
 
-        elif token.value == '<':
-            member = self.parse_generic_method_or_constructor_declaration()
+        member._position = token.position
+        member.modifiers = modifiers
+        member.annotations = annotations
+        member.documentation = javadoc
 
-        elif token.value == 'class':
-            member = self.parse_normal_class_declaration()
+        return member
 
-        elif token.value == 'enum':
-            member = self.parse_enum_declaration()
+    @parse_debug
+    def parse_void_method_declaration(self):
+        self.accept('void')
+        method_name = self.parse_identifier()
+        method = self.parse_void_method_declarator_rest()
+        method.name = method_name
 
-        elif token.value == 'interface':
-            member = self.parse_normal_interface_declaration()
+        return method
 
-        elif self.is_annotation_declaration():
-            member = self.parse_annotation_type_declaration()
+    @parse_debug
+    def parse_constructor_declaration(self):
+        constructor_name = self.parse_identifier()
+        constructor = self.parse_constructor_declarator_rest()
+        constructor.name = constructor_name
 
-        elif self.would_accept(Identifier, '('):
-            constructor_name = self.parse_identifier()
-            member = self.parse_constructor_declarator_rest()
-            member.name = constructor_name
+        return constructor
 
+    @parse_debug
+    def parse_annotation_member_declaration(self):
+        if self.is_annotation_declaration():
+            return self.parse_annotation_type_declaration()
         else:
-            member = self.parse_method_or_field_declaraction()
-
-        member._position = token.position
-        member.modifiers = modifiers
-        member.annotations = annotations
-        member.documentation = javadoc
-
-        return member
+            return self.parse_method_or_field_declaraction()
 
     @parse_debug
     def parse_method_or_field_declaraction(self):
@@ -862,9 +1098,13 @@ class Parser(object):
 
     @parse_debug
     def parse_field_declarators_rest(self):
+        # The name of the first declarator was accepted by the caller
+        name_token = self.tokens.list[self.tokens.marker - 1]
+
         array_dimension, initializer = self.parse_variable_declarator_rest()
         declarators = [tree.VariableDeclarator(dimensions=array_dimension,
                                                initializer=initializer)]
+        self.record_span(declarators[0], name_token)
 
         while self.try_accept(','):
             declarator = self.parse_variable_declarator()
@@ -883,7 +1123,7 @@ class Parser(object):
             throws = self.parse_qualified_identifier_list()
 
         if self.would_accept('{'):
-            body = self.parse_block()
+            body = self.parse_body_block()
         else:
             self.accept(';')
 
@@ -902,7 +1142,7 @@ class Parser(object):
             throws = self.parse_qualified_identifier_list()
 
         if self.would_accept('{'):
-            body = self.parse_block()
+            body = self.parse_body_block()
         else:
             self.accept(';')
 
@@ -919,7 +1159,7 @@ class Parser(object):
         if self.try_accept('throws'):
             throws = self.parse_qualified_identifier_list()
 
-        body = self.parse_block()
+        body = self.parse_body_block()
 
         return tree.ConstructorDeclaration(parameters=formal_parameters,
                                            throws=throws,
@@ -1041,9 +1281,13 @@ class Parser(object):
 
     @parse_debug
     def parse_constant_declarators_rest(self):
+        # The name of the first declarator was accepted by the caller
+        name_token = self.tokens.list[self.tokens.marker - 1]
+
         array_dimension, initializer = self.parse_constant_declarator_rest()
         declarators = [tree.VariableDeclarator(dimensions=array_dimension,
                                                initializer=initializer)]
+        self.record_span(declarators[0], name_token)
 
         while self.try_accept(','):
             declarator = self.parse_constant_declarator()
@@ -1079,7 +1323,7 @@ class Parser(object):
             throws = self.parse_qualified_identifier_list()
 
         if self.would_accept('{'):
-            body = self.parse_block()
+            body = self.parse_body_block()
         else:
             self.accept(';')
 
@@ -1098,7 +1342,7 @@ class Parser(object):
             throws = self.parse_qualified_identifier_list()
 
         if self.would_accept('{'):
-            body = self.parse_block()
+            body = self.parse_body_block()
         else:
             self.accept(';')
 
@@ -1136,6 +1380,7 @@ class Parser(object):
             return formal_parameters
 
         while True:
+            start = self.tokens.look()
             modifiers, annotations = self.parse_variable_modifiers()
             
             token = self.tokens.look()
@@ -1155,6 +1400,7 @@ class Parser(object):
                                              varargs=varargs)
 
             parameter._position = token.position
+            self.record_span(parameter, start)
             formal_parameters.append(parameter)
 
             if varargs:
@@ -1277,15 +1523,60 @@ class Parser(object):
 
         return statements
 
+    @parse_debug
+    def parse_body_block(self):
+        """ The block forming the body of a method, constructor or initializer.
+        DeclarationParser skips over it.
+
+        """
+
+        return self.parse_block()
+
+    block_statement_table = {
+        Identifier: {':': 'parse_statement',
+                     None: 'parse_local_variable_declaration_or_statement'},
+        BasicType: 'parse_block_local_variable_declaration',
+        'synchronized': 'parse_statement',
+        'final': 'parse_modified_block_statement',
+        '@': 'parse_modified_block_statement',
+        'class': 'parse_class_or_interface_declaration',
+        'enum': 'parse_class_or_interface_declaration',
+        'interface': 'parse_class_or_interface_declaration',
+        None: 'parse_statement',
+    }
+
+    # Any other modifier can only start a local class declaration
+    for _modifier in Modifier.VALUES - set(block_statement_table):
+        block_statement_table[_modifier] = 'parse_class_or_interface_declaration'
+    del _modifier
+
     @parse_debug
     def parse_block_statement(self):
-        if self.would_accept(Identifier, ':'):
-            # Labeled statement
-            return self.parse_statement()
+        return getattr(self, self.predict(self.block_statement_table))()
+
+    @parse_debug
+    def parse_block_local_variable_declaration(self):
+        token = self.tokens.look()
+        statement = self.parse_local_variable_declaration_statement()
+        statement._position = token.position
+        return statement
+
+    @parse_debug
+    def parse_local_variable_declaration_or_statement(self):
+        # We can't easily determine the statement type. Try parsing as a variable
+        # declaration first and fall back to a statement
+        token = self.tokens.look()
 
-        if self.would_accept('synchronized'):
+        try:
+            with self.tokens:
+                statement = self.parse_local_variable_declaration_statement()
+                statement._position = token.position
+                return statement
+        except JavaSyntaxError:
             return self.parse_statement()
 
+    @parse_debug
+    def parse_modified_block_statement(self):
         token = None
         found_annotations = False
         i = 0
@@ -1565,6 +1856,7 @@ class Parser(object):
     def parse_catch_clause(self):
         self.accept('catch', '(')
 
+        start = self.tokens.look()
         modifiers, annotations = self.parse_variable_modifiers()
         catch_parameter = tree.CatchClauseParameter(types=list())
 
@@ -1575,6 +1867,7 @@ class Parser(object):
             if not self.try_accept('|'):
                 break
         catch_parameter.name = self.parse_identifier()
+        self.record_span(catch_parameter, start)
 
         self.accept(')')
         block = self.parse_block()
@@ -1690,10 +1983,13 @@ class Parser(object):
 
     @parse_debug
     def parse_for_var_control(self):
+        start = self.tokens.look()
         modifiers, annotations = self.parse_variable_modifiers()
         var_type = self.parse_type()
+        name_token = self.tokens.look()
         var_name = self.parse_identifier()
         var_type.dimensions += self.parse_array_dimension()
+        name_end = self.tokens.list[self.tokens.marker - 1]
 
         var = tree.VariableDeclaration(modifiers=modifiers,
                                        annotations=annotations,
@@ -1702,13 +1998,24 @@ class Parser(object):
         rest = self.parse_for_var_control_rest()
 
         if isinstance(rest, tree.Expression):
-            var.declarators = [tree.VariableDeclarator(name=var_name)]
+            declarator = tree.VariableDeclarator(name=var_name)
+            self.record_span(declarator, name_token, name_end)
+            self.record_span(var, start, name_end)
+
+            var.declarators = [declarator]
             return tree.EnhancedForControl(var=var,
                                            iterable=rest)
         else:
             declarators, condition, update = rest
             declarators[0].name = var_name
             var.declarators = declarators
+
+            if self.spans:
+                initializer = declarators[0].initializer
+                end = name_end if initializer is None else initializer.span[1]
+                self.record_span(declarators[0], name_token, end)
+                self.record_span(var, start, declarators[-1].span[1])
+
             return tree.ForControl(init=var,
                                    condition=condition,
                                    update=update)
@@ -1862,16 +2169,26 @@ class Parser(object):
                     self.accept(')')
                     expression = self.parse_expression_3()
 
-                    return tree.Cast(type=cast_target,
+                    cast = tree.Cast(type=cast_target,
                                      expression=expression)
+                    if prefix_operators:
+                        cast.prefix_operators = prefix_operators
+                    return cast
             except JavaSyntaxError:
                 pass
 
         primary = self.parse_primary()
+
+        # A parenthesized expression keeps the operators applied within the
+        # parentheses, which bind more tightly than those outside
+        inner_prefix_operators = getattr(primary, "prefix_operators", None)
+        if inner_prefix_operators:
+            prefix_operators.extend(inner_prefix_operators)
         primary.prefix_operators = prefix_operators
         if getattr(primary, "selectors", None) is None:
             primary.selectors = list()
-        primary.postfix_operators = list()
+        if getattr(primary, "postfix_operators", None) is None:
+            primary.postfix_operators = list()
 
         token = self.tokens.look()
         while token.value in '[.':
@@ -1893,7 +2210,9 @@ class Parser(object):
         if self.would_accept('<'):
             type_arguments = self.parse_nonwildcard_type_arguments()
         if self.would_accept('new'):
+            token = self.tokens.look()
             method_reference = tree.MemberReference(member=self.accept('new'))
+            self.record_span(method_reference, token)
         else:
             method_reference = self.parse_expression()
         return method_reference, type_arguments
@@ -1906,8 +2225,10 @@ class Parser(object):
             self.accept('(')
             parameters = []
             while not self.would_accept(')'):
-                parameters.append(tree.InferredFormalParameter(
-                    name=self.parse_identifier()))
+                token = self.tokens.look()
+                parameter = tree.InferredFormalParameter(name=self.parse_identifier())
+                self.record_span(parameter, token)
+                parameters.append(parameter)
                 self.try_accept(',')
             self.accept(')')
         else:
@@ -1942,84 +2263,125 @@ class Parser(object):
 # ------------------------------------------------------------------------------
 # -- Primary expressions --
 
+    primary_table = {
+        Literal: 'parse_primary_literal',
+        '(': 'parse_par_expression',
+        'this': 'parse_primary_this',
+        'super': 'parse_primary_super',
+        'new': 'parse_primary_creator',
+        '<': 'parse_primary_explicit_generic_invocation',
+        Identifier: 'parse_primary_qualified_identifier',
+        BasicType: 'parse_primary_basic_type_class_reference',
+        'void': 'parse_primary_void_class_reference',
+        None: None,
+    }
+
     @parse_debug
     def parse_primary(self):
+        alternative = self.predict(self.primary_table)
+
+        if alternative is None:
+            self.illegal("Expected expression")
+
+        return getattr(self, alternative)()
+
+    @parse_debug
+    def parse_primary_literal(self):
         token = self.tokens.look()
+        literal = self.parse_literal()
+        literal._position = token.position
+        return literal
 
-        if isinstance(token, Literal):
-            literal = self.parse_literal()
-            literal._position = token.position
-            return literal
+    @parse_debug
+    def parse_primary_this(self):
+        self.accept('this')
 
-        elif token.value == '(':
-            return self.parse_par_expression()
+        if self.would_accept('('):
+            arguments = self.parse_arguments()
+            return tree.ExplicitConstructorInvocation(arguments=arguments)
 
-        elif self.try_accept('this'):
-            arguments = None
+        return tree.This()
 
-            if self.would_accept('('):
-                arguments = self.parse_arguments()
-                return tree.ExplicitConstructorInvocation(arguments=arguments)
+    @parse_debug
+    def parse_primary_super(self):
+        token = self.tokens.look()
+        self.accept('super')
 
-            return tree.This()
-        elif self.would_accept('super', '::'):
-            self.accept('super')
+        if self.would_accept('::'):
             return token
-        elif self.try_accept('super'):
-            super_suffix = self.parse_super_suffix()
-            return super_suffix
 
-        elif self.try_accept('new'):
-            return self.parse_creator()
+        return self.parse_super_suffix()
 
-        elif token.value == '<':
-            type_arguments = self.parse_nonwildcard_type_arguments()
+    @parse_debug
+    def parse_primary_creator(self):
+        self.accept('new')
+        return self.parse_creator()
 
-            if self.try_accept('this'):
-                arguments = self.parse_arguments()
-                return tree.ExplicitConstructorInvocation(type_arguments=type_arguments,
-                                                          arguments=arguments)
-            else:
-                invocation = self.parse_explicit_generic_invocation_suffix()
-                invocation._position = token.position
-                invocation.type_arguments = type_arguments
+    @parse_debug
+    def parse_primary_explicit_generic_invocation(self):
+        token = self.tokens.look()
+        type_arguments = self.parse_nonwildcard_type_arguments()
+
+        if self.try_accept('this'):
+            arguments = self.parse_arguments()
+            return tree.ExplicitConstructorInvocation(type_arguments=type_arguments,
+                                                      arguments=arguments)
+        else:
+            invocation = self.parse_explicit_generic_invocation_suffix()
+            invocation._position = token.position
+            invocation.type_arguments = type_arguments
 
-                return invocation
+            return invocation
 
-        elif isinstance(token, Identifier):
-            qualified_identifier = [self.parse_identifier()]
+    @parse_debug
+    def parse_primary_qualified_identifier(self):
+        token = self.tokens.look()
+        name_token = token
+        qualified_identifier = [self.parse_identifier()]
 
-            while self.would_accept('.', Identifier):
-                self.accept('.')
-                identifier = self.parse_identifier()
-                qualified_identifier.append(identifier)
+        while self.would_accept('.', Identifier):
+            self.accept('.')
+            name_token = self.tokens.look()
+            identifier = self.parse_identifier()
+            qualified_identifier.append(identifier)
 
-            identifier_suffix = self.parse_identifier_suffix()
+        identifier_suffix = self.parse_identifier_suffix()
 
-            if isinstance(identifier_suffix, (tree.MemberReference, tree.MethodInvocation)):
-                # Take the last identifer as the member and leave the rest for the qualifier
+        if isinstance(identifier_suffix, (tree.MemberReference, tree.MethodInvocation)):
+            # Take the last identifer as the member and leave the rest for the
+            # qualifier, unless the member followed explicit type arguments
+            if identifier_suffix.member is None:
                 identifier_suffix.member = qualified_identifier.pop()
 
-            elif isinstance(identifier_suffix, tree.ClassReference):
-                identifier_suffix.type = tree.ReferenceType(name=qualified_identifier.pop())
+        elif isinstance(identifier_suffix, tree.ClassReference):
+            dimensions = None
+            if identifier_suffix.type is not None:
+                dimensions = identifier_suffix.type.dimensions
 
-            identifier_suffix._position = token.position
-            identifier_suffix.qualifier = '.'.join(qualified_identifier)
+            identifier_suffix.type = tree.ReferenceType(name=qualified_identifier.pop(),
+                                                        dimensions=dimensions)
 
-            return identifier_suffix
+            # The type ends with the last token before '.class'
+            self.record_span(identifier_suffix.type, name_token,
+                             self.tokens.list[self.tokens.marker - 3])
 
-        elif isinstance(token, BasicType):
-            base_type = self.parse_basic_type()
-            base_type.dimensions = self.parse_array_dimension()
-            self.accept('.', 'class')
+        identifier_suffix._position = token.position
+        identifier_suffix.qualifier = self.join_qualified(qualified_identifier)
 
-            return tree.ClassReference(type=base_type)
+        return identifier_suffix
 
-        elif self.try_accept('void'):
-            self.accept('.', 'class')
-            return tree.VoidClassReference()
+    @parse_debug
+    def parse_primary_basic_type_class_reference(self):
+        base_type = self.parse_basic_type()
+        base_type.dimensions = self.parse_array_dimension()
+        self.accept('.', 'class')
 
-        self.illegal("Expected expression")
+        return tree.ClassReference(type=base_type)
+
+    @parse_debug
+    def parse_primary_void_class_reference(self):
+        self.accept('void', '.', 'class')
+        return tree.VoidClassReference()
 
     @parse_debug
     def parse_literal(self):
@@ -2128,6 +2490,7 @@ class Parser(object):
     def parse_created_name(self):
         created_name = tree.ReferenceType()
         tail = created_name
+        sub_types = list()
 
         while True:
             tail.name = self.parse_identifier()
@@ -2138,9 +2501,13 @@ class Parser(object):
             if self.try_accept('.'):
                 tail.sub_type = tree.ReferenceType()
                 tail = tail.sub_type
+                sub_types.append((tail, self.tokens.look()))
             else:
                 break
 
+        for sub_type, start in sub_types:
+            self.record_span(sub_type, start)
+
         return created_name
 
     @parse_debug
@@ -2228,6 +2595,7 @@ class Parser(object):
 
     @parse_debug
     def parse_inner_creator(self):
+        token = self.tokens.look()
         identifier = self.parse_identifier()
         type_arguments = None
 
@@ -2236,6 +2604,7 @@ class Parser(object):
 
         java_type = tree.ReferenceType(name=identifier,
                                        arguments=type_arguments)
+        self.record_span(java_type, token)
 
         arguments, class_body = self.parse_class_creator_rest()
 
@@ -2260,19 +2629,26 @@ class Parser(object):
                 if self.would_accept('('):
                     arguments = self.parse_arguments()
 
-                    return tree.MethodInvocation(member=identifier,
-                                                 arguments=arguments)
+                    selector = tree.MethodInvocation(member=identifier,
+                                                     arguments=arguments)
                 else:
-                    return tree.MemberReference(member=identifier)
+                    selector = tree.MemberReference(member=identifier)
+
+                self.record_span(selector, token)
+                return selector
             elif self.would_accept('super', '::'):
                 self.accept('super')
                 return token
             elif self.would_accept('<'):
                 return self.parse_explicit_generic_invocation()
             elif self.try_accept('this'):
-                return tree.This()
+                selector = tree.This()
+                self.record_span(selector, token)
+                return selector
             elif self.try_accept('super'):
-                return self.parse_super_suffix()
+                selector = self.parse_super_suffix()
+                self.record_span(selector, token)
+                return selector
             elif self.try_accept('new'):
                 type_arguments = None
 
@@ -2281,6 +2657,7 @@ class Parser(object):
 
                 inner_creator = self.parse_inner_creator()
                 inner_creator.constructor_type_arguments = type_arguments
+                self.record_span(inner_creator, token)
 
                 return inner_creator
 
@@ -2415,6 +2792,47 @@ class Parser(object):
         else:
             return self.parse_constant_declarators_rest()
 
+# ------------------------------------------------------------------------------
+# ---- Declaration only parser ----
+
+class DeclarationParser(Parser):
+    """ A parser which skips the bodies of methods, constructors and
+    initializers, giving them an empty list of statements. Type and member
+    declarations, including their documentation, are parsed as usual, at a
+    fraction of the cost of a full parse. Syntax errors within the skipped
+    bodies are not detected.
+
+    """
+
+    @parse_debug
+    def parse_body_block(self):
+        if not self.would_accept('{'):
+            self.accept('{')
+
+        tokens = self.tokens
+        values = tokens.list
+        depth = 0
+
+        # Only separators have a value of '{' or '}', literals are quoted
+        for i in range(tokens.marker, len(values)):
+            value = values[i].value
+
+            if value == '{':
+                depth += 1
+            elif value == '}':
+                depth -= 1
+
+                if not depth:
+                    break
+        else:
+            tokens.marker = len(values)
+            self.illegal("Expected '}'")
+
+        tokens.marker = i + 1
+        tokens.value = values[i]
+
+        return list()
+
 def parse(tokens, debug=False):
     parser = Parser(tokens)
     parser.set_debug(debug)
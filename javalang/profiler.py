@@ -0,0 +1,198 @@
+from timeit import default_timer
+
+
+class RuleStats(object):
+    """ Accumulated measurements for a single ``parse_*`` rule """
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+        # Number of activations of this rule currently on the stack. Only the
+        # outermost activation contributes to cumulative_time so recursive
+        # rules are not counted more than once
+        self.active = 0
+
+    def reset(self):
+        self.calls = 0
+        self.failures = 0
+        self.cumulative_time = 0.0
+        self.self_time = 0.0
+        self.tokens = 0
+        self.backtracks = 0
+        self.backtrack_time = 0.0
+        self.backtrack_tokens = 0
+
+    def __repr__(self):
+        return '%s(%s, calls=%d, self_time=%.6f)' % (
+            type(self).__name__, self.name, self.calls, self.self_time)
+
+
+class ParseProfiler(object):
+    """ Collects per-rule statistics from one or more Parser instances.
+
+    A profiler is attached with ``Parser.set_profiler()``. While attached,
+    every ``parse_*`` rule of the parser is shadowed by an instance attribute
+    which records call counts, cumulative and self time, the number of tokens
+    consumed and the number and cost of backtracks (markers popped with a
+    reset, e.g. a failed ``with self.tokens:`` block). Detaching removes the
+    instance attributes again, so a parser without a profiler runs the plain
+    class methods with no additional overhead.
+
+    """
+
+    columns = (('calls', 'calls', '%d'),
+               ('failures', 'fail', '%d'),
+               ('cumulative_time', 'cumtime', '%.4f'),
+               ('self_time', 'selftime', '%.4f'),
+               ('tokens', 'tokens', '%d'),
+               ('backtracks', 'backtr', '%d'),
+               ('backtrack_time', 'bt_time', '%.4f'),
+               ('backtrack_tokens', 'bt_tokens', '%d'))
+
+    def __init__(self, timer=default_timer):
+        self.timer = timer
+        self.stats = dict()
+
+        # Time spent in callees of each active rule, innermost last. The
+        # bottom entry collects time for calls made from outside any rule.
+        self.child_times = [0.0]
+        self.rule_stack = list()
+        self.marker_stack = list()
+
+    def clear(self):
+        # The wrappers of attached parsers hold on to their RuleStats, so
+        # these are reset rather than replaced
+        for stats in self.stats.values():
+            stats.reset()
+
+    def get_stats(self, name):
+        stats = self.stats.get(name)
+
+        if stats is None:
+            stats = RuleStats(name)
+            self.stats[name] = stats
+
+        return stats
+
+# ------------------------------------------------------------------------------
+# ---- Instrumentation ----
+
+    def attach(self, parser):
+        for name in dir(type(parser)):
+            if name.startswith('parse_'):
+                method = getattr(parser, name)
+                if callable(method):
+                    setattr(parser, name, self.wrap_rule(parser, name, method))
+
+        self.attach_tokens(parser.tokens)
+
+    def detach(self, parser):
+        for name in list(vars(parser)):
+            if name.startswith('parse_'):
+                delattr(parser, name)
+
+        self.detach_tokens(parser.tokens)
+
+    def attach_tokens(self, tokens):
+        push_marker = tokens.push_marker
+        pop_marker = tokens.pop_marker
+        timer = self.timer
+        marker_stack = self.marker_stack
+
+        def _push_marker():
+            marker_stack.append((timer(), tokens.marker))
+            push_marker()
+
+        def _pop_marker(reset):
+            position = tokens.marker
+            pop_marker(reset)
+            start_time, start_marker = marker_stack.pop()
+
+            if reset:
+                if self.rule_stack:
+                    stats = self.rule_stack[-1]
+                else:
+                    stats = self.get_stats('<toplevel>')
+                stats.backtracks += 1
+                stats.backtrack_time += timer() - start_time
+                stats.backtrack_tokens += position - start_marker
+
+        tokens.push_marker = _push_marker
+        tokens.pop_marker = _pop_marker
+
+    def detach_tokens(self, tokens):
+        for name in ('push_marker', 'pop_marker'):
+            if name in vars(tokens):
+                delattr(tokens, name)
+
+    def wrap_rule(self, parser, name, method):
+        stats = self.get_stats(name)
+        timer = self.timer
+        child_times = self.child_times
+        rule_stack = self.rule_stack
+
+        def _method(*args, **kwargs):
+            stats.calls += 1
+            stats.active += 1
+            rule_stack.append(stats)
+            child_times.append(0.0)
+
+            start_marker = parser.tokens.marker
+            start = timer()
+
+            try:
+                return method(*args, **kwargs)
+            except Exception:
+                stats.failures += 1
+                raise
+            finally:
+                elapsed = timer() - start
+
+                stats.self_time += elapsed - child_times.pop()
+                child_times[-1] += elapsed
+                rule_stack.pop()
+
+                stats.active -= 1
+                if not stats.active:
+                    stats.cumulative_time += elapsed
+
+                stats.tokens += parser.tokens.marker - start_marker
+
+        _method.__name__ = method.__name__
+        _method.__doc__ = method.__doc__
+
+        return _method
+
+# ------------------------------------------------------------------------------
+# ---- Reporting ----
+
+    def sorted_stats(self, sort='self_time'):
+        return sorted(self.stats.values(),
+                      key=lambda stats: (getattr(stats, sort), stats.name),
+                      reverse=True)
+
+    def report(self, sort='self_time', limit=None):
+        """ Returns a table of the collected statistics ordered by the given
+        RuleStats attribute, highest first.
+
+        """
+
+        rows = [s for s in self.sorted_stats(sort) if s.calls or s.backtracks]
+
+        if limit is not None:
+            rows = rows[:limit]
+
+        name_width = max([len('rule')] + [len(s.name) for s in rows])
+        header = ['%-*s' % (name_width, 'rule')]
+        for _, title, _ in self.columns:
+            header.append('%10s' % (title,))
+
+        lines = [' '.join(header)]
+        for stats in rows:
+            line = ['%-*s' % (name_width, stats.name)]
+            for attr, _, fmt in self.columns:
+                line.append('%10s' % (fmt % (getattr(stats, attr),)))
+            lines.append(' '.join(line))
+
+        return '\n'.join(lines)
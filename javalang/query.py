@@ -0,0 +1,436 @@
+import re
+
+import six
+
+from .ast import MetaNode, Node
+from . import tree
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+# ------------------------------------------------------------------------------
+# ---- Selector syntax ----
+#
+# A query is one or more comma separated selectors. A selector is a sequence
+# of compound selectors separated by combinators, either whitespace for any
+# descendant or > for a child. Lists in the tree are not counted, so the
+# statements of a method body are children of the method.
+#
+# A compound selector is a tree class name, matching instances of that class
+# and its subclasses, or * for any node, followed by any number of attribute
+# tests,
+#
+#     [attr]             the attribute is set and not empty
+#     [attr=value]       the attribute equals value
+#     [attr=/regex/]     the attribute matches the regular expression
+#
+# Each test may be negated by using != in place of =. Values may be quoted
+# with " to include spaces or ]. Attributes holding a set or list, such as
+# modifiers, match when any of their elements does.
+
+_space_re = re.compile(r'\s*')
+_type_re = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\*')
+_test_re = re.compile(r'''
+    \[\s*
+    (?P<attr>[A-Za-z_][A-Za-z0-9_]*)
+    \s*
+    (?:
+        (?P<op>!?=)
+        \s*
+        (?:
+            /(?P<regex>(?:[^/\\]|\\.)*)/ |
+            "(?P<quoted>(?:[^"\\]|\\.)*)" |
+            (?P<word>[^\]\s"]+)
+        )
+    )?
+    \s*\]''', re.VERBOSE)
+_escape_re = re.compile(r'\\(.)')
+
+def _node_type(name, selector, pos):
+    if name == '*':
+        return Node
+
+    node_type = getattr(tree, name, None)
+    if not isinstance(node_type, MetaNode):
+        raise QuerySyntaxError("Unknown node type '%s' at %d in %r" % (name, pos, selector))
+
+    return node_type
+
+def _parse_compound(selector, pos):
+    match = _type_re.match(selector, pos)
+
+    if match:
+        node_type = _node_type(match.group(), selector, pos)
+        pos = match.end()
+    else:
+        node_type = Node
+
+    tests = list()
+
+    while True:
+        test_match = _test_re.match(selector, pos)
+        if not test_match:
+            break
+
+        tests.append(_test(test_match, selector))
+        pos = test_match.end()
+
+    if not match and not tests:
+        raise QuerySyntaxError("Expected selector at %d in %r" % (pos, selector))
+
+    return _Compound(node_type, tests), pos
+
+def _test(match, selector):
+    attr, op = match.group('attr', 'op')
+
+    if op is None:
+        return _ExistsTest(attr)
+
+    negate = op == '!='
+
+    if match.group('regex') is not None:
+        try:
+            pattern = re.compile(match.group('regex'))
+        except re.error as e:
+            raise QuerySyntaxError("Invalid regular expression at %d in %r: %s"
+                                   % (match.start('regex'), selector, e))
+        return _RegexTest(attr, pattern, negate)
+
+    if match.group('quoted') is not None:
+        value = _escape_re.sub(r'\1', match.group('quoted'))
+    else:
+        value = match.group('word')
+
+    return _EqualsTest(attr, value, negate)
+
+def _parse(selector):
+    selectors = list()
+    compounds = list()
+    combinators = list()
+
+    pos = _space_re.match(selector).end()
+
+    while True:
+        compound, pos = _parse_compound(selector, pos)
+        compounds.append(compound)
+
+        space = _space_re.match(selector, pos)
+        pos = space.end()
+
+        if pos == len(selector) or selector[pos] == ',':
+            selectors.append(_Selector(compounds, combinators))
+
+            if pos == len(selector):
+                return selectors
+
+            compounds = list()
+            combinators = list()
+            pos = _space_re.match(selector, pos + 1).end()
+
+        elif selector[pos] == '>':
+            combinators.append('>')
+            pos = _space_re.match(selector, pos + 1).end()
+
+        elif space.end() > space.start():
+            combinators.append(' ')
+
+        else:
+            raise QuerySyntaxError("Unexpected '%s' at %d in %r"
+                                   % (selector[pos], pos, selector))
+
+# ------------------------------------------------------------------------------
+# ---- Matchers ----
+
+def _values(node, attr):
+    value = getattr(node, attr, None)
+
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return value
+
+    return (value,)
+
+def _text(value):
+    if isinstance(value, six.string_types):
+        return value
+    elif isinstance(value, (bool, int)):
+        return str(value)
+    else:
+        return None
+
+class _ExistsTest(object):
+
+    def __init__(self, attr):
+        self.attr = attr
+
+    def __call__(self, node):
+        value = getattr(node, self.attr, None)
+
+        if value is None or value is False:
+            return False
+        elif isinstance(value, (six.string_types, set, frozenset, list, tuple)):
+            return len(value) > 0
+        else:
+            return True
+
+class _EqualsTest(object):
+
+    def __init__(self, attr, value, negate):
+        self.attr = attr
+        self.value = value
+        self.negate = negate
+
+    def __call__(self, node):
+        for value in _values(node, self.attr):
+            if _text(value) == self.value:
+                return not self.negate
+
+        return self.negate
+
+class _RegexTest(object):
+
+    def __init__(self, attr, pattern, negate):
+        self.attr = attr
+        self.pattern = pattern
+        self.negate = negate
+
+    def __call__(self, node):
+        for value in _values(node, self.attr):
+            text = _text(value)
+            if text is not None and self.pattern.search(text):
+                return not self.negate
+
+        return self.negate
+
+class _Compound(object):
+
+    def __init__(self, node_type, tests):
+        self.node_type = node_type
+        self.tests = tests
+
+    def matches(self, node):
+        if not isinstance(node, self.node_type):
+            return False
+
+        for test in self.tests:
+            if not test(node):
+                return False
+
+        return True
+
+class _Selector(object):
+    """ Compound selectors with the combinators between them. Nodes are
+    matched right to left, the last compound against the node and the others
+    against its ancestors.
+
+    """
+
+    def __init__(self, compounds, combinators):
+        self.compounds = compounds
+        self.combinators = combinators
+        self.subject = compounds[-1]
+
+    def matches(self, node, path):
+        if not self.subject.matches(node):
+            return False
+
+        if not self.combinators:
+            return True
+
+        ancestors = [parent for parent in reversed(path)
+                     if isinstance(type(parent), MetaNode)]
+
+        return self._match_ancestors(len(self.compounds) - 2, ancestors, 0)
+
+    def _match_ancestors(self, k, ancestors, start):
+        if k < 0:
+            return True
+
+        compound = self.compounds[k]
+
+        if self.combinators[k] == '>':
+            return (start < len(ancestors) and
+                    compound.matches(ancestors[start]) and
+                    self._match_ancestors(k - 1, ancestors, start + 1))
+
+        for i in range(start, len(ancestors)):
+            if (compound.matches(ancestors[i]) and
+                    self._match_ancestors(k - 1, ancestors, i + 1)):
+                return True
+
+        return False
+
+# ------------------------------------------------------------------------------
+# ---- Pruning ----
+
+# Node types whose subtrees can only hold nodes of the given types, by the
+# grammar. Walks do not descend into them when looking for other types.
+_closed_subtrees = [
+    (tree.Type, (tree.Type, tree.TypeArgument)),
+    (tree.TypeArgument, (tree.Type, tree.TypeArgument)),
+    (tree.TypeParameter, (tree.Type, tree.TypeArgument)),
+    (tree.Import, ()),
+]
+
+def _may_contain(contained_types, node_type):
+    for contained in contained_types:
+        if issubclass(contained, node_type) or issubclass(node_type, contained):
+            return True
+
+    return False
+
+# ------------------------------------------------------------------------------
+# ---- Queries ----
+
+class Query(object):
+    """ A compiled query, see the selector syntax above. A query may be used
+    for any number of trees.
+
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.selectors = _parse(selector)
+
+        subjects = [s.subject.node_type for s in self.selectors]
+
+        self.pruned = tuple(node_type for node_type, contained in _closed_subtrees
+                            if not any(_may_contain(contained, subject)
+                                       for subject in subjects))
+
+        # Node class to whether the walk descends into its instances
+        self.descend = dict()
+
+        self.required = [[compound.node_type for compound in s.compounds]
+                         for s in self.selectors]
+
+    def __repr__(self):
+        return 'Query(%r)' % (self.selector,)
+
+    def matches(self, node, path=()):
+        """ Returns whether the node, with the enclosing path given by walk_tree,
+        is matched by the query.
+
+        """
+
+        for selector in self.selectors:
+            if selector.matches(node, path):
+                return True
+
+        return False
+
+    def select(self, root):
+        """ Generates the (path, node) pairs of walk_tree(root) matched by the
+        query. Uses the root's NodeIndex, if it has one.
+
+        """
+
+        index = getattr(root, '_index', None)
+
+        if index is not None and index.root is root:
+            return self._select_indexed(index)
+
+        return self._select_walk(root)
+
+    def first(self, root):
+        """ Returns the first matching node, or None """
+
+        for _, node in self.select(root):
+            return node
+
+        return None
+
+    def _select_indexed(self, index):
+        selectors = [selector for selector, required in zip(self.selectors, self.required)
+                     if all(index.count(node_type) for node_type in required)]
+
+        if len(selectors) == 1:
+            selector = selectors[0]
+
+            for path, node in index.get(selector.subject.node_type):
+                if selector.matches(node, path):
+                    yield path, node
+
+        elif selectors:
+            matched = set()
+
+            for selector in selectors:
+                for path, node in index.get(selector.subject.node_type):
+                    if selector.matches(node, path):
+                        matched.add(id(node))
+
+            for path, node in index.get(Node):
+                if id(node) in matched:
+                    yield path, node
+
+    def _descends(self, node_type):
+        descend = self.descend.get(node_type)
+
+        if descend is None:
+            descend = self.descend[node_type] = not issubclass(node_type, self.pruned)
+
+        return descend
+
+    def _select_walk(self, root):
+        # As walk_tree, but does not descend into pruned subtrees
+        descend = self.descend
+        matches = self.matches
+
+        if isinstance(root, Node):
+            if matches(root, ()):
+                yield (), root
+            stack = [(iter(root._children()), (root,))]
+        else:
+            stack = [(iter(root), (root,))]
+
+        while stack:
+            children, path = stack[-1]
+
+            for child in children:
+                node_type = type(child)
+
+                if isinstance(node_type, MetaNode):
+                    if matches(child, path):
+                        yield path, child
+
+                    descends = descend.get(node_type)
+                    if descends is None:
+                        descends = self._descends(node_type)
+
+                    if descends:
+                        stack.append((iter(child._children()), path + (child,)))
+                        break
+                elif isinstance(child, (list, tuple)):
+                    stack.append((iter(child), path + (child,)))
+                    break
+            else:
+                stack.pop()
+
+
+# Recently compiled queries, for select()
+_queries = dict()
+_max_queries = 256
+
+def compile(selector):
+    """ Compiles a selector into a Query, raising QuerySyntaxError if it is
+    invalid.
+
+    """
+
+    return Query(selector)
+
+def select(selector, root):
+    """ Generates the (path, node) pairs of the tree matched by the selector,
+    reusing recently compiled queries.
+
+    """
+
+    query = _queries.get(selector)
+
+    if query is None:
+        if len(_queries) >= _max_queries:
+            _queries.clear()
+        query = _queries[selector] = Query(selector)
+
+    return query.select(root)
@@ -0,0 +1,507 @@
+""" Compact binary serialization of syntax trees.
+
+A serialized tree consists of a header, a string table, a table of node types,
+an offset table and the node records,
+
+    magic        b'JLAST' followed by a one byte format version
+    counts       varints: number of strings, types and nodes
+    strings      for each string, a varint byte length and its UTF-8 encoding
+    types        for each type, the string index of its registry name
+    offsets      for each node, a four byte little-endian offset of its record
+                 relative to the start of the records
+    records      for each node, its type index, a flags byte, its position
+                 (two varints, if flagged), its declared attribute values in
+                 order and its undeclared attributes as (name, value) pairs
+                 preceded by their number (if flagged)
+
+Node 0 is the root of the tree. Values are encoded as a one byte tag followed
+by the tag's payload. References to nodes are varint node indexes, so every
+node is stored once even when it is referenced from several places. Tokens
+the parser leaves in the tree are stored as the name of their class, their
+value and their position. Any other value is rejected, so that loading a tree
+never executes code. The fixed size offsets allow any node to be decoded
+without decoding the rest of the file, which is how TreeReader loads subtrees
+on demand.
+
+"""
+
+import mmap
+import struct
+
+import six
+
+from .ast import Node, MetaNode
+from . import tokenizer
+from .tokenizer import JavaToken, Position
+
+# Registers the node types of javalang.tree
+from . import tree
+
+
+MAGIC = b'JLAST'
+FORMAT_VERSION = 2
+
+HEADER = MAGIC + struct.pack('<B', FORMAT_VERSION)
+
+# Value tags
+NONE = 0
+TRUE = 1
+FALSE = 2
+INT = 3
+STRING = 4
+LIST = 5
+SET = 6
+TUPLE = 7
+NODE = 8
+POSITION = 9
+TOKEN = 10
+
+# Record flags
+HAS_POSITION = 1
+HAS_EXTRAS = 2
+
+_offset = struct.Struct('<I')
+
+
+class SerializationError(Exception):
+    pass
+
+# ------------------------------------------------------------------------------
+# ---- Encoding ----
+
+def _write_varint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _extra_attrs(node):
+    """ Returns the names of attributes set on a node which are not declared
+    by its class, such as the operators and selectors the parser adds to
+    parenthesized expressions.
+
+    """
+
+    return [name for name in node.extra_attrs if hasattr(node, name)]
+
+
+class Encoder(object):
+    def __init__(self):
+        self.strings = dict()
+        self.types = dict()
+        self.nodes = dict()
+        self.queue = list()
+
+    def string_index(self, s):
+        if isinstance(s, six.binary_type):
+            s = s.decode('utf-8')
+
+        index = self.strings.get(s)
+        if index is None:
+            index = len(self.strings)
+            self.strings[s] = index
+        return index
+
+    def type_index(self, cls):
+        index = self.types.get(cls)
+        if index is None:
+            if MetaNode.registry.get(cls.registry_name) is not cls:
+                raise SerializationError('Unregistered node type %s' % (cls,))
+            index = len(self.types)
+            self.types[cls] = index
+        return index
+
+    def node_index(self, node):
+        index = self.nodes.get(id(node))
+        if index is None:
+            index = len(self.queue)
+            self.nodes[id(node)] = index
+            self.queue.append(node)
+        return index
+
+    def write_value(self, out, value):
+        if value is None:
+            out.append(NONE)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, Node):
+            out.append(NODE)
+            _write_varint(out, self.node_index(value))
+        elif isinstance(value, six.string_types):
+            out.append(STRING)
+            _write_varint(out, self.string_index(value))
+        elif isinstance(value, list):
+            out.append(LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.write_value(out, item)
+        elif isinstance(value, Position):
+            out.append(POSITION)
+            _write_varint(out, value.line)
+            _write_varint(out, value.column)
+        elif isinstance(value, (set, frozenset)):
+            out.append(SET)
+            _write_varint(out, len(value))
+            for item in sorted(value):
+                self.write_value(out, item)
+        elif isinstance(value, tuple):
+            out.append(TUPLE)
+            _write_varint(out, len(value))
+            for item in value:
+                self.write_value(out, item)
+        elif isinstance(value, six.integer_types):
+            out.append(INT)
+            # Zig-zag encode so small negative numbers stay short
+            _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+        elif isinstance(value, JavaToken):
+            name = type(value).__name__
+            if _token_type(name) is not type(value):
+                raise SerializationError('Unknown token type %s' % (type(value),))
+            out.append(TOKEN)
+            _write_varint(out, self.string_index(name))
+            self.write_value(out, value.value)
+            self.write_value(out, value.position)
+        else:
+            raise SerializationError('Can not serialize %s' % (type(value),))
+
+    def write_record(self, out, node):
+        position = getattr(node, '_position', None)
+        extras = _extra_attrs(node)
+
+        flags = 0
+        if position is not None:
+            flags |= HAS_POSITION
+        if extras:
+            flags |= HAS_EXTRAS
+
+        _write_varint(out, self.type_index(type(node)))
+        out.append(flags)
+
+        if position is not None:
+            _write_varint(out, position[0])
+            _write_varint(out, position[1])
+
+        for attr in node.attrs:
+            self.write_value(out, getattr(node, attr))
+
+        if extras:
+            _write_varint(out, len(extras))
+            for name in extras:
+                _write_varint(out, self.string_index(name))
+                self.write_value(out, getattr(node, name))
+
+    def encode(self, root):
+        if not isinstance(root, Node):
+            raise SerializationError('Expected a Node, got %s' % (type(root),))
+
+        records = bytearray()
+        offsets = list()
+
+        self.node_index(root)
+
+        # The queue grows as records reference new nodes
+        i = 0
+        while i < len(self.queue):
+            offsets.append(len(records))
+            self.write_record(records, self.queue[i])
+            i += 1
+
+        # Type names are added to the string table last
+        type_names = [None] * len(self.types)
+        for cls, index in self.types.items():
+            type_names[index] = self.string_index(cls.registry_name)
+
+        strings = [None] * len(self.strings)
+        for s, index in self.strings.items():
+            strings[index] = s.encode('utf-8')
+
+        out = bytearray(HEADER)
+        _write_varint(out, len(strings))
+        _write_varint(out, len(type_names))
+        _write_varint(out, len(offsets))
+
+        for s in strings:
+            _write_varint(out, len(s))
+            out.extend(s)
+
+        for index in type_names:
+            _write_varint(out, index)
+
+        for offset in offsets:
+            out.extend(_offset.pack(offset))
+
+        out.extend(records)
+
+        return bytes(out)
+
+def dumps(root):
+    """ Serializes the tree rooted at the given node to bytes """
+
+    return Encoder().encode(root)
+
+def dump(root, file):
+    file.write(dumps(root))
+
+# ------------------------------------------------------------------------------
+# ---- Decoding ----
+
+class TreeReader(object):
+    """ Decodes nodes from a serialized tree held in a bytes-like object or an
+    mmap. Only the header, string table and type table are decoded up front.
+    Nodes are decoded individually or as whole subtrees on request.
+
+    """
+
+    def __init__(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise SerializationError('Not a serialized tree')
+
+        version = six.indexbytes(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise SerializationError('Unsupported format version %d' % (version,))
+
+        self.data = data
+        self.i = len(HEADER)
+
+        string_count = self.read_varint()
+        type_count = self.read_varint()
+        self.node_count = self.read_varint()
+
+        self.strings = list()
+        for _ in range(string_count):
+            length = self.read_varint()
+            self.strings.append(data[self.i:self.i + length].decode('utf-8'))
+            self.i += length
+
+        self.types = list()
+        for _ in range(type_count):
+            self.types.append(_lookup_type(self.strings[self.read_varint()]))
+
+        self.offsets_start = self.i
+        self.records_start = self.i + _offset.size * self.node_count
+
+    @classmethod
+    def open(cls, path):
+        """ Returns a reader for the serialized tree in the given file, mapped
+        into memory rather than read.
+
+        """
+
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(data)
+
+    def __len__(self):
+        return self.node_count
+
+    def read_varint(self):
+        data = self.data
+        i = self.i
+        shift = 0
+        value = 0
+
+        while True:
+            b = six.indexbytes(data, i)
+            i += 1
+            value |= (b & 0x7f) << shift
+            if b < 0x80:
+                break
+            shift += 7
+
+        self.i = i
+        return value
+
+    def seek(self, index):
+        if not 0 <= index < self.node_count:
+            raise IndexError('Node index out of range')
+
+        start = self.offsets_start + _offset.size * index
+        offset, = _offset.unpack(self.data[start:start + _offset.size])
+        self.i = self.records_start + offset
+
+    def type_index(self, index):
+        self.seek(index)
+        return self.read_varint()
+
+    def node_type(self, index):
+        """ Returns the class of the node with the given index """
+
+        return self.types[self.type_index(index)]
+
+    def find(self, node_type):
+        """ Returns the indexes of all nodes which are instances of node_type,
+        without decoding them.
+
+        """
+
+        matching = set(i for i, cls in enumerate(self.types)
+                       if issubclass(cls, node_type))
+
+        return [index for index in range(self.node_count)
+                if self.type_index(index) in matching]
+
+    def read_value(self):
+        data = self.data
+        i = self.i
+        tag = six.indexbytes(data, i)
+
+        if tag == NODE or tag == STRING:
+            # Inline the common case of a single byte varint
+            b = six.indexbytes(data, i + 1)
+            if b < 0x80:
+                self.i = i + 2
+            else:
+                self.i = i + 1
+                b = self.read_varint()
+
+            if tag == NODE:
+                return self.resolve(b)
+            else:
+                return self.strings[b]
+
+        self.i = i + 1
+
+        if tag == NONE:
+            return None
+        elif tag == LIST:
+            return [self.read_value() for _ in range(self.read_varint())]
+        elif tag == TRUE:
+            return True
+        elif tag == FALSE:
+            return False
+        elif tag == SET:
+            return set(self.read_value() for _ in range(self.read_varint()))
+        elif tag == POSITION:
+            line = self.read_varint()
+            return Position(line, self.read_varint())
+        elif tag == TUPLE:
+            return tuple(self.read_value() for _ in range(self.read_varint()))
+        elif tag == INT:
+            value = self.read_varint()
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        elif tag == TOKEN:
+            cls = _token_type(self.strings[self.read_varint()])
+            value = self.read_value()
+            return cls(value, self.read_value())
+        else:
+            raise SerializationError('Invalid value tag %d' % (tag,))
+
+    def node_ref(self, index):
+        """ Returns the node with the given index, creating an empty instance
+        and scheduling it to be filled if it has not been seen before.
+
+        """
+
+        node = self.nodes.get(index)
+
+        if node is None:
+            i = self.i
+            cls = self.node_type(index)
+            self.i = i
+
+            node = cls.__new__(cls)
+            self.nodes[index] = node
+            self.pending.append(index)
+
+        return node
+
+    def fill(self, node):
+        """ Reads the record at the current position into the given node """
+
+        self.read_varint()
+        flags = six.indexbytes(self.data, self.i)
+        self.i += 1
+
+        if flags & HAS_POSITION:
+            line = self.read_varint()
+            node._position = Position(line, self.read_varint())
+
+        read_value = self.read_value
+        for attr in node.attrs:
+            setattr(node, attr, read_value())
+
+        if flags & HAS_EXTRAS:
+            for _ in range(self.read_varint()):
+                name = self.strings[self.read_varint()]
+                setattr(node, name, read_value())
+
+    def load(self, index=0):
+        """ Decodes and returns the subtree rooted at the node with the given
+        index. Index 0 is the root of the serialized tree.
+
+        """
+
+        self.nodes = dict()
+        self.pending = list()
+        self.resolve = self.node_ref
+
+        try:
+            root = self.node_ref(index)
+
+            while self.pending:
+                index = self.pending.pop()
+                self.seek(index)
+                self.fill(self.nodes[index])
+        finally:
+            self.nodes = self.pending = self.resolve = None
+
+        return root
+
+    def load_all(self):
+        """ Decodes every node, returning the root. This is faster than load()
+        when the whole tree is needed since records are read in order.
+
+        """
+
+        nodes = list()
+        for index in range(self.node_count):
+            cls = self.node_type(index)
+            nodes.append(cls.__new__(cls))
+
+        self.resolve = nodes.__getitem__
+
+        try:
+            self.i = self.records_start
+            for node in nodes:
+                self.fill(node)
+        finally:
+            self.resolve = None
+
+        return nodes[0]
+
+def _lookup_type(name):
+    cls = MetaNode.registry.get(name)
+
+    if cls is None:
+        # Node classes defined outside of javalang.tree are registered when
+        # their module is imported
+        module, _, _ = name.rpartition('.')
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+        cls = MetaNode.registry.get(name)
+
+    if cls is None:
+        raise SerializationError('Unknown node type %s' % (name,))
+
+    return cls
+
+def _token_type(name):
+    cls = getattr(tokenizer, name, None)
+
+    if not (isinstance(cls, type) and issubclass(cls, JavaToken)):
+        raise SerializationError('Unknown token type %s' % (name,))
+
+    return cls
+
+def loads(data):
+    """ Deserializes a tree from bytes produced by dumps() """
+
+    return TreeReader(data).load_all()
+
+def load(file):
+    return loads(file.read())
@@ -0,0 +1,88 @@
+""" Utilities shared by the tests """
+
+import os
+
+from .. import tokenizer
+from ..ast import Node
+
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), 'source')
+
+
+def dump(value):
+    """ Converts a tree into nested tuples which include node positions """
+
+    if isinstance(value, Node):
+        return (type(value).__name__, value.position,
+                tuple(dump(child) for child in value.children))
+    elif isinstance(value, (list, tuple)):
+        return [dump(item) for item in value]
+    elif isinstance(value, set):
+        return sorted(value)
+    elif isinstance(value, tokenizer.JavaToken):
+        return (type(value).__name__, value.value, value.position)
+    else:
+        return value
+
+
+def corpus():
+    for dirpath, _, filenames in os.walk(SOURCE_DIR):
+        for filename in sorted(filenames):
+            if filename.endswith('.java'):
+                with open(os.path.join(dirpath, filename)) as f:
+                    yield f.read()
+
+    statements = [
+        "int x = 1;",
+        "x = 1;",
+        "label: while (true) break label;",
+        "synchronized (lock) { foo(); }",
+        "final int[] x = {1};",
+        "@SuppressWarnings(\"unchecked\") final List<T> x = y;",
+        "@A.B(c = (1 + 2)) int x;",
+        "final class Local {}",
+        "abstract class Local {}",
+        "static class Local {}",
+        "enum E { A }",
+        "this.x = super.y;",
+        "super.foo();",
+        "new Foo<>().bar();",
+        "<T>foo();",
+        "void.class.getName();",
+        "String::length;",
+        "super::toString;",
+        "Foo.super::bar;",
+        "(x) -> x;",
+        "a < b;",
+        "a.b.c[0].d();",
+        "x++;",
+        "-x;",
+        "return;",
+    ]
+
+    for statement in statements:
+        yield "class T { void m() { %s } }" % (statement,)
+
+    members = [
+        "T() {}",
+        "T(int a) throws E {}",
+        "<X> T(X x) {}",
+        "<X> X m(X x) { return x; }",
+        "<X> void m() {}",
+        "void m() {}",
+        "int m()[] { return null; }",
+        "static {}",
+        "{}",
+        ";",
+        "static int x;",
+        "@interface A {}",
+        "@A void m() {}",
+        "class Inner {}",
+        "interface Inner {}",
+        "enum Inner { A, B }",
+        "T field;",
+        "T<X> field = null, other;",
+    ]
+
+    for member in members:
+        yield "class T { %s }" % (member,)
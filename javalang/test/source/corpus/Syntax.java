@@ -0,0 +1,243 @@
+/**
+ * Exercises most of the Java 8 syntax supported by javalang.
+ *
+ * @author javalang
+ */
+@Generated(value = "test", date = "today")
+package org.javalang.test.corpus;
+
+import java.util.*;
+import java.util.function.Function;
+import static java.lang.Math.max;
+import static java.util.Collections.*;
+
+/**
+ * A generic class.
+ *
+ * @param <T> the element type
+ */
+@SuppressWarnings({"unchecked", "rawtypes"})
+public abstract class Syntax<T extends Comparable<? super T> & Cloneable, U>
+        extends AbstractList<T> implements Iterable<T>, java.io.Serializable {
+
+    private static final long serialVersionUID = 1L;
+    protected int a, b[] = {1, 2}, c = 3;
+    final String[][] names = new String[2][];
+    volatile transient Map<String, List<Map.Entry<String, Integer>>> nested;
+    char ch = '\n', quote = '\'';
+    double d = 1.5e10, h = 0x1.8p1;
+    long big = 0xFFFF_FFFFL + 0b1010 + 017;
+
+    static {
+        System.out.println("static init");
+    }
+
+    {
+        a = 1;
+    }
+
+    ;
+
+    /** Constructor. */
+    public Syntax() {
+        this(0);
+    }
+
+    @Deprecated
+    Syntax(int x) throws IllegalArgumentException, java.io.IOException {
+        super();
+        this.a = x;
+    }
+
+    <V> Syntax(V v, T... rest) {
+        <V>this(0);
+    }
+
+    /**
+     * Returns something.
+     *
+     * @param index the index
+     * @return the element
+     * @throws IndexOutOfBoundsException when out of range
+     */
+    @Override
+    public T get(int index) {
+        return null;
+    }
+
+    public abstract int size();
+
+    int legacyArray()[] {
+        return new int[] {1, 2, 3};
+    }
+
+    public static <K, V extends Number> Map<K, V> generic(final K key, @Nullable V value) {
+        return Collections.<K, V>emptyMap();
+    }
+
+    synchronized void statements(int n) throws Exception {
+        int i = 0, j;
+        final int k = 1;
+        @SuppressWarnings("unused") List<String> list = new ArrayList<>();
+        String[] arr = {"a", "b"};
+
+        label:
+        for (i = 0, j = 10; i < j; i++, j--) {
+            if (i == 3) continue label;
+            else if (i > 5) break label;
+            else {
+                ;
+            }
+        }
+
+        for (String s : arr) {
+            list.add(s);
+        }
+
+        for (;;) {
+            break;
+        }
+
+        while (n-- > 0) n >>= 1;
+
+        do {
+            n += 2;
+        } while (n < 10);
+
+        switch (n) {
+            case 1:
+            case 2:
+                n++;
+                break;
+            case CONSTANT:
+                break;
+            default:
+                n = -n;
+        }
+
+        try {
+            throw new Exception("x");
+        } catch (IllegalStateException | IllegalArgumentException e) {
+            e.printStackTrace();
+        } catch (final Exception e) {
+            throw e;
+        } finally {
+            n = 0;
+        }
+
+        try (InputStream in = open(); final OutputStream out = open()) {
+            in.read();
+        }
+
+        synchronized (this) {
+            n = ~n ^ n | n & n;
+        }
+
+        assert n > 0 : "positive";
+        assert n != 0;
+
+        class Local {
+            int x;
+        }
+
+        Runnable r = new Runnable() {
+            @Override
+            public void run() {
+                System.out.println(Syntax.this.a);
+            }
+        };
+        r.run();
+    }
+
+    Object expressions(Object o, int[] values) {
+        int x = (int) 3.5 + (values[0] << 2) >> 1 >>> 3;
+        boolean flag = o instanceof String && !(x >= 3 || x <= 2);
+        x = flag ? x * 2 : x / 2 % 3;
+        x += -x + +x - --x + ++x;
+        Object y = ((Comparable) o).compareTo(null);
+        Class<?> cls = String.class;
+        Class<?> arrCls = int[].class;
+        Class<?> voidCls = void.class;
+        Class<?> objArrCls = Object[][].class;
+        Object inner = this.new Inner();
+        Object inner2 = outer.new <String>Inner("x");
+        String s = super.toString() + this.toString() + Syntax.super.hashCode();
+        values[x] = values[x + 1]++;
+        int[][] grid = new int[3][4];
+        long count = list.stream().filter(e -> e != null).map(String::valueOf).count();
+        Function<Integer, Integer> f = (Integer v) -> v + 1;
+        Function<Integer, Integer> g = v -> {
+            return v * 2;
+        };
+        BiFunction<Integer, Integer, Integer> h = (p, q) -> p + q;
+        Supplier<List<String>> sup = ArrayList::new;
+        Runnable noop = () -> {};
+        Object z = this.<String>convert("x").length();
+        return (o == null) ? new Object[] {null, "a"} : o;
+    }
+
+    private class Inner {
+        Inner() {}
+    }
+
+    static interface Visitor<R> extends Cloneable {
+        int CONSTANT = 1, OTHER[] = {};
+
+        R visit(Node node);
+
+        default void nothing() {}
+
+        <Q> Q generic(Q q);
+
+        void withThrows() throws Exception;
+
+        static void helper() {}
+
+        class Nested {}
+    }
+
+    enum Color implements Visitor<Object> {
+        /** Red. */
+        RED(255, 0, 0) {
+            @Override
+            public String toString() {
+                return "red";
+            }
+        },
+        @Deprecated GREEN,
+        BLUE();
+
+        private final int r;
+
+        Color() {
+            this(0, 0, 0);
+        }
+
+        Color(int r, int g, int b) {
+            this.r = r;
+        }
+
+        public Object visit(Node node) {
+            return null;
+        }
+    }
+
+    enum Empty {}
+
+    enum Trailing { A, B, ; }
+
+    @interface Annotation {
+        String value() default "";
+        int[] numbers() default {1, 2};
+        Class<?> type();
+        int CONSTANT = 3;
+        enum Kind { ONE }
+    }
+}
+
+interface Marker {}
+
+@FunctionalInterface
+interface Op<T> {
+    T apply(T left, T right);
+}
@@ -0,0 +1,568 @@
+import gc
+import operator
+import pickle
+import unittest
+
+from .. import ast, parse, tree
+
+from .helpers import dump, corpus
+
+
+class SlotsTest(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        for _, node in parse.parse(next(corpus())):
+            self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+
+    def test_slots_cover_attrs(self):
+        for cls in (tree.MethodDeclaration, tree.ClassDeclaration,
+                    tree.MethodInvocation, tree.LocalVariableDeclaration):
+            for attr in cls.attrs:
+                self.assertIn(attr, cls.all_slots)
+            self.assertIn('_position', cls.all_slots)
+            self.assertEqual(len(cls.all_slots), len(set(cls.all_slots)))
+
+    def test_undeclared_attribute(self):
+        node = tree.Literal(value='1')
+        self.assertRaises(AttributeError, setattr, node, 'parent', None)
+
+    def test_extra_slots(self):
+        expression = parse.parse_expression('(a + b).foo()')
+        self.assertEqual(expression.prefix_operators, [])
+        self.assertEqual(tree.BinaryOperation.extra_attrs,
+                         ('prefix_operators', 'postfix_operators', 'selectors'))
+        self.assertEqual(tree.MethodInvocation.extra_attrs, ())
+
+        method = parse.parse('@interface A { /** Doc */ int a(); }').types[0].body[0]
+        self.assertEqual(method.documentation, '/** Doc */')
+
+    def test_position(self):
+        node = tree.Literal(value='1')
+        self.assertIsNone(node.position)
+
+    def test_subclass(self):
+        class Custom(tree.Literal):
+            attrs = ('extra',)
+
+        node = Custom(value='1', extra=2)
+        self.assertEqual((node.value, node.extra), ('1', 2))
+        self.assertFalse(hasattr(node, '__dict__'))
+
+
+class ConstructorTest(unittest.TestCase):
+
+    def test_keyword_arguments(self):
+        node = tree.MethodInvocation(member='foo', arguments=[])
+        self.assertEqual(node.member, 'foo')
+        self.assertEqual(node.arguments, [])
+        self.assertIsNone(node.qualifier)
+
+    def test_positional_arguments(self):
+        node = tree.Import('a.b', True)
+        self.assertEqual((node.path, node.static, node.wildcard), ('a.b', True, None))
+
+    def test_extraneous_arguments(self):
+        self.assertRaises(ValueError, tree.Literal, value='1', foo=2)
+        self.assertRaises(TypeError, tree.Import, 1, 2, 3, 4)
+
+    def test_custom_constructor(self):
+        class Custom(tree.Literal):
+            attrs = ()
+
+            def __init__(self, value):
+                super(Custom, self).__init__(value=value.upper())
+
+        class Derived(Custom):
+            attrs = ()
+
+        self.assertEqual(Derived('a').value, 'A')
+
+    def test_generic_constructor(self):
+        # Attrs which can not be argument names fall back to Node.__init__
+        Generic = type('Generic', (tree.Node,), {'attrs': ('kwargs',), '__module__': __name__})
+        self.assertEqual(Generic(kwargs=1).kwargs, 1)
+        self.assertRaises(ValueError, Generic, other=1)
+
+
+class ChildrenTest(unittest.TestCase):
+
+    def test_children(self):
+        for _, node in parse.parse(next(corpus())):
+            expected = [getattr(node, attr) for attr in node.attrs]
+            self.assertEqual(node.children, expected)
+            self.assertEqual(node._children(), tuple(expected))
+
+    def test_reflects_assignment(self):
+        node = tree.MethodInvocation(member='foo')
+        node._children()
+        node.member = 'bar'
+
+        self.assertIn('bar', node._children())
+        self.assertIn('bar', node.children)
+
+    def test_generic_children(self):
+        Generic = type('Generic', (tree.Node,), {'attrs': ('kwargs', 'a'), '__module__': __name__})
+        self.assertEqual(Generic(kwargs=1, a=2).children, [1, 2])
+
+
+def recursive_walk_tree(root):
+    # walk_tree as it was originally written
+    if isinstance(root, tree.Node):
+        yield (), root
+        children = root.children
+    else:
+        children = root
+
+    for child in children:
+        if isinstance(child, (tree.Node, list, tuple)):
+            for path, node in recursive_walk_tree(child):
+                yield (root,) + path, node
+
+
+class WalkTest(unittest.TestCase):
+
+    def roots(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            yield unit
+            yield unit.types
+
+    def test_walk_tree(self):
+        for root in self.roots():
+            expected = list(recursive_walk_tree(root))
+            actual = list(ast.walk_tree(root))
+
+            self.assertEqual(len(actual), len(expected))
+            for (path, node), (expected_path, expected_node) in zip(actual, expected):
+                self.assertIs(node, expected_node)
+                self.assertEqual(len(path), len(expected_path))
+                for a, b in zip(path, expected_path):
+                    self.assertIs(a, b)
+
+    def test_iter(self):
+        unit = parse.parse(next(corpus()))
+        self.assertEqual([node for _, node in unit],
+                         [node for _, node in recursive_walk_tree(unit)])
+
+    def test_walk_nodes(self):
+        for root in self.roots():
+            self.assertEqual(list(ast.walk_nodes(root)),
+                             [node for _, node in ast.walk_tree(root)])
+
+    def test_walk_ancestors(self):
+        for root in self.roots():
+            expected = list(ast.walk_tree(root))
+            actual = [(tuple(view), node) for view, node in ast.walk_ancestors(root)]
+            self.assertEqual(actual, expected)
+
+    def test_ancestor_view(self):
+        unit = parse.parse('class A { void m() {} }')
+        for view, node in ast.walk_ancestors(unit):
+            if isinstance(node, tree.MethodDeclaration):
+                self.assertIs(view[0], unit)
+                self.assertIs(view[-1], unit.types[0].body)
+                self.assertEqual(view[:1], (unit,))
+                self.assertEqual(len(view), 4)
+                self.assertRaises(TypeError, operator.setitem, view, 0, None)
+
+    def test_deep_tree(self):
+        expression = tree.Literal(value='1')
+        for _ in range(5000):
+            expression = tree.BinaryOperation(operator='+', operandl=expression,
+                                              operandr=tree.Literal(value='1'))
+
+        self.assertEqual(sum(1 for _ in ast.walk_nodes(expression)), 10001)
+        self.assertEqual(max(len(path) for path, _ in ast.walk_tree(expression)), 5000)
+
+
+class IndexTest(unittest.TestCase):
+
+    node_types = (tree.Node, tree.Statement, tree.Expression, tree.Primary,
+                  tree.Declaration, tree.Documented, tree.MethodInvocation,
+                  tree.ClassCreator, tree.Literal, tree.LambdaExpression)
+
+    def test_filter(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            expected = [list(unit.filter(node_type)) for node_type in self.node_types]
+
+            index = unit.build_index()
+            for node_type, pairs in zip(self.node_types, expected):
+                self.assertEqual(list(unit.filter(node_type)), pairs)
+                self.assertEqual(index.count(node_type), len(pairs))
+
+    def test_missing_type(self):
+        unit = parse.parse('class A {}')
+        index = unit.build_index()
+
+        self.assertNotIn(tree.MethodInvocation, index)
+        self.assertEqual(list(unit.filter(tree.MethodInvocation)), [])
+
+    def test_drop_index(self):
+        unit = parse.parse('class A {}')
+        unit.build_index()
+        unit.types.append(tree.ClassDeclaration(name='B', body=[]))
+
+        self.assertEqual(len(list(unit.filter(tree.ClassDeclaration))), 1)
+        unit.drop_index()
+        self.assertEqual(len(list(unit.filter(tree.ClassDeclaration))), 2)
+
+    def test_not_pickled(self):
+        unit = parse.parse('class A {}')
+        unit.build_index()
+
+        self.assertNotIn('_index', unit.__getstate__())
+        self.assertIsNone(getattr(pickle.loads(pickle.dumps(unit)), '_index', None))
+
+
+class NavigationTest(unittest.TestCase):
+
+    def test_parents(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            ast.link_parents(unit)
+
+            self.assertIsNone(unit.parent)
+            for path, node in ast.walk_tree(unit):
+                if not path:
+                    continue
+
+                nodes = [item for item in path if isinstance(item, tree.Node)]
+                self.assertIs(node.parent, nodes[-1])
+                self.assertEqual(list(node.ancestors()), nodes[::-1])
+
+    def test_attr_and_index(self):
+        unit = parse.parse('class A { int a; void m() {} void n() {} }')
+        ast.link_parents(unit)
+        declaration = unit.types[0]
+        field, m, n = declaration.body
+
+        self.assertEqual(declaration.parent_attr, 'types')
+        self.assertEqual(field.parent_attr, 'body')
+        self.assertEqual(m.parent_index, 1)
+        self.assertEqual(field.type.parent_attr, 'type')
+        self.assertIsNone(field.type.parent_index)
+
+        self.assertIs(m.next_sibling, n)
+        self.assertIs(m.previous_sibling, field)
+        self.assertIsNone(n.next_sibling)
+        self.assertIsNone(field.previous_sibling)
+        self.assertIsNone(field.type.next_sibling)
+
+    def test_enclosing(self):
+        unit = parse.parse('class A { void m() { class B { int f() { return 1; } } } }')
+        ast.link_parents(unit)
+        _, literal = next(unit.filter(tree.Literal))
+
+        self.assertEqual(literal.enclosing(tree.MethodDeclaration).name, 'f')
+        self.assertEqual(literal.enclosing(tree.ClassDeclaration).name, 'B')
+        self.assertIs(literal.enclosing(tree.CompilationUnit), unit)
+        self.assertIsNone(literal.enclosing(tree.LambdaExpression))
+
+    def test_unlinked(self):
+        node = parse.parse_expression('a + 1')
+        self.assertIsNone(node.operandl.parent)
+        self.assertIsNone(node.operandl.parent_attr)
+        self.assertIsNone(node.operandl.next_sibling)
+        self.assertIsNone(node.operandl.enclosing(tree.Node))
+
+    def test_weak_parent(self):
+        unit = parse.parse('class A { void m() {} }')
+        ast.link_parents(unit)
+        method = unit.types[0].body[0]
+
+        del unit
+        gc.collect()
+        self.assertIsNone(method.parent)
+
+    def test_not_pickled(self):
+        unit = parse.parse('class A { void m() {} }')
+        ast.link_parents(unit)
+
+        loaded = pickle.loads(pickle.dumps(unit))
+        self.assertIsNone(loaded.types[0].parent)
+
+
+class CountingVisitor(ast.NodeVisitor):
+
+    def __init__(self):
+        self.counts = dict()
+
+    def count(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def visit_Statement(self, node):
+        self.count('Statement')
+        self.generic_visit(node)
+
+    def visit_ReturnStatement(self, node):
+        self.count('ReturnStatement')
+        self.generic_visit(node)
+
+    def visit_Literal(self, node):
+        self.count('Literal')
+
+    def visit_LambdaExpression(self, node):
+        # Prunes the lambda's body
+        self.count('LambdaExpression')
+
+
+class VisitorTest(unittest.TestCase):
+
+    def test_visits_every_node(self):
+        class Visitor(ast.NodeVisitor):
+            def __init__(self):
+                self.nodes = list()
+
+            def visit_Node(self, node):
+                self.nodes.append(node)
+                self.generic_visit(node)
+
+        for source in corpus():
+            unit = parse.parse(source)
+            visitor = Visitor()
+            visitor.visit(unit)
+            self.assertEqual(visitor.nodes, list(ast.walk_nodes(unit)))
+
+    def test_dispatch(self):
+        unit = parse.parse("""
+            class A {
+                int m() {
+                    foo(1);
+                    Runnable r = () -> { return 2; };
+                    return 3;
+                }
+            }
+        """)
+        visitor = CountingVisitor()
+        visitor.visit(unit)
+
+        self.assertEqual(visitor.counts, {'Statement': 1, 'ReturnStatement': 1,
+                                          'Literal': 2, 'LambdaExpression': 1})
+
+    def test_dispatch_table(self):
+        CountingVisitor().visit(parse.parse('class A { int a = 1; }'))
+        table = ast._dispatch_tables[CountingVisitor]
+
+        self.assertEqual(table[tree.Literal], CountingVisitor.visit_Literal)
+        self.assertEqual(table[tree.ClassDeclaration], CountingVisitor.generic_visit)
+
+    def test_return_value(self):
+        class Visitor(ast.NodeVisitor):
+            def visit_Literal(self, node):
+                return node.value
+
+        self.assertEqual(Visitor().visit(parse.parse_expression('1')), '1')
+
+    def test_deep_tree(self):
+        unit = parse.parse('class T { int x = %s; }' % ' + '.join(['a'] * 5000))
+
+        class Visitor(ast.NodeVisitor):
+            def __init__(self):
+                self.members = list()
+
+            def visit_MemberReference(self, node):
+                self.members.append(node.member)
+
+        visitor = Visitor()
+        visitor.visit(unit)
+        self.assertEqual(len(visitor.members), 5000)
+        ast.NodeVisitor().visit(unit)
+
+        # Handlers calling generic_visit nest, as documented
+        class Nesting(ast.NodeVisitor):
+            def visit_Node(self, node):
+                self.generic_visit(node)
+
+        self.assertRaises(RuntimeError, Nesting().visit, unit)
+
+    def test_overridden_visit(self):
+        class Visitor(ast.NodeVisitor):
+            def __init__(self):
+                self.nodes = list()
+
+            def visit(self, node):
+                self.nodes.append(node)
+                return ast.NodeVisitor.visit(self, node)
+
+        unit = parse.parse('class A { int m() { return a + 1; } }')
+        visitor = Visitor()
+        visitor.visit(unit)
+
+        self.assertEqual(visitor.nodes, list(ast.walk_nodes(unit)))
+
+
+class TransformerTest(unittest.TestCase):
+
+    def test_replace(self):
+        class Transformer(ast.NodeTransformer):
+            def visit_Literal(self, node):
+                return tree.Literal(value=str(int(node.value) * 2))
+
+        expression = parse.parse_expression('a + 1 * 2')
+        result = Transformer().visit(expression)
+
+        self.assertIs(result, expression)
+        self.assertEqual(expression.operandr.operandl.value, '2')
+        self.assertEqual(expression.operandr.operandr.value, '4')
+
+    def test_remove_and_expand(self):
+        class Transformer(ast.NodeTransformer):
+            def visit_FieldDeclaration(self, node):
+                if node.declarators[0].name == 'a':
+                    return None
+                return [node, tree.FieldDeclaration(type=node.type, declarators=[])]
+
+        unit = parse.parse('class A { int a; int b; void m() {} }')
+        body = unit.types[0].body
+        Transformer().visit(unit)
+
+        self.assertIs(unit.types[0].body, body)
+        self.assertEqual([type(node).__name__ for node in body],
+                         ['FieldDeclaration', 'FieldDeclaration', 'MethodDeclaration'])
+        self.assertEqual(body[0].declarators[0].name, 'b')
+
+
+class EqualityTest(unittest.TestCase):
+
+    def test_equal_trees(self):
+        for source in corpus():
+            a = parse.parse(source)
+            b = parse.parse(source)
+
+            self.assertIsNot(a, b)
+            self.assertEqual(a, b)
+            self.assertFalse(a != b)
+            self.assertEqual(hash(a), hash(b))
+
+    def test_different_trees(self):
+        a = parse.parse_expression('a + 1')
+        b = parse.parse_expression('a + 2')
+        c = parse.parse_expression('a - 1')
+
+        self.assertNotEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertNotEqual(a.operandr, a.operandl)
+        self.assertNotEqual(a, 'a + 1')
+
+    def test_extra_attrs(self):
+        plain = parse.parse_expression('(a + b)')
+
+        for source in ('-(a + b)', '(a + b).foo()', '(a + b)++'):
+            other = parse.parse_expression(source)
+            self.assertNotEqual(other, plain)
+            self.assertNotEqual(hash(other), hash(plain))
+
+        # Unset extra attrs are equal to the empty ones the parser sets
+        built = tree.BinaryOperation(operator='+', operandl=plain.operandl,
+                                     operandr=plain.operandr)
+        self.assertEqual(built, plain)
+        self.assertEqual(hash(built), hash(plain))
+
+    def test_positions(self):
+        a = parse.parse('class A { void m() { foo(); } }')
+        b = parse.parse('class A {\n    void m() {\n        foo();\n    }\n}')
+
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertFalse(a.equals(b, positions=True))
+        self.assertNotEqual(a.structural_hash(positions=True),
+                            b.structural_hash(positions=True))
+
+    def test_documentation(self):
+        a = parse.parse('class A { /** One */ void m() {} }').types[0].body[0]
+        b = parse.parse('class A { /** Two */ void m() {} }').types[0].body[0]
+
+        self.assertNotEqual(a, b)
+        self.assertTrue(a.equals(b, documentation=False))
+        self.assertEqual(a.structural_hash(documentation=False),
+                         b.structural_hash(documentation=False))
+
+    def test_duplicate_bodies(self):
+        unit = parse.parse("""
+            class A {
+                int a() { int x = 1; return x + 1; }
+                int b() { return 2; }
+                int c() { int x = 1; return x + 1; }
+            }
+        """)
+
+        bodies = dict()
+        for _, method in unit.filter(tree.MethodDeclaration):
+            key = tuple(method.body)
+            bodies.setdefault(tree.BlockStatement(statements=list(key)), []).append(method.name)
+
+        self.assertEqual(sorted(bodies.values()), [['a', 'c'], ['b']])
+
+    def test_cached_hash(self):
+        expression = parse.parse_expression('a + 1')
+        value = hash(expression)
+
+        self.assertEqual(expression._hash, ((False, True), value))
+        self.assertIsNotNone(expression.operandl._hash)
+
+    def test_modified_after_hashing(self):
+        class Transformer(ast.NodeTransformer):
+            def visit_Literal(self, node):
+                return parse.parse_expression('1')
+
+        a = parse.parse_expression('a + 1')
+        b = parse.parse_expression('a + 2')
+        self.assertNotEqual(hash(a), hash(b))
+
+        Transformer().visit(b)
+        self.assertEqual(a, b)
+        self.assertTrue(a.equals(b))
+
+    def test_filter_pattern(self):
+        unit = parse.parse('class A { void m() { foo(1); bar(1); foo(2); } }')
+        pattern = parse.parse_expression('1')
+
+        self.assertEqual(len(list(unit.filter(pattern))), 2)
+
+    def test_tokens(self):
+        a = parse.parse_expression('super::foo')
+        b = parse.parse_expression('super::foo')
+
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, parse.parse_expression('super::bar'))
+
+    def test_deep_tree(self):
+        source = 'class T { int x = %s; }' % ' + '.join(['a'] * 800)
+        a = parse.parse(source)
+        b = parse.parse(source)
+        c = parse.parse(source.replace('a;', 'b;'))
+
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+        self.assertFalse(parse.parse(source).equals(parse.parse(source.replace('a;', 'b;'))))
+
+
+class PickleTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                self.assertEqual(dump(pickle.loads(pickle.dumps(unit, protocol))),
+                                 dump(unit))
+
+    def test_dict_state(self):
+        # State of a node pickled before nodes were slotted
+        node = tree.Literal.__new__(tree.Literal)
+        node.__setstate__({'value': '1', '_position': (1, 2)})
+
+        self.assertEqual(node.value, '1')
+        self.assertEqual(node.position, (1, 2))
+
+    def test_unset_slots(self):
+        node = pickle.loads(pickle.dumps(tree.Literal(value='1')))
+        self.assertIsNone(node.position)
+        self.assertIsNone(node.prefix_operators)
+
+
+if __name__ == "__main__":
+    unittest.main()
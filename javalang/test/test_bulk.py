@@ -0,0 +1,83 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from .. import bulk, parser, tree
+
+
+def process_id(path, data):
+    return os.getpid()
+
+
+class ParsePathsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+
+        for i in range(10):
+            self.paths.append(self.write('Class%d.java' % (i,),
+                                         'class Class%d { int x = %d; }' % (i, i)))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, source):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+
+    def test_ordered(self):
+        results = list(bulk.parse_paths(self.paths, workers=2, chunksize=3))
+
+        self.assertEqual([path for path, _ in results], self.paths)
+        for i, (_, unit) in enumerate(results):
+            self.assertIsInstance(unit, tree.CompilationUnit)
+            self.assertEqual(unit.types[0].name, 'Class%d' % (i,))
+
+    def test_unordered(self):
+        results = dict(bulk.parse_paths(self.paths, workers=2, ordered=False,
+                                        max_tasks_per_worker=2))
+
+        self.assertEqual(sorted(results), sorted(self.paths))
+
+    def test_max_tasks_per_worker(self):
+        results = bulk.map_paths(process_id, self.paths[:8], workers=1,
+                                 chunksize=2, max_tasks_per_worker=4)
+
+        # Each worker parses two chunks of two files
+        self.assertEqual(len(set(pid for _, pid in results)), 2)
+
+    def test_errors(self):
+        broken = self.write('Broken.java', 'class Broken { int }')
+        missing = os.path.join(self.directory, 'Missing.java')
+
+        results = dict(bulk.parse_paths([broken, missing] + self.paths, workers=2))
+
+        self.assertIsInstance(results[broken], parser.JavaSyntaxError)
+        self.assertEqual(results[broken].description, 'Expected Identifier')
+        self.assertIsInstance(results[missing], EnvironmentError)
+        self.assertIsInstance(results[self.paths[0]], tree.CompilationUnit)
+
+    def test_timeout(self):
+        members = ''.join('int f%d = %d;\n' % (i, i) for i in range(100000))
+        slow = self.write('Slow.java', 'class Slow { %s }' % (members,))
+
+        results = dict(bulk.parse_paths([slow, self.paths[0]], workers=1,
+                                        timeout=0.5))
+
+        self.assertIsInstance(results[slow], bulk.ParseTimeout)
+        self.assertIsInstance(results[self.paths[0]], tree.CompilationUnit)
+
+    def test_pickle_syntax_error(self):
+        with self.assertRaises(parser.JavaSyntaxError) as context:
+            parser.Parser([]).parse_type()
+        error = pickle.loads(pickle.dumps(context.exception))
+        self.assertEqual(error.description, context.exception.description)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from .. import bulk, tree
+from ..cache import ParseCache
+
+
+SOURCE = "class Test { int x; void m() { x = 1; } }"
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_and_miss(self):
+        cache = ParseCache(self.directory)
+
+        first = cache.parse(SOURCE)
+        second = cache.parse(SOURCE)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIsNot(first, second)
+        self.assertEqual(repr(first), repr(second))
+        self.assertIsInstance(second.types[0], tree.ClassDeclaration)
+
+        # Text and bytes sources share entries
+        cache.parse(SOURCE.encode('utf-8'))
+        self.assertEqual(cache.hits, 2)
+
+    def test_shared_directory(self):
+        ParseCache(self.directory).parse(SOURCE)
+
+        cache = ParseCache(self.directory)
+        cache.parse(SOURCE)
+        self.assertEqual(cache.hits, 1)
+
+    def test_key_includes_version(self):
+        cache = ParseCache(self.directory)
+        key = cache.key(SOURCE)
+
+        cache.format_version += 1
+        self.assertNotEqual(key, cache.key(SOURCE))
+
+    def test_no_temporary_files(self):
+        cache = ParseCache(self.directory)
+        cache.parse(SOURCE)
+
+        for _, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                self.assertTrue(filename.endswith(cache.suffix))
+
+    def test_unreadable_entry(self):
+        cache = ParseCache(self.directory)
+        key = cache.key(SOURCE)
+        cache.parse(SOURCE)
+
+        with open(cache.path(key), 'wb') as f:
+            f.write(b'garbage')
+
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(cache.path(key)))
+
+    def test_lru_eviction(self):
+        cache = ParseCache(self.directory)
+        sources = ["class C%d { int x = %d; }" % (i, i) for i in range(4)]
+        keys = [cache.key(source) for source in sources]
+
+        for i, source in enumerate(sources):
+            cache.parse(source)
+            # Make the modification times distinct and ordered
+            mtime = time.time() - 100 + i
+            os.utime(cache.path(keys[i]), (mtime, mtime))
+
+        # Reading the oldest entry makes it the most recently used
+        cache.get(keys[0])
+
+        entry_size = max(size for _, size, _ in cache.entries())
+        cache.max_size = entry_size * 3
+        cache.low_water = 0.85
+        cache.evict()
+
+        remaining = [key for key in keys if os.path.exists(cache.path(key))]
+        self.assertEqual(remaining, [keys[0], keys[3]])
+
+    def test_size_bound(self):
+        cache = ParseCache(self.directory, max_size=2000)
+
+        for i in range(20):
+            cache.parse("class C%d { int x = %d; }" % (i, i))
+
+        self.assertLessEqual(sum(size for _, size, _ in cache.entries()), 2000)
+
+    def test_bulk(self):
+        path = os.path.join(self.directory, 'Test.java')
+        with open(path, 'w') as f:
+            f.write(SOURCE)
+
+        cache = ParseCache(os.path.join(self.directory, 'cache'))
+        for _ in range(2):
+            results = dict(bulk.parse_paths([path], workers=1, cache=cache))
+            self.assertIsInstance(results[path], tree.CompilationUnit)
+
+        self.assertEqual(len(list(cache.entries())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import random
+import unittest
+
+import six
+
+from .. import codegen, parse, tree
+from ..codegen import to_source, write_source
+
+from .helpers import corpus
+
+
+def member(name, prefix_operators=(), selectors=()):
+    return tree.MemberReference(member=name, qualifier='',
+                                prefix_operators=list(prefix_operators),
+                                postfix_operators=[],
+                                selectors=list(selectors))
+
+
+def random_expression(rng, depth):
+    """ Builds a random expression tree of the kinds whose parentheses are
+    chosen by precedence
+
+    """
+
+    if depth == 0:
+        prefix = rng.choice([(), (), ('-',), ('!',), ('-', '-'), ('+', '++')])
+        return member(rng.choice('abcd'), prefix)
+
+    kind = rng.randrange(7)
+    operand = lambda: random_expression(rng, rng.randrange(depth))
+
+    if kind < 3:
+        operator = rng.choice(sorted(codegen._binary_levels))
+        if operator == 'instanceof':
+            return tree.BinaryOperation(operator=operator, operandl=operand(),
+                                        operandr=tree.ReferenceType(name='T', dimensions=[]))
+        return tree.BinaryOperation(operator=operator, operandl=operand(),
+                                    operandr=operand())
+    elif kind == 3:
+        return tree.TernaryExpression(condition=operand(), if_true=operand(),
+                                      if_false=operand())
+    elif kind == 4:
+        return tree.Assignment(expressionl=member(rng.choice('xyz')),
+                               type=rng.choice(['=', '+=', '>>>=']),
+                               value=operand())
+    elif kind == 5:
+        return tree.Cast(type=tree.BasicType(name='int', dimensions=[]),
+                         expression=operand())
+    else:
+        return tree.LambdaExpression(parameters=[member('p')], body=operand())
+
+
+class CodeGeneratorTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            generated = to_source(unit)
+
+            self.assertEqual(parse.parse(generated), unit, generated)
+            self.assertEqual(to_source(parse.parse(generated)), generated)
+
+    def test_source(self):
+        source = to_source(parse.parse(
+            'package p; import java.util.*; '
+            '/** Doc */ @A class T<X extends Y & Z> extends B implements C, D {'
+            'public static final int a = 1, b[] = {1, 2};'
+            'static { a(); }'
+            'T(int... xs) throws E { super(); }'
+            '<R> R m() { if (a) return; else if (b) x++; else { y--; } }'
+            'abstract void n();'
+            '}'))
+
+        self.assertEqual(source, 'package p;\n'
+                                 '\n'
+                                 'import java.util.*;\n'
+                                 '\n'
+                                 '/** Doc */\n'
+                                 '@A\n'
+                                 'class T<X extends Y & Z> extends B implements C, D {\n'
+                                 '    public static final int a = 1, b[] = {1, 2};\n'
+                                 '\n'
+                                 '    {\n'
+                                 '        a();\n'
+                                 '    }\n'
+                                 '\n'
+                                 '    T(int... xs) throws E {\n'
+                                 '        super();\n'
+                                 '    }\n'
+                                 '\n'
+                                 '    <R> R m() {\n'
+                                 '        if (a)\n'
+                                 '            return;\n'
+                                 '        else if (b)\n'
+                                 '            x++;\n'
+                                 '        else {\n'
+                                 '            y--;\n'
+                                 '        }\n'
+                                 '    }\n'
+                                 '\n'
+                                 '    abstract void n();\n'
+                                 '}\n')
+
+    def test_parentheses(self):
+        expressions = [
+            ('a + (b * c)', 'a + b * c'),
+            ('(a + b) * c', '(a + b) * c'),
+            ('(a - b) - c', 'a - b - c'),
+            ('a - (b - c)', 'a - (b - c)'),
+            ('a || (b && c)', 'a || b && c'),
+            ('(a || b) && c', '(a || b) && c'),
+            ('x = (y = z)', 'x = y = z'),
+            ('a ? b : (c ? d : e)', 'a ? b : c ? d : e'),
+            ('(a ? b : c) ? d : e', '(a ? b : c) ? d : e'),
+            ('a ? (x = 1) : (y = 2)', 'a ? x = 1 : (y = 2)'),
+            ('-(a + b)', '-(a + b)'),
+            ('- -a', '- -a'),
+            ('(int) (a + b)', '(int) (a + b)'),
+            ('((String) o).length()', '((String) o).length()'),
+            ('!(a instanceof B)', '!(a instanceof B)'),
+            ('(a = b).c', '(a = b).c'),
+            ('f((x) -> x + 1, y)', 'f(x -> x + 1, y)'),
+            ('(Runnable) () -> {}', '(Runnable) () -> {}'),
+            ('(Object) (Runnable) () -> {}', '(Object) (Runnable) () -> {}'),
+            ('x + ((R) () -> a)', 'x + ((R) () -> a)'),
+            ('-(-a)', '- -a'),
+            ('(a++) + (++b)', 'a++ + ++b'),
+            ('(~a)', '~a'),
+            ('-(~(a + b))', '-~(a + b)'),
+            ('-(int) a', '-((int) a)'),
+            ('c ? x -> 1 : y -> 2', 'c ? x -> 1 : y -> 2'),
+            ('(a::b)', 'a::b'),
+            ('a << (b >> c)', 'a << (b >> c)'),
+        ]
+
+        for source, expected in expressions:
+            expression = parse.parse_expression(source)
+            generated = to_source(expression)
+
+            self.assertEqual(generated, expected)
+            self.assertEqual(parse.parse_expression(generated), expression)
+
+    def test_random_expressions(self):
+        rng = random.Random(0)
+
+        for _ in range(500):
+            expression = random_expression(rng, 4)
+            generated = to_source(expression)
+
+            self.assertEqual(parse.parse_expression(generated), expression, generated)
+
+    def test_dangling_else(self):
+        inner = tree.IfStatement(condition=member('b'),
+                                 then_statement=tree.ReturnStatement())
+        statement = tree.IfStatement(condition=member('a'),
+                                     then_statement=inner,
+                                     else_statement=tree.BreakStatement())
+
+        self.assertEqual(to_source(statement), 'if (a) {\n'
+                                               '    if (b)\n'
+                                               '        return;\n'
+                                               '} else\n'
+                                               '    break;\n')
+
+    def test_write_source(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            out = six.StringIO()
+            write_source(unit, out, indent='\t')
+
+            self.assertEqual(out.getvalue(), to_source(unit, indent='\t'))
+
+    def test_deep_expression(self):
+        unit = parse.parse('class T { int x = %s; }' % ' + '.join(['a'] * 5000))
+        self.assertEqual(parse.parse(to_source(unit)), unit)
+
+    def test_unsupported(self):
+        self.assertRaises(TypeError, to_source, tree.EnumBody())
+        self.assertRaises(TypeError, to_source, object())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+
+from .. import diff, parse
+from ..diff import Delete, Insert
+
+from .helpers import corpus
+
+
+OLD = """class A {
+    int x = 1;
+    void m() { foo(1); bar(2); }
+    void n() { baz(); }
+    String s;
+}
+"""
+
+NEW = """class A {
+    String s;
+    int x = 2;
+    void m() { bar(2); foo(1); qux(); }
+    void renamed() { baz(); }
+}
+"""
+
+
+def kinds(actions):
+    return [(type(action).__name__, type(action.node).__name__) for action in actions]
+
+
+class DiffTest(unittest.TestCase):
+
+    def check_consistent(self, old, new, mapping, actions):
+        inserted = set(id(a.node) for a in actions if isinstance(a, Insert))
+        deleted = set(id(a.node) for a in actions if isinstance(a, Delete))
+
+        for path, node in new:
+            source = mapping.src(node)
+            if source is None:
+                # Unmatched nodes are inserted themselves or with an ancestor
+                self.assertTrue(id(node) in inserted or
+                                any(id(p) in inserted for p in path))
+            else:
+                self.assertIs(type(source), type(node))
+                self.assertIs(mapping.dst(source), node)
+
+        for path, node in old:
+            if not mapping.has_src(node):
+                self.assertTrue(id(node) in deleted or
+                                any(id(p) in deleted for p in path))
+
+    def test_identical(self):
+        for source in corpus():
+            self.assertEqual(diff.diff(parse.parse(source), parse.parse(source)), [])
+
+    def test_edits(self):
+        old = parse.parse(OLD)
+        new = parse.parse(NEW)
+        actions = diff.diff(old, new)
+
+        self.assertEqual(kinds(actions), [
+            ('Move', 'FieldDeclaration'),
+            ('Update', 'MethodDeclaration'),
+            ('Move', 'StatementExpression'),
+            ('Insert', 'StatementExpression'),
+            ('Update', 'Literal'),
+        ])
+
+        move, rename, reorder, insert, update = actions
+
+        self.assertEqual(move.node.type.name, 'String')
+        self.assertIs(move.parent, new.types[0])
+        self.assertEqual(move.index, 0)
+        self.assertEqual(move.position, (2, 5))
+
+        self.assertEqual(rename.changes, [('name', 'n', 'renamed')])
+        self.assertEqual(insert.node.expression.member, 'qux')
+        self.assertEqual(insert.position, (4, 32))
+        self.assertEqual(update.changes, [('value', '1', '2')])
+        self.assertEqual(update.position, (3, 13))
+
+    def test_delete(self):
+        old = parse.parse(OLD)
+        new = parse.parse(OLD.replace('    void n() { baz(); }\n', ''))
+        actions = diff.diff(old, new)
+
+        self.assertEqual(kinds(actions), [('Delete', 'MethodDeclaration')])
+        self.assertEqual(actions[0].node.name, 'n')
+        self.assertEqual(actions[0].position, (4, 5))
+
+    def test_parenthesized_operators(self):
+        old = parse.parse('class A { int m() { return -(x + y); } }')
+        new = parse.parse('class A { int m() { return (x + y); } }')
+        actions = diff.diff(old, new)
+
+        self.assertEqual(kinds(actions), [('Update', 'BinaryOperation')])
+        self.assertEqual(actions[0].changes, [('prefix_operators', ['-'], None)])
+
+        new = parse.parse('class A { int m() { return (x + y).z; } }')
+        actions = diff.diff(old, new)
+
+        self.assertEqual(kinds(actions), [('Update', 'BinaryOperation')])
+        self.assertEqual([attr for attr, _, _ in actions[0].changes],
+                         ['prefix_operators', 'selectors'])
+
+    def test_renamed_methods(self):
+        body = 'void %s%d(int a) { foo(a, %d); bar(a + %d); }'
+        old = parse.parse('class A { %s }' % ' '.join(body % ('m', i, i, i) for i in range(50)))
+        new = parse.parse('class A { %s }' % ' '.join(body % ('r', i, i, i) for i in range(50)))
+        mapping = diff.match(old, new)
+
+        for a, b in zip(old.types[0].methods, new.types[0].methods):
+            self.assertIs(mapping.dst(a), b)
+
+        actions = diff.diff(old, new, mapping)
+        self.assertEqual(kinds(actions), [('Update', 'MethodDeclaration')] * 50)
+
+    def test_moved_between_classes(self):
+        body = 'void m() { int a = 1; foo(a, a + 1); }'
+        old = parse.parse('class A { %s } class B {}' % (body,))
+        new = parse.parse('class A {} class B { %s }' % (body,))
+        actions = diff.diff(old, new)
+
+        self.assertEqual(kinds(actions), [('Move', 'MethodDeclaration')])
+        self.assertIs(actions[0].parent, new.types[1])
+
+    def test_consistent(self):
+        sources = list(corpus())
+
+        for old_source, new_source in zip(sources, sources[1:]):
+            old = parse.parse(old_source)
+            new = parse.parse(new_source)
+            mapping = diff.match(old, new)
+            actions = diff.diff(old, new, mapping)
+
+            self.check_consistent(old, new, mapping, actions)
+
+    def test_stable(self):
+        self.assertEqual(diff._stable([]), set())
+        self.assertEqual(diff._stable([3, 0, 1, 2]), set([1, 2, 3]))
+        self.assertEqual(len(diff._stable([5, 1, 4, 2, 3, 0])), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import extract, parse, parser, tree
+
+from .helpers import corpus
+
+
+SOURCE = """
+/** The package */
+package a.b;
+
+/**
+ * A class.
+ * @param <T> the element
+ * @author me
+ */
+public class A<T> {
+    /** The count */
+    int count, sizes[];
+
+    /** Makes an A */
+    A(int count) { this.count = count; }
+
+    /**
+     * Finds things.
+     *
+     * @param key the key
+     * @return the things
+     * @throws IOException on failure
+     */
+    public <K> java.util.List<? extends T> find(K key, String... rest) throws IOException {
+        if (key == null) { return null; }
+        return new java.util.ArrayList<>();
+    }
+
+    void undocumented() {}
+
+    /** Inner */
+    interface I { /** Run */ void run(); }
+
+    enum E { /** First */ FIRST, SECOND; }
+
+    /** Note */
+    @interface N { /** Value */ String[] value(); }
+}
+"""
+
+
+class DeclarationParserTest(unittest.TestCase):
+
+    def test_bodies_skipped(self):
+        unit = extract.parse_declarations(SOURCE)
+        constructor = unit.types[0].constructors[0]
+        find = unit.types[0].methods_named('find')[0]
+
+        self.assertEqual(constructor.body, [])
+        self.assertEqual(find.body, [])
+        self.assertEqual(len(list(unit.filter(tree.Statement))), 0)
+        self.assertIsNone(unit.types[0].body[4].body[0].body)
+
+    def test_same_declarations(self):
+        for source in corpus():
+            full = list(extract.javadoc_records(parse.parse(source)))
+            skipped = list(extract.javadoc_records(extract.parse_declarations(source)))
+            self.assertEqual(full, skipped)
+
+    def test_body_errors(self):
+        # Invalid statements are not parsed
+        unit = extract.parse_declarations('class A { void m() { ) } static { ( } }')
+        self.assertEqual(unit.types[0].methods[0].body, [])
+
+        self.assertRaises(parser.JavaSyntaxError, extract.parse_declarations,
+                          'class A { void m() { { } }')
+
+
+class RecordsTest(unittest.TestCase):
+
+    def test_records(self):
+        records = dict((record['name'], record) for record in
+                       extract.javadoc_records(parse.parse(SOURCE), 'A.java'))
+
+        self.assertEqual(sorted(records), [
+            'a.b', 'a.b.A', 'a.b.A.A', 'a.b.A.E.FIRST', 'a.b.A.I', 'a.b.A.I.run',
+            'a.b.A.N', 'a.b.A.N.value', 'a.b.A.count', 'a.b.A.find', 'a.b.A.sizes'])
+
+        find = records['a.b.A.find']
+        self.assertEqual(find['file'], 'A.java')
+        self.assertEqual(find['kind'], 'method')
+        self.assertEqual(find['signature'],
+                         '<K> java.util.List<? extends T> find(K, String...)')
+        self.assertEqual(find['description'], 'Finds things.')
+        self.assertEqual(find['params'], [('key', 'the key')])
+        self.assertEqual(find['return'], 'the things')
+        self.assertEqual(find['throws'], {'IOException': 'on failure'})
+
+        self.assertEqual(records['a.b.A']['signature'], 'class A<T>')
+        self.assertEqual(records['a.b.A']['authors'], ['me'])
+        self.assertEqual(records['a.b.A.A']['signature'], 'A(int)')
+        self.assertEqual(records['a.b.A.sizes']['signature'], 'int[] sizes')
+        self.assertEqual(records['a.b.A.E.FIRST']['kind'], 'constant')
+        self.assertEqual(records['a.b.A.N']['signature'], '@interface N')
+        self.assertEqual(records['a.b.A.N.value']['signature'], 'String[] value()')
+
+    def test_generic_constructor(self):
+        unit = parse.parse('class A { /** Makes an A */ <T> A(T t, int i) {} }')
+        record, = [record for record in extract.javadoc_records(unit)
+                   if record['kind'] == 'constructor']
+
+        self.assertEqual(record['signature'], '<T> A(T, int)')
+
+
+class ExtractJavadocTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, source):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+
+    def test_extract(self):
+        paths = [self.write('A.java', SOURCE),
+                 self.write('Broken.java', 'class Broken { int }')]
+        for i in range(5):
+            paths.append(self.write('C%d.java' % (i,), '/** C%d */ class C%d {}' % (i, i)))
+
+        output = os.path.join(self.directory, 'docs.jsonl')
+        with open(output, 'w') as out:
+            count = extract.extract_javadoc(paths, out, workers=2, chunksize=2)
+
+        with open(output) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(count, 16)
+        self.assertEqual(len(records), 17)
+        self.assertEqual(records[0]['name'], 'a.b')
+        self.assertEqual(set(records[11]), set(['file', 'error']))
+        self.assertEqual(records[11]['file'], paths[1])
+        self.assertEqual([r['description'] for r in records[12:]],
+                         ['C%d' % (i,) for i in range(5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
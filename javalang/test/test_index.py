@@ -0,0 +1,127 @@
+import gc
+import unittest
+
+from .. import parse
+from ..index import TypeIndex, declared_types
+
+from .helpers import corpus
+
+
+FILES = {
+    'a/A.java': """
+        package a;
+        public class A {
+            public static class Entry { interface Visitor {} }
+        }
+        class Helper {}
+    """,
+    'a/B.java': """
+        package a;
+        class B { Helper h; }
+    """,
+    'b/C.java': """
+        package b;
+        public class C { public static class Inner {} }
+    """,
+    'c/Main.java': """
+        package c;
+
+        import java.util.List;
+        import a.*;
+        import b.*;
+        import static b.C.Inner;
+        import static b.C.value;
+
+        class Main {
+            class Local {}
+        }
+    """,
+}
+
+
+class TypeIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TypeIndex()
+        self.units = dict()
+
+        for path, source in FILES.items():
+            self.units[path] = parse.parse(source)
+            self.index.add(path, self.units[path])
+
+    def resolve(self, path, name):
+        return self.index.resolve(self.units[path], name)
+
+    def test_declarations(self):
+        self.assertEqual(len(self.index), 9)
+        self.assertIn('a.A.Entry.Visitor', self.index)
+        self.assertIs(self.index.get('b.C'), self.units['b/C.java'].types[0])
+        self.assertIsNone(self.index.get('b.D'))
+
+    def test_resolve(self):
+        self.assertEqual(self.resolve('c/Main.java', 'List'), 'java.util.List')
+        self.assertEqual(self.resolve('c/Main.java', 'A'), 'a.A')
+        self.assertEqual(self.resolve('c/Main.java', 'C'), 'b.C')
+        self.assertEqual(self.resolve('c/Main.java', 'Inner'), 'b.C.Inner')
+        self.assertEqual(self.resolve('c/Main.java', 'Local'), 'c.Main.Local')
+        self.assertEqual(self.resolve('c/Main.java', 'A.Entry'), 'a.A.Entry')
+        self.assertIsNone(self.resolve('c/Main.java', 'value'))
+        self.assertIsNone(self.resolve('c/Main.java', 'Entry'))
+        self.assertIsNone(self.resolve('c/Main.java', 'String'))
+
+        # Same package and nested types
+        self.assertEqual(self.resolve('a/B.java', 'Helper'), 'a.Helper')
+        self.assertEqual(self.resolve('a/A.java', 'Visitor'), 'a.A.Entry.Visitor')
+
+    def test_precedence(self):
+        unit = parse.parse("""
+            package a;
+            import x.B;
+            import b.*;
+            class C {}
+        """)
+
+        # Declared before single-type imports before the package
+        self.assertEqual(self.index.resolve(unit, 'C'), 'a.C')
+        self.assertEqual(self.index.resolve(unit, 'B'), 'x.B')
+        self.assertEqual(self.index.resolve(unit, 'A'), 'a.A')
+
+    def test_remove(self):
+        self.index.remove('b/C.java')
+
+        self.assertNotIn('b.C', self.index)
+        self.assertNotIn('b', self.index.members)
+        self.assertIsNone(self.resolve('c/Main.java', 'C'))
+        self.assertIsNone(self.resolve('c/Main.java', 'Inner'))
+
+    def test_replace(self):
+        self.resolve('c/Main.java', 'C')
+        self.index.add('b/C.java', parse.parse('package b; class D {}'))
+
+        self.assertEqual(self.resolve('c/Main.java', 'D'), 'b.D')
+        self.assertIsNone(self.resolve('c/Main.java', 'C'))
+        self.assertEqual(sorted(self.index.keys()), sorted(FILES))
+
+    def test_cached_tables(self):
+        unit = self.units['c/Main.java']
+        table = self.index.table(unit)
+
+        self.assertIs(self.index.table(unit), table)
+
+        del self.units['c/Main.java'], unit
+        gc.collect()
+        self.assertEqual(len(self.index.tables), 0)
+
+    def test_corpus(self):
+        index = TypeIndex()
+        for i, source in enumerate(corpus()):
+            unit = parse.parse(source)
+            index.add(i, unit)
+
+            for name, declaration in declared_types(unit):
+                self.assertEqual(index.resolve(unit, declaration.name).split('.')[-1],
+                                 declaration.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
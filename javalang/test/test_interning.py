@@ -0,0 +1,164 @@
+import unittest
+
+from .. import ast, parse, parser, tokenizer, tree
+from ..interning import NodeInterner, StringInternTable
+
+from .helpers import corpus
+
+
+def parse_interned(source, interner):
+    p = parser.Parser(tokenizer.tokenize(source))
+    p.set_node_interner(interner)
+    return p.parse()
+
+
+SOURCE = """
+class A {
+    List<String> a;
+    List<String> b;
+    int[] c;
+    void m(int[] d, List<Integer> e) {}
+}
+"""
+
+
+class NodeInternerTest(unittest.TestCase):
+
+    def test_equal_trees(self):
+        interner = NodeInterner()
+        for source in corpus():
+            self.assertEqual(parse_interned(source, interner), parse.parse(source))
+
+    def test_shared_types(self):
+        interner = NodeInterner()
+        unit = parse_interned(SOURCE, interner)
+        a, b, c, m = unit.types[0].body
+
+        self.assertIs(a.type, b.type)
+        self.assertIs(c.type, m.parameters[0].type)
+        self.assertIsNot(a.type, m.parameters[1].type)
+
+        # Type arguments are shared below different types
+        self.assertIs(a.type.arguments[0].type.sub_type,
+                      m.parameters[1].type.arguments[0].type.sub_type)
+
+    def test_shared_across_trees(self):
+        interner = NodeInterner()
+        first = parse_interned(SOURCE, interner)
+        second = parse_interned(SOURCE, interner)
+
+        self.assertIs(first.types[0].body[0].type, second.types[0].body[0].type)
+        self.assertGreater(interner.hits, interner.misses)
+
+    def test_deep_tree(self):
+        source = 'class A { List<String> a = %s; List<String> b; }' % ' + '.join(['x'] * 5000)
+        a, b = parse_interned(source, NodeInterner()).types[0].body
+
+        self.assertIs(a.type, b.type)
+
+    def test_positions_not_interned(self):
+        interner = NodeInterner(node_types=[tree.Literal])
+        unit = interner.intern_tree(parse.parse('class A { int a = 1; int b = 1; }'))
+        a, b = unit.types[0].body
+
+        self.assertIsNot(a.declarators[0].initializer, b.declarators[0].initializer)
+        self.assertEqual(len(interner), 0)
+
+    def test_node_types(self):
+        interner = NodeInterner(node_types=[tree.BasicType])
+        unit = interner.intern_tree(parse.parse(SOURCE))
+        a, b, c, m = unit.types[0].body
+
+        self.assertIs(c.type, m.parameters[0].type)
+        self.assertIsNot(a.type, b.type)
+
+    def test_disabled(self):
+        p = parser.Parser(tokenizer.tokenize(SOURCE))
+        p.set_node_interner(NodeInterner())
+        p.set_node_interner(None)
+        a, b = p.parse().types[0].body[:2]
+
+        self.assertIsNot(a.type, b.type)
+
+    def test_fewer_nodes(self):
+        interner = NodeInterner()
+        source = next(corpus())
+        plain = parse.parse(source)
+        interned = parse_interned(source, interner)
+
+        count = lambda unit: len(set(id(node) for node in ast.walk_nodes(unit)))
+        self.assertLess(count(interned), count(plain))
+
+
+def fresh(s):
+    # An equal string which is not the same object
+    return ''.join(list(s))
+
+
+class StringInternTableTest(unittest.TestCase):
+
+    def test_intern(self):
+        table = StringInternTable()
+        a = fresh('name')
+        b = fresh('name')
+
+        self.assertIsNot(a, b)
+        self.assertIs(table.intern(a), a)
+        self.assertIs(table.intern(b), a)
+        self.assertIn('name', table)
+
+    def test_bounded(self):
+        table = StringInternTable(max_size=10)
+        for i in range(100):
+            table.intern(str(i))
+            self.assertLessEqual(len(table), 10)
+
+        self.assertNotIn('0', table)
+        self.assertIn('99', table)
+
+    def test_keeps_used_strings(self):
+        table = StringInternTable(max_size=10)
+        shared = table.intern(fresh('used'))
+
+        for i in range(100):
+            table.intern(str(i))
+            self.assertIs(table.intern(fresh('used')), shared)
+
+    def test_tokenizer(self):
+        table = StringInternTable()
+        first = list(tokenizer.tokenize('foo(bar); int x;', intern_table=table))
+        second = list(tokenizer.tokenize('int foo = bar;', intern_table=table))
+
+        self.assertIs(first[0].value, second[1].value)
+        self.assertIs(first[2].value, second[3].value)
+        self.assertIs(first[5].value, second[0].value)
+
+    def test_qualified_names(self):
+        table = StringInternTable()
+        source = """
+            package a.b;
+            import java.util.List;
+            @a.b.Note class A { void m() { java.lang.System.exit(0); } }
+        """
+        first = parse.parse(source, intern_table=table)
+        second = parse.parse(fresh(source), intern_table=table)
+
+        self.assertIs(first.package.name, second.package.name)
+        self.assertIs(first.imports[0].path, second.imports[0].path)
+        self.assertIs(first.types[0].annotations[0].name,
+                      second.types[0].annotations[0].name)
+
+        _, a = next(first.filter(tree.MethodInvocation))
+        _, b = next(second.filter(tree.MethodInvocation))
+        self.assertEqual(a.qualifier, 'java.lang.System')
+        self.assertIs(a.qualifier, b.qualifier)
+        self.assertIs(a.member, b.member)
+
+    def test_equal_trees(self):
+        table = StringInternTable()
+        for source in corpus():
+            self.assertEqual(parse.parse(source, intern_table=table), parse.parse(source))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from .. import javadoc
+from .. import javadoc, parse
 
 
 class TestJavadoc(unittest.TestCase):
@@ -10,5 +10,42 @@ class TestJavadoc(unittest.TestCase):
         javadoc.parse('/**\n *\n */')
         javadoc.parse('/**\n *\n *\n */')
 
+    def test_invalid(self):
+        self.assertRaises(ValueError, javadoc.parse, '/* plain */')
+
+    def test_cache(self):
+        cache = javadoc.DocCache(max_size=2)
+        first = cache.parse('/** a */')
+
+        self.assertIs(cache.parse('/** a */'), first)
+        cache.parse('/** b */')
+        cache.parse('/** a */')
+        cache.parse('/** c */')
+
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.parse('/** a */'), first)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_doc_property(self):
+        unit = parse.parse("""
+            /** Class
+             * @author me */
+            class A {
+                /** @param a b */
+                void m(int a) {}
+                int f;
+                @interface B { /** Value */ int v(); }
+            }
+        """)
+        a = unit.types[0]
+        m, f, b = a.body
+
+        self.assertEqual(a.doc.authors, ['me'])
+        self.assertEqual(m.doc.params, [('a', 'b')])
+        self.assertIsNone(f.doc)
+        self.assertEqual(b.body[0].doc.description, 'Value')
+        self.assertIs(a.doc, javadoc.parse_cached(a.documentation))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+from .. import parse, parser, tree
+from ..tokenizer import LexerError
+
+
+class BatchParseTest(unittest.TestCase):
+
+    def test_parse_types(self):
+        results = list(parse.parse_types(['int', 'List<String>', 'Object[]']))
+
+        self.assertEqual([error for _, error in results], [None, None, None])
+
+        types = [result for result, _ in results]
+        self.assertIsInstance(types[0], tree.BasicType)
+        self.assertEqual(types[1].name, 'List')
+        self.assertEqual(types[1].arguments[0].type.name, 'String')
+        self.assertEqual(types[2].dimensions, [None])
+
+    def test_collects_errors(self):
+        expressions = ['a + b', 'a +', '#', 'foo(1)']
+        results = list(parse.parse_expressions(expressions))
+
+        self.assertIsInstance(results[0][0], tree.BinaryOperation)
+        self.assertIsInstance(results[1][1], parser.JavaSyntaxError)
+        self.assertIsInstance(results[2][1], LexerError)
+        self.assertIsInstance(results[3][0], tree.MethodInvocation)
+        self.assertIsNone(results[3][1])
+
+    def test_matches_single_parse(self):
+        signatures = ['public void foo(int a)', 'private static int x;']
+        results = list(parse.parse_member_signatures(signatures))
+
+        for sig, (member, error) in zip(signatures, results):
+            self.assertIsNone(error)
+            self.assertEqual(repr(member), repr(parse.parse_member_signature(sig)))
+
+        sigs = ['public Foo(int a)', 'Foo() throws Exception;']
+        for sig, (member, error) in zip(sigs, parse.parse_constructor_signatures(sigs)):
+            self.assertIsInstance(member, tree.ConstructorDeclaration)
+            self.assertEqual(repr(member), repr(parse.parse_constructor_signature(sig)))
+
+        sigs = ['class Foo<T> extends Bar', 'interface Baz;']
+        for sig, (decl, error) in zip(sigs, parse.parse_type_signatures(sigs)):
+            self.assertIsNone(error)
+            self.assertEqual(repr(decl), repr(parse.parse_type_signature(sig)))
+
+    def test_reuses_parser(self):
+        p = parser.Parser(())
+        results = list(parse.parse_types(['int', 'long'], parser=p))
+
+        self.assertEqual(results[1][0].name, 'long')
+        self.assertEqual(p.tokens.marker, 1)
+
+
+class QualifiedPrimaryTest(unittest.TestCase):
+
+    def test_explicit_type_arguments(self):
+        invocation = parse.parse_expression('a.b.<T>m(x)')
+
+        self.assertIsInstance(invocation, tree.MethodInvocation)
+        self.assertEqual(invocation.qualifier, 'a.b')
+        self.assertEqual(invocation.member, 'm')
+        self.assertEqual(invocation.type_arguments[0].type.name, 'T')
+
+    def test_member_without_type_arguments(self):
+        invocation = parse.parse_expression('a.b.m(x)')
+
+        self.assertEqual(invocation.qualifier, 'a.b')
+        self.assertEqual(invocation.member, 'm')
+
+    def test_array_class_reference(self):
+        reference = parse.parse_expression('java.lang.String[][].class')
+
+        self.assertIsInstance(reference, tree.ClassReference)
+        self.assertEqual(reference.qualifier, 'java.lang')
+        self.assertEqual(reference.type.name, 'String')
+        self.assertEqual(reference.type.dimensions, [None, None])
+
+        reference = parse.parse_expression('String.class')
+        self.assertEqual(reference.type.name, 'String')
+        self.assertFalse(reference.type.dimensions)
+
+
+
+class ParenthesizedOperatorsTest(unittest.TestCase):
+
+    def test_prefix_operators(self):
+        self.assertEqual(parse.parse_expression('-(-a)').prefix_operators, ['-', '-'])
+        self.assertEqual(parse.parse_expression('(~a)').prefix_operators, ['~'])
+        self.assertEqual(parse.parse_expression('!(!(a + b))').prefix_operators,
+                         ['!', '!'])
+
+    def test_postfix_operators(self):
+        operation = parse.parse_expression('(a++) + (++b)')
+
+        self.assertEqual(operation.operandl.postfix_operators, ['++'])
+        self.assertEqual(operation.operandr.prefix_operators, ['++'])
+
+    def test_cast(self):
+        cast = parse.parse_expression('-(int) a')
+
+        self.assertIsInstance(cast, tree.Cast)
+        self.assertEqual(cast.prefix_operators, ['-'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+import unittest
+
+from .. import parser, tokenizer, tree
+from ..parser import JavaSyntaxError
+from ..tokenizer import Identifier, Modifier, BasicType, Literal
+
+from .helpers import dump, corpus
+
+
+class ProbingParser(parser.Parser):
+    """ Reference implementation of the rules which select their alternative
+    from a prediction table, probing the token stream one alternative at a time
+    as the parser originally did.
+
+    """
+
+    def parse_class_body_declaration(self):
+        token = self.tokens.look()
+
+        if self.try_accept(';'):
+            return None
+
+        elif self.would_accept('static', '{'):
+            self.accept('static')
+            return self.parse_block()
+
+        elif self.would_accept('{'):
+            return self.parse_block()
+
+        else:
+            return self.parse_member_declaration()
+
+    def parse_member_declaration(self):
+        modifiers, annotations, javadoc = self.parse_modifiers()
+        member = None
+
+        token = self.tokens.look()
+        if self.try_accept('void'):
+            method_name = self.parse_identifier()
+            member = self.parse_void_method_declarator_rest()
+            member.name = method_name
+
+        elif token.value == '<':
+            member = self.parse_generic_method_or_constructor_declaration()
+
+        elif token.value == 'class':
+            member = self.parse_normal_class_declaration()
+
+        elif token.value == 'enum':
+            member = self.parse_enum_declaration()
+
+        elif token.value == 'interface':
+            member = self.parse_normal_interface_declaration()
+
+        elif self.is_annotation_declaration():
+            member = self.parse_annotation_type_declaration()
+
+        elif self.would_accept(Identifier, '('):
+            constructor_name = self.parse_identifier()
+            member = self.parse_constructor_declarator_rest()
+            member.name = constructor_name
+
+        else:
+            member = self.parse_method_or_field_declaraction()
+
+        member._position = token.position
+        member.modifiers = modifiers
+        member.annotations = annotations
+        member.documentation = javadoc
+
+        return member
+
+    def parse_block_statement(self):
+        if self.would_accept(Identifier, ':'):
+            # Labeled statement
+            return self.parse_statement()
+
+        if self.would_accept('synchronized'):
+            return self.parse_statement()
+
+        token = None
+        found_annotations = False
+        i = 0
+
+        # Look past annoatations and modifiers. If we find a modifier that is not
+        # 'final' then the statement must be a class or interface declaration
+        while True:
+            token = self.tokens.look(i)
+
+            if isinstance(token, Modifier):
+                if not token.value == 'final':
+                    return self.parse_class_or_interface_declaration()
+
+            elif self.is_annotation(i):
+                found_annotations = True
+
+                i += 2
+                while self.tokens.look(i).value == '.':
+                    i += 2
+
+                if self.tokens.look(i).value == '(':
+                    parens = 1
+                    i += 1
+
+                    while parens > 0:
+                        token = self.tokens.look(i)
+                        if token.value == '(':
+                            parens += 1
+                        elif token.value == ')':
+                            parens -= 1
+                        i += 1
+                    continue
+
+            else:
+                break
+
+            i += 1
+
+        if token.value in ('class', 'enum', 'interface', '@'):
+            return self.parse_class_or_interface_declaration()
+
+        if found_annotations or isinstance(token, BasicType):
+            statement = self.parse_local_variable_declaration_statement()
+            statement._position = token.position
+            return statement
+
+        # At this point, if the block statement is a variable definition the next
+        # token MUST be an identifier, so if it isn't we can conclude the block
+        # statement is a normal statement
+        if not isinstance(token, Identifier):
+            return self.parse_statement()
+
+        # We can't easily determine the statement type. Try parsing as a variable
+        # declaration first and fall back to a statement
+        try:
+            with self.tokens:
+                statement = self.parse_local_variable_declaration_statement()
+                statement._position = token.position
+                return statement
+        except JavaSyntaxError:
+            return self.parse_statement()
+
+    def parse_primary(self):
+        token = self.tokens.look()
+
+        if isinstance(token, Literal):
+            literal = self.parse_literal()
+            literal._position = token.position
+            return literal
+
+        elif token.value == '(':
+            return self.parse_par_expression()
+
+        elif self.try_accept('this'):
+            arguments = None
+
+            if self.would_accept('('):
+                arguments = self.parse_arguments()
+                return tree.ExplicitConstructorInvocation(arguments=arguments)
+
+            return tree.This()
+        elif self.would_accept('super', '::'):
+            self.accept('super')
+            return token
+        elif self.try_accept('super'):
+            super_suffix = self.parse_super_suffix()
+            return super_suffix
+
+        elif self.try_accept('new'):
+            return self.parse_creator()
+
+        elif token.value == '<':
+            type_arguments = self.parse_nonwildcard_type_arguments()
+
+            if self.try_accept('this'):
+                arguments = self.parse_arguments()
+                return tree.ExplicitConstructorInvocation(type_arguments=type_arguments,
+                                                          arguments=arguments)
+            else:
+                invocation = self.parse_explicit_generic_invocation_suffix()
+                invocation._position = token.position
+                invocation.type_arguments = type_arguments
+
+                return invocation
+
+        elif isinstance(token, Identifier):
+            qualified_identifier = [self.parse_identifier()]
+
+            while self.would_accept('.', Identifier):
+                self.accept('.')
+                identifier = self.parse_identifier()
+                qualified_identifier.append(identifier)
+
+            identifier_suffix = self.parse_identifier_suffix()
+
+            if isinstance(identifier_suffix, (tree.MemberReference, tree.MethodInvocation)):
+                # Take the last identifer as the member and leave the rest for the qualifier
+                if identifier_suffix.member is None:
+                    identifier_suffix.member = qualified_identifier.pop()
+
+            elif isinstance(identifier_suffix, tree.ClassReference):
+                dimensions = None
+                if identifier_suffix.type is not None:
+                    dimensions = identifier_suffix.type.dimensions
+
+                identifier_suffix.type = tree.ReferenceType(name=qualified_identifier.pop(),
+                                                            dimensions=dimensions)
+
+            identifier_suffix._position = token.position
+            identifier_suffix.qualifier = '.'.join(qualified_identifier)
+
+            return identifier_suffix
+
+        elif isinstance(token, BasicType):
+            base_type = self.parse_basic_type()
+            base_type.dimensions = self.parse_array_dimension()
+            self.accept('.', 'class')
+
+            return tree.ClassReference(type=base_type)
+
+        elif self.try_accept('void'):
+            self.accept('.', 'class')
+            return tree.VoidClassReference()
+
+        self.illegal("Expected expression")
+
+
+def parse_result(parser_class, source):
+    p = parser_class(tokenizer.tokenize(source))
+    try:
+        return dump(p.parse())
+    except JavaSyntaxError as e:
+        return ('error', e.description, dump(e.at))
+
+
+class PredictionTest(unittest.TestCase):
+
+    def test_identical_trees(self):
+        for source in corpus():
+            self.assertEqual(parse_result(parser.Parser, source),
+                             parse_result(ProbingParser, source),
+                             source)
+
+    def test_identical_errors(self):
+        sources = [
+            "class T { void m() { x = ; } }",
+            "class T { void m() { final 3; } }",
+            "class T { static 3; }",
+            "class T { @ }",
+            "class T { void m() { void; } }",
+            "class T { void m() { int.class.getName(); } }",
+            "class T { void m() { List<String>::size; } }",
+        ]
+
+        for source in sources:
+            result = parse_result(parser.Parser, source)
+            self.assertEqual(result[0], 'error')
+            self.assertEqual(result, parse_result(ProbingParser, source))
+
+    def test_token_kind(self):
+        tokens = list(tokenizer.tokenize('foo 1 "s" true null int static ( +'))
+        kinds = [parser.token_kind(token) for token in tokens]
+
+        self.assertEqual(kinds, [Identifier, Literal, Literal, Literal, Literal,
+                                 BasicType, 'static', '(', '+'])
+        self.assertEqual(parser.token_kind(tokenizer.EndOfInput(None)), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
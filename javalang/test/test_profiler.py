@@ -0,0 +1,106 @@
+import unittest
+
+from .. import parser, tokenizer
+from ..profiler import ParseProfiler
+
+
+SOURCE = """
+package com.example;
+
+class Test {
+    int field = 1;
+
+    void method(int a) {
+        List<String> items = null;
+        foo(a);
+        a = a + 1;
+    }
+}
+"""
+
+
+def make_parser(source=SOURCE):
+    return parser.Parser(tokenizer.tokenize(source))
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_collects_rule_stats(self):
+        profiler = ParseProfiler()
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.parse()
+
+        unit = profiler.stats['parse_compilation_unit']
+        self.assertEqual(unit.calls, 1)
+        self.assertEqual(unit.tokens, len(list(tokenizer.tokenize(SOURCE))))
+        self.assertGreaterEqual(unit.cumulative_time, unit.self_time)
+
+        self.assertGreater(profiler.stats['parse_identifier'].calls, 1)
+
+    def test_counts_backtracks(self):
+        profiler = ParseProfiler()
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.parse()
+
+        # 'foo(a);' and 'a = a + 1;' are first tried as local variable
+        # declarations
+        rule = profiler.stats['parse_local_variable_declaration_or_statement']
+        self.assertEqual(rule.backtracks, 2)
+        self.assertGreater(rule.backtrack_tokens, 0)
+
+    def test_recursive_cumulative_time(self):
+        ticks = iter(range(1000))
+        profiler = ParseProfiler(timer=lambda: next(ticks))
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.parse()
+
+        unit = profiler.stats['parse_compilation_unit']
+        total_self = sum(s.self_time for s in profiler.stats.values())
+        self.assertEqual(total_self, unit.cumulative_time)
+
+        for stats in profiler.stats.values():
+            self.assertLessEqual(stats.cumulative_time, unit.cumulative_time)
+
+    def test_detach(self):
+        profiler = ParseProfiler()
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.set_profiler(None)
+
+        self.assertNotIn('parse_compilation_unit', vars(p))
+        self.assertNotIn('push_marker', vars(p.tokens))
+
+        p.parse()
+        self.assertEqual(profiler.stats['parse_compilation_unit'].calls, 0)
+
+    def test_clear(self):
+        profiler = ParseProfiler()
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.parse()
+
+        profiler.clear()
+        self.assertEqual(profiler.report().splitlines()[1:], [])
+
+        p.reset(tokenizer.tokenize(SOURCE))
+        p.parse()
+        self.assertEqual(profiler.stats['parse_compilation_unit'].calls, 1)
+        self.assertEqual(profiler.stats['parse_local_variable_declaration_or_statement']
+                         .backtracks, 2)
+
+    def test_report(self):
+        profiler = ParseProfiler()
+        p = make_parser()
+        p.set_profiler(profiler)
+        p.parse()
+
+        lines = profiler.report(limit=3).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('rule'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+
+from .. import ast, parse, query, tree
+from ..query import Query, QuerySyntaxError
+
+from .helpers import corpus
+
+
+SOURCE = """
+import java.util.List;
+
+class A {
+    private java.io.Closeable c;
+
+    public Object getX() { return c.close(); }
+
+    void m(String... rest) { c.close(); }
+
+    public Object getY() {
+        if (true) return foo(c.close());
+        return null;
+    }
+}
+"""
+
+
+def nodes(results):
+    return [node for _, node in results]
+
+
+def parents(path):
+    return [p for p in path if isinstance(p, ast.Node)]
+
+
+class QueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.unit = parse.parse(SOURCE)
+
+    def select(self, selector):
+        return nodes(query.select(selector, self.unit))
+
+    def test_type(self):
+        self.assertEqual(self.select('MethodDeclaration'),
+                         nodes(self.unit.filter(tree.MethodDeclaration)))
+        self.assertEqual(self.select('Statement'),
+                         nodes(self.unit.filter(tree.Statement)))
+        self.assertEqual(len(self.select('*')), len(list(self.unit)))
+
+    def test_attributes(self):
+        self.assertEqual([m.name for m in self.select('MethodDeclaration[name=/^get/]')],
+                         ['getX', 'getY'])
+        self.assertEqual([m.name for m in self.select('MethodDeclaration[name!=/^get/]')],
+                         ['m'])
+        self.assertEqual([m.name for m in self.select('MethodDeclaration[modifiers=public]')],
+                         ['getX', 'getY'])
+        self.assertEqual([m.name for m in self.select('MethodDeclaration[name="m"]')],
+                         ['m'])
+        self.assertEqual(len(self.select('FormalParameter[varargs]')), 1)
+        self.assertEqual(len(self.select('FormalParameter[varargs=True]')), 1)
+        self.assertEqual(len(self.select('ReturnStatement[expression]')), 3)
+        self.assertEqual(len(self.select('[member=close]')), 3)
+
+    def test_combinators(self):
+        selector = 'MethodDeclaration[name=/^get/] > ReturnStatement MethodInvocation[member=close]'
+        found = self.select(selector)
+
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0].qualifier, 'c')
+
+        self.assertEqual(len(self.select('MethodDeclaration[name=getY] MethodInvocation[member=close]')), 1)
+        self.assertEqual(len(self.select('MethodDeclaration > StatementExpression > MethodInvocation')), 1)
+        self.assertEqual(len(self.select('ClassDeclaration MethodDeclaration > MethodInvocation')), 0)
+        self.assertEqual(len(self.select('IfStatement ReturnStatement MethodInvocation[member=close]')), 1)
+
+    def test_union(self):
+        found = self.select('ReturnStatement, FieldDeclaration')
+        self.assertEqual([type(n) for n in found],
+                         [tree.FieldDeclaration] + [tree.ReturnStatement] * 3)
+
+    def test_indexed(self):
+        selectors = ['MethodDeclaration[name=/^get/] > ReturnStatement MethodInvocation',
+                     'ReferenceType, MethodInvocation[member=close]',
+                     'Statement', 'LambdaExpression', '*']
+
+        for source in corpus():
+            unit = parse.parse(source)
+            walked = [nodes(query.select(s, unit)) for s in selectors]
+            unit.build_index()
+            self.assertEqual([nodes(query.select(s, unit)) for s in selectors], walked)
+
+    def test_matches_reference(self):
+        # Compare with a hand written walk
+        q = Query('MethodDeclaration > ReturnStatement Literal')
+        for source in corpus():
+            unit = parse.parse(source)
+            expected = list()
+
+            for path, node in unit:
+                if not isinstance(node, tree.Literal):
+                    continue
+                ancestors = parents(path)
+                for i, parent in enumerate(ancestors[1:], 1):
+                    if (isinstance(parent, tree.ReturnStatement) and
+                            isinstance(ancestors[i - 1], tree.MethodDeclaration)):
+                        expected.append(node)
+                        break
+
+            self.assertEqual(nodes(q.select(unit)), expected)
+
+    def test_pruning(self):
+        q = Query('MethodInvocation')
+        self.assertTrue(issubclass(tree.ReferenceType, q.pruned))
+        self.assertEqual(Query('TypeArgument').pruned, (tree.Import,))
+
+        # The pruned subtrees hold only the types the query module expects
+        for source in corpus():
+            for path, node in parse.parse(source):
+                for pruned, contained in query._closed_subtrees:
+                    if any(isinstance(p, pruned) for p in path):
+                        self.assertIsInstance(node, contained)
+
+    def test_first(self):
+        q = query.compile('MethodInvocation[member=close]')
+        self.assertIs(q.first(self.unit), self.select('MethodInvocation')[0])
+        self.assertIsNone(query.compile('LambdaExpression').first(self.unit))
+
+    def test_syntax_errors(self):
+        for selector in ['', 'Nonsense', 'MethodDeclaration >', 'A,', '[name=/(/]',
+                         'MethodDeclaration[name', 'Statement)']:
+            self.assertRaises(QuerySyntaxError, Query, selector)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from .. import ast, parse, serialization, tokenizer, tree
+from ..serialization import TreeReader, SerializationError
+
+from .helpers import dump, corpus
+
+
+class SerializationTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for source in corpus():
+            unit = parse.parse(source)
+            self.assertEqual(dump(serialization.loads(serialization.dumps(unit))),
+                             dump(unit))
+
+    def test_smaller_than_pickle(self):
+        unit = parse.parse(next(corpus()))
+        self.assertLess(len(serialization.dumps(unit)),
+                        len(pickle.dumps(unit, pickle.HIGHEST_PROTOCOL)))
+
+    def test_undeclared_attributes(self):
+        expression = parse.parse_expression('(a + b).foo()')
+        loaded = serialization.loads(serialization.dumps(expression))
+
+        self.assertEqual(loaded.selectors[0].member, 'foo')
+        self.assertEqual(loaded.prefix_operators, [])
+
+    def test_shared_nodes(self):
+        shared = tree.BasicType(name='int', dimensions=[])
+        pair = tree.ElementArrayValue(values=[shared, shared])
+
+        loaded = serialization.loads(serialization.dumps(pair))
+        self.assertIs(loaded.values[0], loaded.values[1])
+
+    def test_tokens(self):
+        unit = parse.parse('class A { Runnable r = super::toString; }')
+        data = serialization.dumps(unit)
+
+        loaded = serialization.loads(data)
+        _, reference = next(loaded.filter(tree.MethodReference))
+        self.assertIsInstance(reference.expression, tokenizer.Keyword)
+        self.assertEqual(reference.expression.value, 'super')
+        self.assertEqual(reference.expression.position, (1, 24))
+
+    def test_unknown_values(self):
+        literal = tree.Literal(value=object())
+        self.assertRaises(SerializationError, serialization.dumps, literal)
+
+    def test_dump_and_load(self):
+        unit = parse.parse('class A { void m() {} }')
+        f = io.BytesIO()
+        ast.dump(unit, f)
+        f.seek(0)
+
+        self.assertEqual(dump(ast.load(f)), dump(unit))
+
+    def test_load_pickle(self):
+        unit = parse.parse('class A { void m() {} }')
+        f = io.BytesIO(pickle.dumps(unit))
+
+        self.assertEqual(dump(ast.load(f)), dump(unit))
+
+    def test_invalid_data(self):
+        self.assertRaises(SerializationError, TreeReader, b'nonsense')
+        self.assertRaises(SerializationError, serialization.dumps, [])
+
+
+class TreeReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.unit = parse.parse(next(corpus()))
+        self.data = serialization.dumps(self.unit)
+
+    def test_root(self):
+        reader = TreeReader(self.data)
+        self.assertIs(reader.node_type(0), tree.CompilationUnit)
+        self.assertEqual(dump(reader.load()), dump(self.unit))
+
+    def test_find_and_load_subtree(self):
+        reader = TreeReader(self.data)
+        methods = [node for _, node in self.unit.filter(tree.MethodDeclaration)]
+
+        indexes = reader.find(tree.MethodDeclaration)
+        self.assertEqual(len(indexes), len(methods))
+
+        loaded = [reader.load(index) for index in indexes]
+        self.assertEqual(sorted(dump(m) for m in loaded),
+                         sorted(dump(m) for m in methods))
+
+    def test_mmap(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'tree.bin')
+            with open(path, 'wb') as f:
+                f.write(self.data)
+
+            reader = TreeReader.open(path)
+            index = reader.find(tree.ClassDeclaration)[0]
+            self.assertEqual(reader.load(index).name, 'Syntax')
+            reader.data.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+
+from .. import ast, parser, tokenizer, tree
+from ..interning import NodeInterner
+from ..profiler import ParseProfiler
+
+from .helpers import corpus
+
+
+SOURCE = """package a;
+
+class A {
+    /** Doc */
+    @Deprecated
+    public int m(int a) {
+        return a + b * 2;
+    }
+
+    String f = "x";
+}
+"""
+
+
+def parse_with_spans(source, rule='parse'):
+    p = parser.Parser(tokenizer.tokenize(source))
+    p.set_spans()
+    return getattr(p, rule)()
+
+
+class SpanTest(unittest.TestCase):
+
+    def test_source_text(self):
+        unit = parse_with_spans(SOURCE)
+        method, field = unit.types[0].body
+        statement = method.body[0]
+
+        self.assertEqual(unit.source_text(SOURCE), SOURCE.strip())
+        self.assertEqual(method.source_text(SOURCE),
+                         '@Deprecated\n    public int m(int a) {\n'
+                         '        return a + b * 2;\n    }')
+        self.assertEqual(statement.source_text(SOURCE), 'return a + b * 2;')
+        self.assertEqual(statement.expression.source_text(SOURCE), 'a + b * 2')
+        self.assertEqual(statement.expression.operandr.source_text(SOURCE), 'b * 2')
+        self.assertEqual(field.source_text(SOURCE), 'String f = "x";')
+        self.assertEqual(field.type.source_text(SOURCE), 'String')
+
+    def test_nodes_without_rules(self):
+        source = ('class A { void m(final int a, @X String... b) {'
+                  ' for (int i = 0, j; i < a; i++) {}'
+                  ' for (final String s : b) {}'
+                  ' try {} catch (final E | F e) {} } }')
+        method = parse_with_spans(source).types[0].body[0]
+        control = method.body[0].control
+        enhanced = method.body[1].control
+
+        self.assertEqual([p.source_text(source) for p in method.parameters],
+                         ['final int a', '@X String... b'])
+        self.assertEqual([d.source_text(source) for d in control.init.declarators],
+                         ['i = 0', 'j'])
+        self.assertEqual(control.init.source_text(source), 'int i = 0, j')
+        self.assertEqual(enhanced.var.source_text(source), 'final String s')
+        self.assertEqual(enhanced.var.declarators[0].source_text(source), 's')
+        self.assertEqual(enhanced.iterable.source_text(source), 'b')
+        self.assertEqual(method.body[2].catches[0].parameter.source_text(source),
+                         'final E | F e')
+
+    def test_delimiters(self):
+        source = ('class A { void m() { if (a) f(x -> foo(x));'
+                  ' n = java.lang.String[].class.getName(); } }')
+        method = parse_with_spans(source).types[0].body[0]
+        statement, assignment = method.body
+        body = statement.then_statement.expression.arguments[0].body
+        reference = assignment.expression.value
+
+        self.assertEqual(statement.condition.source_text(source), 'a')
+        self.assertEqual(body.source_text(source), 'foo(x)')
+
+        # A primary's span covers its selectors, which do not cover the dot
+        self.assertEqual(reference.source_text(source), 'java.lang.String[].class.getName()')
+        self.assertEqual(reference.type.source_text(source), 'String[]')
+        self.assertEqual(reference.selectors[0].source_text(source), 'getName()')
+
+    def test_positions(self):
+        unit = parse_with_spans(SOURCE)
+        method = unit.types[0].body[0]
+
+        self.assertEqual(method.start_position, (5, 5))
+        self.assertEqual(method.end_position, (8, 6))
+        self.assertEqual(method.offsets, (SOURCE.index('@Deprecated'), SOURCE.index('}') + 1))
+
+    def test_nesting(self):
+        for source in corpus():
+            unit = parse_with_spans(source)
+
+            for path, node in ast.walk_tree(unit):
+                if node.span is None:
+                    continue
+
+                start, end = node.offsets
+                self.assertLessEqual(start, end)
+
+                for ancestor in path:
+                    if isinstance(ancestor, tree.Node) and ancestor.span is not None:
+                        self.assertLessEqual(ancestor.offsets[0], start)
+                        self.assertGreaterEqual(ancestor.offsets[1], end)
+
+    def test_complete(self):
+        for source in corpus():
+            unit = parse_with_spans(source)
+
+            for node in ast.walk_nodes(unit):
+                self.assertIsNotNone(node.span, '%s has no span' % (type(node).__name__,))
+
+                start, end = node.offsets
+                for child in ast.child_nodes(node):
+                    self.assertLessEqual(start, child.offsets[0])
+                    self.assertGreaterEqual(end, child.offsets[1])
+
+    def test_declarators(self):
+        source = ('class A { int x = 5, z = 3; int y; }'
+                  ' interface I { int X = 1, Y = 2; }')
+        unit = parse_with_spans(source)
+        field, other = unit.types[0].body
+        constant = unit.types[1].body[0]
+
+        self.assertEqual([d.source_text(source) for d in field.declarators],
+                         ['x = 5', 'z = 3'])
+        self.assertEqual(other.declarators[0].source_text(source), 'y')
+        self.assertEqual([d.source_text(source) for d in constant.declarators],
+                         ['X = 1', 'Y = 2'])
+
+    def test_unicode_escapes(self):
+        source = 'class A { String \\u0061b = "x\\u0041y"; }'
+        field = parse_with_spans(source).types[0].body[0]
+
+        self.assertEqual(field.declarators[0].name, 'ab')
+        self.assertEqual(field.source_text(source), 'String \\u0061b = "x\\u0041y";')
+        self.assertEqual(field.declarators[0].initializer.source_text(source),
+                         '"x\\u0041y"')
+
+    def test_snippet(self):
+        expression = parse_with_spans('a + b * c;', 'parse_expression')
+        self.assertEqual(expression.source_text('a + b * c;'), 'a + b * c')
+        self.assertEqual(expression.operandr.source_text('a + b * c;'), 'b * c')
+
+    def test_disabled(self):
+        p = parser.Parser(tokenizer.tokenize(SOURCE))
+        p.set_spans()
+        p.set_spans(False)
+
+        self.assertNotIn('parse_compilation_unit', vars(p))
+        self.assertIsNone(p.parse().span)
+
+    def test_profiler(self):
+        profiler = ParseProfiler()
+        p = parser.Parser(tokenizer.tokenize(SOURCE))
+        p.set_profiler(profiler)
+        p.set_spans()
+        p.set_profiler(None)
+        p.set_profiler(profiler)
+
+        unit = p.parse()
+        self.assertEqual(profiler.stats['parse_compilation_unit'].calls, 1)
+        self.assertEqual(unit.source_text(SOURCE), SOURCE.strip())
+
+    def test_not_interned(self):
+        p = parser.Parser(tokenizer.tokenize('class A { int a; int b; }'))
+        p.set_spans()
+        p.set_node_interner(NodeInterner())
+        a, b = p.parse().types[0].body
+
+        self.assertIsNot(a.type, b.type)
+
+
+if __name__ == "__main__":
+    unittest.main()
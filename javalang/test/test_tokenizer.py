@@ -1,5 +1,7 @@
 import unittest
-from .. import tokenizer
+from .. import parser, tokenizer
+
+from .helpers import corpus
 
 
 class TestTokenizer(unittest.TestCase):
@@ -188,5 +190,49 @@ int k;
         self.assertEqual(token[0].position.column, 1)
         self.assertEqual(token[3].position.column, 1)
 
+    def test_offsets(self):
+        code = 'int /* comment */ j\\u0061 = "\\u0041";\nx;'
+        tokens = list(tokenizer.tokenize(code))
+        texts = [code[token.offset:token.end_offset] for token in tokens]
+
+        self.assertEqual(tokens[1].value, 'ja')
+        self.assertEqual(tokens[3].value, '"A"')
+        self.assertEqual(texts, ['int', 'j\\u0061', '=', '"\\u0041"', ';', 'x', ';'])
+
+    def test_trivia(self):
+        code = 'int /* c */ x; // end\n'
+        tokens = list(tokenizer.tokenize(code, trivia=True))
+
+        self.assertEqual(tokens[0].trivia, ())
+        self.assertEqual(tokens[1].trivia, ((3, 4), (4, 11), (11, 12)))
+        self.assertEqual(tokens[2].trivia, ())
+        self.assertEqual(type(tokens[-1]), tokenizer.EndOfInput)
+        self.assertEqual(tokens[-1].trivia, ((14, 15), (15, 22)))
+        self.assertEqual(tokenizer.untokenize(tokens, code), code)
+
+        self.assertIsNone(list(tokenizer.tokenize(code))[1].trivia)
+
+    def test_untokenize(self):
+        codes = [
+            '',
+            '  \t\r\n',
+            '/** Doc */\r\nclass A {\f}\r\n',
+            'int x; // no newline',
+            '/* unicode \\u002a/ int */ j\\u0061 = "\\u0041";\\u0020',
+            'a /* unterminated',
+            'a # b',
+        ]
+
+        for code in codes:
+            tokens = list(tokenizer.tokenize(code, ignore_errors=True, trivia=True))
+            self.assertEqual(tokenizer.untokenize(tokens, code), code)
+
+    def test_trivia_parse(self):
+        for code in corpus():
+            tokens = list(tokenizer.tokenize(code, trivia=True))
+            self.assertEqual(tokenizer.untokenize(tokens, code), code)
+            self.assertEqual(parser.Parser(tokens).parse(),
+                             parser.Parser(tokenizer.tokenize(code)).parse())
+
 if __name__=="__main__":
     unittest.main()
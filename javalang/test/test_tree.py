@@ -0,0 +1,112 @@
+import unittest
+
+from .. import ast, parse, tree
+
+from .helpers import corpus
+
+
+SOURCE = """
+class A {
+    int a, b;
+    String c;
+
+    A() {}
+    A(int a) {}
+
+    void m() {}
+    void m(int a) {}
+    int n() { return 0; }
+
+    class B {}
+}
+"""
+
+
+class MembersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.declaration = parse.parse(SOURCE).types[0]
+
+    def test_partition(self):
+        for source in corpus():
+            for _, declaration in parse.parse(source).filter(tree.TypeDeclaration):
+                body = declaration.member_declarations()
+                kinds = [(declaration.fields, tree.FieldDeclaration),
+                         (declaration.methods, tree.MethodDeclaration),
+                         (declaration.constructors, tree.ConstructorDeclaration)]
+
+                for members, kind in kinds:
+                    self.assertEqual(members, [d for d in body if isinstance(d, kind)])
+
+    def test_lookups(self):
+        a = self.declaration
+
+        self.assertEqual([len(m.parameters) for m in a.methods_named('m')], [0, 1])
+        self.assertEqual(a.methods_named('x'), [])
+        self.assertIs(a.field('b'), a.fields[0])
+        self.assertIs(a.field('c'), a.fields[1])
+        self.assertIsNone(a.field('m'))
+
+    def test_cached(self):
+        partition = self.declaration._partition()
+        self.declaration.methods
+        self.declaration.field('a')
+
+        self.assertIs(self.declaration._partition(), partition)
+
+        # Modifying the returned lists does not affect the cache
+        self.declaration.methods.append(None)
+        self.assertEqual(len(self.declaration.methods), 3)
+
+    def test_invalidation(self):
+        a = self.declaration
+        method = tree.MethodDeclaration(name='o', parameters=[])
+
+        a.body.append(method)
+        self.assertEqual(a.methods_named('o'), [method])
+
+        # Replacing a declaration in place, as NodeTransformer does
+        field = tree.FieldDeclaration(declarators=[tree.VariableDeclarator(name='f')])
+        a.body[a.body.index(method)] = field
+        self.assertEqual(a.methods_named('o'), [])
+        self.assertIs(a.field('f'), field)
+
+        a.body = [method]
+        self.assertEqual(a.methods, [method])
+        self.assertEqual(a.fields, [])
+
+        a.body = None
+        self.assertEqual(a.methods, [])
+
+    def test_transformer(self):
+        class Transformer(ast.NodeTransformer):
+            def visit_MethodDeclaration(self, node):
+                if node.name == 'a':
+                    return parse.parse('class T { int f; }').types[0].body[0]
+                return node
+
+        declaration = parse.parse('class A { void a() {} void b() {} }').types[0]
+        self.assertEqual([m.name for m in declaration.methods], ['a', 'b'])
+
+        Transformer().visit(declaration)
+        self.assertEqual([m.name for m in declaration.methods], ['b'])
+        self.assertIs(declaration.field('f'), declaration.body[0])
+
+    def test_enum(self):
+        enum = parse.parse("""
+            enum E {
+                A, B;
+                int f;
+                E() {}
+                void m() {}
+            }
+        """).types[0]
+
+        self.assertEqual([f.declarators[0].name for f in enum.fields], ['f'])
+        self.assertEqual([m.name for m in enum.methods], ['m'])
+        self.assertEqual(len(enum.constructors), 1)
+        self.assertIsNotNone(enum.field('f'))
+
+
+if __name__ == "__main__":
+    unittest.main()
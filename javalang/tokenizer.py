@@ -1,3 +1,4 @@
+import bisect
 import re
 import unicodedata
 from collections import namedtuple
@@ -11,11 +12,20 @@ class LexerError(Exception):
 Position = namedtuple('Position', ['line', 'column'])
 
 class JavaToken(object):
-    def __init__(self, value, position=None, javadoc=None):
+    def __init__(self, value, position=None, javadoc=None, offset=None, end_offset=None,
+                 trivia=None):
         self.value = value
         self.position = position
         self.javadoc = javadoc
 
+        # Character offsets of the token's start and end in the source text
+        self.offset = offset
+        self.end_offset = end_offset
+
+        # In trivia mode, the (start, end) offsets of the whitespace and
+        # comments preceding the token
+        self.trivia = trivia
+
     def __repr__(self):
         if self.position:
             return '%s "%s" line %d, position %d' % (
@@ -149,24 +159,34 @@ class JavaTokenizer(object):
 
     IDENT_PART_CATEGORIES = set(['Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Mc', 'Mn', 'Nd', 'Nl', 'Pc', 'Sc'])
 
-    def __init__(self, data, ignore_errors=False):
+    # Operators grouped by length, shared by all tokenizer instances
+    operators = list(set() for _ in range(0, Operator.MAX_LEN))
+
+    for v in Operator.VALUES:
+        operators[len(v) - 1].add(v)
+    del v
+
+    whitespace_consumer = re.compile(r'[^\s]')
+
+    def __init__(self, data, ignore_errors=False, intern_table=None, trivia=False):
         self.data = data
         self.ignore_errors = ignore_errors
+        self.intern_table = intern_table
+        self.trivia = trivia
         self.errors = []
 
         # Rows and columns both start at 1
         self.current_line = 1
         self.start_of_line = -1
 
-        self.operators = [set() for i in range(0, Operator.MAX_LEN)]
-
-        for v in Operator.VALUES:
-            self.operators[len(v) - 1].add(v)
-
-        self.whitespace_consumer = re.compile(r'[^\s]')
-
         self.javadoc = None
 
+        # Unicode escapes make the text being tokenized shorter than the
+        # source. For each escape, the offset following it in the tokenized
+        # text and the difference to the corresponding source offset.
+        self.escape_offsets = []
+        self.escape_shifts = []
+
 
     def reset(self):
         self.i = 0
@@ -436,6 +456,11 @@ class JavaTokenizer(object):
         j = 0
         length = len(data)
 
+        # Length of the converted data so far
+        converted = 0
+        self.escape_offsets = []
+        self.escape_shifts = []
+
         NONE         = 0
         ELIGIBLE     = 1
         MARKER_FOUND = 2
@@ -458,6 +483,7 @@ class JavaTokenizer(object):
                 if c == 'u':
                     state = MARKER_FOUND
                     new_data.append(data[i:j - 1])
+                    converted += j - 1 - i
                 else:
                     state = NONE
 
@@ -475,6 +501,10 @@ class JavaTokenizer(object):
                     i = j + 4
                     j = i
 
+                    converted += 1
+                    self.escape_offsets.append(converted)
+                    self.escape_shifts.append(i - converted)
+
                     state = NONE
 
                     continue
@@ -486,14 +516,29 @@ class JavaTokenizer(object):
         self.data = ''.join(new_data)
         self.length = len(self.data)
 
+    def source_offset(self, i):
+        """ Maps an offset in the tokenized text to the source text """
+
+        k = bisect.bisect_right(self.escape_offsets, i)
+        if k:
+            return i + self.escape_shifts[k - 1]
+        return i
+
     def tokenize(self):
         self.reset()
 
         # Convert unicode escapes
         self.pre_tokenize()
 
+        intern_table = self.intern_table
+
+        # The spans of whitespace and comments since the last token, in trivia
+        # mode. Characters skipped after an error are kept as trivia as well.
+        trivia = [] if self.trivia else None
+
         while self.i < self.length:
             token_type = None
+            value = None
 
             c = self.data[self.i]
             c_next = None
@@ -504,13 +549,19 @@ class JavaTokenizer(object):
                 startswith = c + c_next
 
             if c.isspace():
+                start = self.i
                 self.consume_whitespace()
+                if trivia is not None:
+                    trivia.append((start, self.i))
                 continue
 
             elif startswith in ("//", "/*"):
+                start = self.i
                 comment = self.read_comment()
                 if comment.startswith("/**"):
                     self.javadoc = comment
+                if trivia is not None:
+                    trivia.append((start, self.i))
                 continue
 
             elif startswith == '..' and self.try_operator():
@@ -540,16 +591,37 @@ class JavaTokenizer(object):
             elif self.is_java_identifier_start(c):
                 token_type = self.read_identifier()
 
+                # Share the values of identifiers and keywords
+                if intern_table is not None:
+                    value = intern_table.intern(self.data[self.i:self.j])
+
             elif self.try_operator():
                 token_type = Operator
 
             else:
                 self.error('Could not process token', c)
+                if trivia is not None:
+                    trivia.append((self.i, self.i + 1))
                 self.i = self.i + 1
                 continue
 
             position = Position(self.current_line, self.i - self.start_of_line)
-            token = token_type(self.data[self.i:self.j], position, self.javadoc)
+            if value is None:
+                value = self.data[self.i:self.j]
+
+            if self.escape_offsets:
+                offset = self.source_offset(self.i)
+                end_offset = self.source_offset(self.j)
+            else:
+                offset = self.i
+                end_offset = self.j
+
+            token = token_type(value, position, self.javadoc, offset, end_offset)
+
+            if trivia is not None:
+                token.trivia = self.trivia_spans(trivia)
+                del trivia[:]
+
             yield token
 
             if self.javadoc:
@@ -557,6 +629,23 @@ class JavaTokenizer(object):
 
             self.i = self.j
 
+        if trivia is not None:
+            # Trivia following the last token is held by an empty EndOfInput
+            end = self.source_offset(self.length)
+            position = Position(self.current_line, self.length - self.start_of_line)
+            yield EndOfInput('', position, None, end, end, self.trivia_spans(trivia))
+
+    def trivia_spans(self, trivia):
+        if not trivia:
+            return ()
+
+        if self.escape_offsets:
+            source_offset = self.source_offset
+            return tuple((source_offset(start), source_offset(end))
+                         for start, end in trivia)
+
+        return tuple(trivia)
+
     def error(self, message, char=None):
         # Provide additional information in the errors message
         line_start = self.data.rfind('\n', 0, self.i) + 1
@@ -575,10 +664,33 @@ class JavaTokenizer(object):
         if not self.ignore_errors:
             raise error
 
-def tokenize(code, ignore_errors=False):
-    tokenizer = JavaTokenizer(code, ignore_errors)
+def tokenize(code, ignore_errors=False, intern_table=None, trivia=False):
+    """ Generates the tokens of the code. With trivia, each token also holds
+    the offsets of the whitespace and comments preceding it, and a final
+    EndOfInput token holds those at the end of the code, so that
+    untokenize() gives back the code exactly.
+
+    """
+
+    tokenizer = JavaTokenizer(code, ignore_errors, intern_table, trivia)
     return tokenizer.tokenize()
 
+def untokenize(tokens, code):
+    """ Returns the text of the code covered by tokens produced in trivia
+    mode, together with their trivia. The code is that passed to tokenize(),
+    decoded if it was given as bytes.
+
+    """
+
+    parts = list()
+
+    for token in tokens:
+        # Trivia and tokens are contiguous, so each token needs one slice
+        start = token.trivia[0][0] if token.trivia else token.offset
+        parts.append(code[start:token.end_offset])
+
+    return ''.join(parts)
+
 def reformat_tokens(tokens):
     indent = 0
     closed_block = False
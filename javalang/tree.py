@@ -1,34 +1,137 @@
 
-from .ast import Node
+import operator
+
+from .ast import Node, NodeIndex
+from . import javadoc
 
 # ------------------------------------------------------------------------------
 
 class CompilationUnit(Node):
     attrs = ("package", "imports", "types")
 
+    cache_slots = ("_index",)
+
+    def build_index(self):
+        """ Builds a NodeIndex of the tree which filter() then uses to find
+        nodes by type. The index must be rebuilt, or dropped, after the tree
+        is modified.
+
+        """
+
+        self._index = NodeIndex(self)
+        return self._index
+
+    def drop_index(self):
+        self._index = None
+
 class Import(Node):
     attrs = ("path", "static", "wildcard")
 
 class Documented(Node):
     attrs = ("documentation",)
 
+    # Mixed into other declarations, so adds no slots of its own
+    __slots__ = ()
+
+    @property
+    def doc(self):
+        """ The documentation parsed into a javadoc.DocBlock, or None. Parsed
+        comments are cached by their text and shared between declarations,
+        so the DocBlock must not be modified.
+
+        """
+
+        documentation = getattr(self, "documentation", None)
+
+        if documentation is None:
+            return None
+
+        return javadoc.parse_cached(documentation)
+
 class Declaration(Node):
     attrs = ("modifiers", "annotations")
 
+    # Mixed into other declarations, so adds no slots of its own
+    __slots__ = ()
+
 class TypeDeclaration(Declaration, Documented):
     attrs = ("name", "body")
 
+    cache_slots = ("_members",)
+
+    def member_declarations(self):
+        if self.body is None:
+            return ()
+        return self.body
+
+    def _partition(self):
+        # The partition is rebuilt when any declaration is added, removed or
+        # replaced, including by changes made to the list in place
+        declarations = self.member_declarations()
+        members = getattr(self, "_members", None)
+
+        if members is None or not members.matches(declarations):
+            members = self._members = _Members(declarations)
+
+        return members
+
     @property
     def fields(self):
-        return [decl for decl in self.body if isinstance(decl, FieldDeclaration)]
+        return list(self._partition().fields)
 
     @property
     def methods(self):
-        return [decl for decl in self.body if isinstance(decl, MethodDeclaration)]
+        return list(self._partition().methods)
 
     @property
     def constructors(self):
-        return [decl for decl in self.body if isinstance(decl, ConstructorDeclaration)]
+        return list(self._partition().constructors)
+
+    def methods_named(self, name):
+        """ Returns the methods with the given name, in order """
+
+        return list(self._partition().methods_by_name.get(name, ()))
+
+    def field(self, name):
+        """ Returns the field declaration declaring a variable with the given
+        name, or None
+
+        """
+
+        return self._partition().fields_by_name.get(name)
+
+
+class _Members(object):
+    """ The member declarations of a type partitioned by kind """
+
+    __slots__ = ("declarations", "fields", "methods", "constructors",
+                 "methods_by_name", "fields_by_name")
+
+    def __init__(self, declarations):
+        self.declarations = tuple(declarations)
+
+        self.fields = list()
+        self.methods = list()
+        self.constructors = list()
+        self.methods_by_name = dict()
+        self.fields_by_name = dict()
+
+        for declaration in declarations:
+            if isinstance(declaration, FieldDeclaration):
+                self.fields.append(declaration)
+                for declarator in declaration.declarators or ():
+                    self.fields_by_name.setdefault(declarator.name, declaration)
+            elif isinstance(declaration, MethodDeclaration):
+                self.methods.append(declaration)
+                self.methods_by_name.setdefault(declaration.name, []).append(declaration)
+            elif isinstance(declaration, ConstructorDeclaration):
+                self.constructors.append(declaration)
+
+    def matches(self, declarations):
+        """ Returns whether declarations holds the same nodes, in order """
+
+        return (len(self.declarations) == len(declarations) and
+                all(map(operator.is_, self.declarations, declarations)))
 
 class PackageDeclaration(Declaration, Documented):
     attrs = ("name",)
@@ -39,13 +142,10 @@ class ClassDeclaration(TypeDeclaration):
 class EnumDeclaration(TypeDeclaration):
     attrs = ("implements",)
 
-    @property
-    def fields(self):
-        return [decl for decl in self.body.declarations if isinstance(decl, FieldDeclaration)]
-
-    @property
-    def methods(self):
-        return [decl for decl in self.body.declarations if isinstance(decl, MethodDeclaration)]
+    def member_declarations(self):
+        if self.body is None or self.body.declarations is None:
+            return ()
+        return self.body.declarations
 
 class InterfaceDeclaration(TypeDeclaration):
     attrs = ("type_parameters", "extends",)
@@ -88,6 +188,9 @@ class ElementArrayValue(Node):
 class Member(Documented):
     attrs = ()
 
+    # Mixed into other declarations, so adds no slots of its own
+    __slots__ = ()
+
 class MethodDeclaration(Member, Declaration):
     attrs = ("type_parameters", "return_type", "name", "parameters", "throws", "body")
 
@@ -194,6 +297,9 @@ class EnhancedForControl(Node):
 class Expression(Node):
     attrs = ()
 
+    # Set by the parser on parenthesized expressions
+    extra_slots = ("prefix_operators", "postfix_operators", "selectors")
+
 class Assignment(Expression):
     attrs = ("expressionl", "value", "type")
 
@@ -278,3 +384,8 @@ class EnumConstantDeclaration(Declaration, Documented):
 class AnnotationMethod(Declaration):
     attrs = ("name", "return_type", "dimensions", "default")
 
+    # Set by the parser like that of other declarations
+    extra_slots = ("documentation",)
+
+    doc = Documented.doc
+
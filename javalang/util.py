@@ -89,12 +89,20 @@ class LookAheadIterator(object):
 
 class LookAheadListIterator(object):
     def __init__(self, iterable):
+        self.default = None
+        self.reset(iterable)
+
+    def reset(self, iterable):
+        """ Replace the underlying values, returning the iterator to its initial
+        state. The default value is retained.
+
+        """
+
         self.list = list(iterable)
 
         self.marker = 0
         self.saved_markers = []
 
-        self.default = None
         self.value = None
 
     def __iter__(self):